@@ -2,30 +2,104 @@
 Cliente API - Comunicación con servidor Flask
 """
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import os
-from datetime import datetime
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from diario import DiarioPuntuaciones
+from motor_local import firmar
+from reintentos import CircuitBreaker, PoliticaReintentos
 
 class APIClient:
-    def __init__(self, base_url=None):
+    # Conexiones keep-alive que se mantienen abiertas por host
+    POOL_CONEXIONES = 8
+    # Puntuaciones por petición al sincronizar el diario
+    TAMANO_LOTE = 200
+    
+    def __init__(self, base_url=None, directorio_local=None):
+        """
+        directorio_local: dónde guardar el diario de puntuaciones y la clave
+        de la instalación. Por defecto el directorio de trabajo (los del
+        jugador, migrando la caché antigua); el enjambre da uno por jugador
+        virtual para no tocar los suyos
+        """
         # URL del servidor (puede venir de variable de entorno)
         self.base_url = base_url or os.getenv('API_URL', 'http://localhost:5000/api')
         self.timeout = 5
         self.session_id = None
-        self.cache_file = "puntuaciones_temp.json"
+        if directorio_local is None:
+            self.cache_file = "puntuaciones_temp.json"  # formato antiguo, se migra al diario
+            self.diario = DiarioPuntuaciones(cache_antigua=self.cache_file)
+        else:
+            self.cache_file = None
+            self.diario = DiarioPuntuaciones(os.path.join(directorio_local, "puntuaciones_pendientes.jsonl"))
+        # Identificador y clave de firma de esta instalación (los emite el servidor)
+        self.ruta_instalacion = os.path.join(directorio_local or "", ".clave_partidas")
+        self._instalacion = None
+        self._lock_sincronizacion = threading.Lock()
+        self.peticiones_enviadas = 0
+        self.peticiones_por_endpoint = {}
+        self._lock_stats = threading.Lock()
+        
+        # Sesión HTTP persistente: reutiliza TCP (y TLS) entre peticiones
+        self.http = requests.Session()
+        self.adaptador = HTTPAdapter(
+            pool_connections=2,
+            pool_maxsize=self.POOL_CONEXIONES,
+            max_retries=0  # los reintentos los gestiona _reintentar_peticion
+        )
+        self.http.mount('http://', self.adaptador)
+        self.http.mount('https://', self.adaptador)
+        
+        # Reintentos con backoff + jitter y un circuit breaker por endpoint
+        self.politica_reintentos = PoliticaReintentos()
+        self.circuitos = {}
+        self._lock_circuitos = threading.Lock()
         print(f"🔧 API Client inicializado con URL: {self.base_url}")
     
-    def _hacer_peticion(self, endpoint, metodo="GET", datos=None):
+    def cerrar(self):
+        """Cerrar conexiones abiertas"""
+        self.http.close()
+    
+    def estadisticas_conexion(self):
+        """
+        Peticiones enviadas, conexiones TCP abiertas y ratio de reutilización
+        """
+        conexiones = 0
+        pools = self.adaptador.poolmanager.pools
+        for clave in pools.keys():
+            pool = pools.get(clave)
+            if pool is not None:
+                conexiones += pool.num_connections
+        
+        peticiones = self.peticiones_enviadas
+        reutilizadas = max(peticiones - conexiones, 0)
+        return {
+            'peticiones': peticiones,
+            'conexiones_nuevas': conexiones,
+            'reutilizadas': reutilizadas,
+            'ratio_reutilizacion': round(reutilizadas / peticiones, 4) if peticiones else 0.0
+        }
+    
+    def _hacer_peticion(self, endpoint, metodo="GET", datos=None, cabeceras=None):
         """
         Realizar petición HTTP con manejo de errores
         """
         try:
             url = f"{self.base_url}/{endpoint}"
+            ruta = endpoint.split('?', 1)[0]
+            with self._lock_stats:
+                self.peticiones_enviadas += 1
+                self.peticiones_por_endpoint[ruta] = self.peticiones_por_endpoint.get(ruta, 0) + 1
             
             if metodo == "POST":
-                response = requests.post(url, json=datos, timeout=self.timeout)
+                response = self.http.post(url, json=datos, headers=cabeceras, timeout=self.timeout)
             else:
-                response = requests.get(url, timeout=self.timeout)
+                response = self.http.get(url, headers=cabeceras, timeout=self.timeout)
             
             # Verificar status code
             response.raise_for_status()
@@ -34,35 +108,105 @@ class APIClient:
         
         except requests.exceptions.ConnectionError:
             print(f"❌ Error de conexión: No se puede conectar al servidor {self.base_url}")
-            return {'error': True, 'mensaje': 'Sin conexión al servidor'}
+            return {'error': True, 'mensaje': 'Sin conexión al servidor', 'reintentable': True}
         
         except requests.exceptions.Timeout:
             print(f"⏱️ Timeout: El servidor tardó demasiado en responder")
-            return {'error': True, 'mensaje': 'Timeout del servidor'}
+            return {'error': True, 'mensaje': 'Timeout del servidor', 'reintentable': True}
         
         except requests.exceptions.HTTPError as e:
-            print(f"❌ Error HTTP {e.response.status_code}: {e}")
-            return {'error': True, 'mensaje': f'Error del servidor: {e.response.status_code}'}
+            status = e.response.status_code
+            print(f"❌ Error HTTP {status}: {e}")
+            return {
+                'error': True,
+                'mensaje': f'Error del servidor: {status}',
+                'status': status,
+                # 4xx (salvo 429) no mejoran reintentando
+                'reintentable': status >= 500 or status == 429,
+                'retry_after': self._leer_retry_after(e.response)
+            }
         
         except requests.exceptions.RequestException as e:
             print(f"❌ Error en petición: {e}")
-            return {'error': True, 'mensaje': 'Error en la petición'}
+            return {'error': True, 'mensaje': 'Error en la petición', 'reintentable': True}
         
         except json.JSONDecodeError:
             print("❌ Error: Respuesta del servidor no es JSON válido")
             return {'error': True, 'mensaje': 'Respuesta inválida del servidor'}
     
-    def _reintentar_peticion(self, endpoint, metodo="GET", datos=None, intentos=3):
+    def ejecutar_lote(self, peticiones):
+        """
+        Enviar varias peticiones seguidas en paralelo sobre el pool keep-alive
+        peticiones: lista de (endpoint, metodo, datos)
+        Returns: lista de resultados en el mismo orden
+        """
+        if len(peticiones) <= 1:
+            return [self._reintentar_peticion(*p) for p in peticiones]
+        
+        hilos = min(len(peticiones), self.POOL_CONEXIONES)
+        with ThreadPoolExecutor(max_workers=hilos) as executor:
+            return list(executor.map(lambda p: self._reintentar_peticion(*p), peticiones))
+    
+    @staticmethod
+    def _leer_retry_after(response):
+        """Segundos de la cabecera Retry-After (número o fecha HTTP), o None"""
+        valor = response.headers.get('Retry-After')
+        if not valor:
+            return None
+        try:
+            return max(float(valor), 0.0)
+        except ValueError:
+            pass
+        try:
+            fecha = parsedate_to_datetime(valor)
+            return max((fecha - datetime.now(timezone.utc)).total_seconds(), 0.0)
+        except (TypeError, ValueError):
+            return None
+    
+    def _circuito(self, endpoint):
+        """Circuit breaker del endpoint (sin query string)"""
+        ruta = endpoint.split('?', 1)[0]
+        with self._lock_circuitos:
+            circuito = self.circuitos.get(ruta)
+            if circuito is None:
+                circuito = self.circuitos[ruta] = CircuitBreaker()
+            return circuito
+    
+    def _reintentar_peticion(self, endpoint, metodo="GET", datos=None, intentos=None,
+                             cabeceras=None):
         """
         Reintentar petición en caso de fallo
+        Las acciones de juego llevan Idempotency-Key en cabeceras: todos los
+        intentos usan la misma clave y el servidor no repite la acción.
+        Entre intentos se espera según la política (backoff + jitter o
+        Retry-After); con el circuito abierto se falla sin tocar la red.
         """
+        politica = self.politica_reintentos
+        intentos = intentos or politica.intentos
+        circuito = self._circuito(endpoint)
+        
         for intento in range(intentos):
-            resultado = self._hacer_peticion(endpoint, metodo, datos)
+            if not circuito.permitir():
+                resultado = {
+                    'error': True,
+                    'mensaje': 'Servidor no disponible, reintentando más tarde',
+                    'circuito_abierto': True
+                }
+                break
             
-            if not resultado.get('error'):
+            resultado = self._hacer_peticion(endpoint, metodo, datos, cabeceras)
+            
+            # Errores de juego (ej. "No es tu turno") o 4xx: el servidor responde
+            if not resultado.get('error') or not resultado.get('reintentable'):
+                circuito.registrar_exito()
                 return resultado
             
-            print(f"🔄 Reintentando... ({intento + 1}/{intentos})")
+            circuito.registrar_fallo(resultado.get('retry_after'))
+            
+            if intento + 1 < intentos:
+                espera = politica.espera(intento, resultado.get('retry_after'))
+                print(f"🔄 Reintentando en {espera:.2f}s... ({intento + 1}/{intentos})")
+                politica.dormir(espera)
         
         # Si todos los intentos fallan, guardar en cache local
         if metodo == "POST" and endpoint == "guardar_puntuacion":
@@ -73,82 +217,154 @@ class APIClient:
     def _guardar_local(self, datos):
         """
         Guardar puntuación localmente cuando falla la conexión
+        Las partidas del motor local traen además su registro (session_id,
+        semilla, jugadas...), que se conserva para subirlo.
+        Solo añade una línea al diario: O(1) por puntuación
         """
         try:
-            puntuacion = {
-                'nombre': datos.get('nombre'),
-                'puntos': datos.get('puntos'),
-                'fecha': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                'sincronizado': False
-            }
-            
-            # Leer cache existente
-            cache = []
-            if os.path.exists(self.cache_file):
-                with open(self.cache_file, 'r') as f:
-                    cache = json.load(f)
-            
-            # Añadir nueva puntuación
-            cache.append(puntuacion)
-            
-            # Guardar cache
-            with open(self.cache_file, 'w') as f:
-                json.dump(cache, f, indent=2)
+            puntuacion = dict(datos)
+            puntuacion.setdefault('fecha', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            self.diario.agregar(puntuacion)
             
             print(f"💾 Puntuación guardada localmente (sin conexión)")
         
         except Exception as e:
             print(f"❌ Error al guardar localmente: {e}")
     
+    def _clave_instalacion(self):
+        """
+        (instalacion, clave) para firmar las partidas locales: del fichero
+        .clave_partidas o, la primera vez, de POST /api/instalaciones
+        Returns: tupla o None si el servidor no la da
+        """
+        if self._instalacion is not None:
+            return self._instalacion
+        if os.path.exists(self.ruta_instalacion):
+            try:
+                with open(self.ruta_instalacion, 'r') as f:
+                    datos = json.load(f)
+                self._instalacion = (datos['instalacion'], datos['clave'])
+                return self._instalacion
+            except (OSError, ValueError, KeyError, TypeError):
+                print(f"⚠️ {self.ruta_instalacion} ilegible, se pide una clave nueva")
+        
+        resultado = self._reintentar_peticion('instalaciones', 'POST', {})
+        if resultado.get('error') or not resultado.get('clave'):
+            print(f"⚠️ El servidor no da clave para subir partidas locales: {resultado.get('mensaje')}")
+            return None
+        temporal = self.ruta_instalacion + ".tmp"
+        descriptor = os.open(temporal, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descriptor, 'w') as f:
+            json.dump({'instalacion': resultado['instalacion'], 'clave': resultado['clave']}, f)
+        os.replace(temporal, self.ruta_instalacion)
+        self._instalacion = (resultado['instalacion'], resultado['clave'])
+        return self._instalacion
+    
+    def _olvidar_clave_instalacion(self):
+        """La clave ya no vale (el servidor cambió su clave maestra): pedir otra la próxima vez"""
+        self._instalacion = None
+        try:
+            os.remove(self.ruta_instalacion)
+        except FileNotFoundError:
+            pass
+    
     def sincronizar_cache(self):
         """
         Sincronizar puntuaciones guardadas localmente con el servidor
+        Se firman con la clave de la instalación y se suben en lotes (POST
+        /api/puntuaciones/lote). Las guardadas o duplicadas salen del
+        diario; las rechazadas se quedan apartadas en él (diario.rechazadas)
+        y las de firma inválida siguen pendientes con una clave nueva.
+        Returns: lista de (session_id, motivo) rechazadas en esta pasada
         """
-        if not os.path.exists(self.cache_file):
-            return
+        with self._lock_sincronizacion:
+            try:
+                return self._sincronizar()
+            except Exception as e:
+                print(f"❌ Error al sincronizar cache: {e}")
+                return []
+    
+    def sincronizar_en_segundo_plano(self):
+        """sincronizar_cache en un hilo (si ya hay una en curso no hace nada)"""
+        if self._lock_sincronizacion.locked():
+            return None
+        hilo = threading.Thread(target=self.sincronizar_cache, daemon=True)
+        hilo.start()
+        return hilo
+    
+    def _sincronizar(self):
+        pendientes = self.diario.pendientes()
+        if not pendientes:
+            return []
+        instalacion = self._clave_instalacion()
+        if instalacion is None:
+            return []
+        id_instalacion, clave = instalacion
         
-        try:
-            with open(self.cache_file, 'r') as f:
-                cache = json.load(f)
-            
-            # Intentar sincronizar cada puntuación
-            sincronizadas = []
-            for puntuacion in cache:
-                if not puntuacion.get('sincronizado'):
-                    resultado = self._hacer_peticion('guardar_puntuacion', 'POST', {
-                        'nombre': puntuacion['nombre'],
-                        'puntos': puntuacion['puntos']
-                    })
-                    
-                    if not resultado.get('error'):
-                        puntuacion['sincronizado'] = True
-                        sincronizadas.append(puntuacion)
+        sincronizadas = 0
+        rechazos = []
+        firma_invalida = False
+        for inicio in range(0, len(pendientes), self.TAMANO_LOTE):
+            lote = []
+            for entrada in pendientes[inicio:inicio + self.TAMANO_LOTE]:
+                entrada = dict(entrada, instalacion=id_instalacion)
+                entrada['firma'] = firmar(entrada, clave)
+                lote.append(entrada)
+            resultado = self._reintentar_peticion('puntuaciones/lote', 'POST',
+                                                  {'puntuaciones': lote})
+            if resultado.get('error'):
+                print(f"⚠️ Subida de puntuaciones interrumpida: {resultado.get('mensaje')}")
+                break  # el resto queda en el diario para la próxima vez
             
-            # Actualizar cache
-            if sincronizadas:
-                cache_actualizado = [p for p in cache if not p.get('sincronizado')]
-                with open(self.cache_file, 'w') as f:
-                    json.dump(cache_actualizado, f, indent=2)
-                
-                print(f"✅ {len(sincronizadas)} puntuaciones sincronizadas")
+            confirmadas = []
+            rechazadas_lote = []
+            for estado in resultado.get('resultados', []):
+                session_id = estado.get('session_id')
+                if session_id is None:
+                    continue
+                if estado.get('estado') != 'invalida':
+                    confirmadas.append(session_id)
+                elif estado.get('mensaje') == 'Firma inválida':
+                    firma_invalida = True  # sigue pendiente
+                else:
+                    rechazadas_lote.append((session_id, estado.get('mensaje')))
+            self.diario.confirmar(confirmadas)
+            self.diario.rechazar(rechazadas_lote)
+            sincronizadas += len(confirmadas)
+            rechazos += rechazadas_lote
         
-        except Exception as e:
-            print(f"❌ Error al sincronizar cache: {e}")
+        if firma_invalida:
+            print("⚠️ El servidor no reconoce la clave de esta instalación: se pedirá otra")
+            self._olvidar_clave_instalacion()
+        for session_id, motivo in rechazos:
+            print(f"⚠️ Puntuación rechazada por el servidor ({motivo}): {session_id}")
+        if sincronizadas + len(rechazos) == len(pendientes):
+            self.diario.compactar()
+        if sincronizadas:
+            print(f"✅ {sincronizadas} puntuaciones sincronizadas (sin conexión: no entran en el ranking)")
+        return rechazos
+    
+    @staticmethod
+    def _clave_idempotencia():
+        """Cabecera con una clave nueva por acción (se reutiliza en sus reintentos)"""
+        return {'Idempotency-Key': uuid.uuid4().hex}
     
       # ========== ENDPOINTS DEL JUEGO ==========
     
-    def iniciar_juego(self, nombre):
+    def iniciar_juego(self, nombre, auto_bot=True):
         """
         POST /api/iniciar_juego
         Iniciar nueva partida
+        auto_bot: el servidor resuelve los turnos del bot en cada disparo
+        y devuelve la lista de 'eventos' (sin llamadas a turno_bot)
         """
-        datos = {'nombre': nombre}
+        datos = {'nombre': nombre, 'auto_bot': auto_bot}
         resultado = self._reintentar_peticion('iniciar_juego', 'POST', datos)
     
         if not resultado.get('error'):
             self.session_id = resultado.get('session_id')
-    
-            return resultado
+        
+        return resultado
 
     def disparar(self, objetivo):
         """
@@ -162,7 +378,8 @@ class APIClient:
             'session_id': self.session_id,
             'objetivo': objetivo
         }
-        return self._reintentar_peticion('disparar', 'POST', datos)
+        return self._reintentar_peticion('disparar', 'POST', datos,
+                                         cabeceras=self._clave_idempotencia())
     
     def turno_bot(self):
         """
@@ -173,7 +390,8 @@ class APIClient:
             return {'error': True, 'mensaje': 'Sin sesión activa'}
         
         datos = {'session_id': self.session_id}
-        return self._reintentar_peticion('turno_bot', 'POST', datos)
+        return self._reintentar_peticion('turno_bot', 'POST', datos,
+                                         cabeceras=self._clave_idempotencia())
     
     def obtener_ranking(self, limite=10):
         """
@@ -0,0 +1,83 @@
+"""
+Backend automático - servidor remoto o motor local según la conectividad
+"""
+from motor_local import MotorLocal
+
+
+def sin_conexion(resultado):
+    """True si el error es de red/servidor caído (no un error de juego)"""
+    return (
+        resultado is None
+        or resultado.get('circuito_abierto', False)
+        or (resultado.get('error', False) and resultado.get('reintentable', False))
+    )
+
+
+class BackendAuto:
+    """
+    Elige backend al empezar cada partida: el servidor si responde y el
+    motor local si no. La partida entera se juega en el backend en el que
+    empezó (su estado vive allí). Las partidas locales terminadas se
+    encolan y se suben (firmadas) cuando el servidor vuelve a responder.
+    """
+
+    def __init__(self, api_client, motor_local=None):
+        self.remoto = api_client
+        self.local = motor_local or MotorLocal()
+        self.local.al_terminar = self._encolar_partida_local
+        self.activo = self.remoto
+
+    @property
+    def session_id(self):
+        return self.activo.session_id
+
+    @property
+    def en_local(self):
+        return self.activo is self.local
+
+    @property
+    def peticiones_por_endpoint(self):
+        """Peticiones de ambos backends por endpoint"""
+        total = dict(self.remoto.peticiones_por_endpoint)
+        for endpoint, n in self.local.peticiones_por_endpoint.items():
+            total[endpoint] = total.get(endpoint, 0) + n
+        return total
+
+    def cerrar(self):
+        self.remoto.cerrar()
+        self.local.cerrar()
+
+    def _encolar_partida_local(self, registro):
+        """Partida local terminada: a la cola de puntuaciones pendientes"""
+        self.remoto._guardar_local(registro)
+
+    def _servidor_disponible(self):
+        """El servidor volvió: subir lo jugado sin conexión (en otro hilo: la partida no espera)"""
+        if self.en_local:
+            print("🌐 Conexión recuperada - volviendo al servidor")
+        self.activo = self.remoto
+        self.remoto.sincronizar_en_segundo_plano()
+
+    def iniciar_juego(self, nombre, auto_bot=True):
+        resultado = self.remoto.iniciar_juego(nombre, auto_bot)
+        if sin_conexion(resultado):
+            print("🔌 Servidor no disponible - partida local")
+            self.activo = self.local
+            return self.local.iniciar_juego(nombre, auto_bot)
+
+        self._servidor_disponible()
+        return resultado
+
+    def disparar(self, objetivo):
+        return self.activo.disparar(objetivo)
+
+    def turno_bot(self):
+        return self.activo.turno_bot()
+
+    def obtener_ranking(self, limite=10):
+        if self.en_local:
+            return self.local.obtener_ranking(limite)
+        resultado = self.remoto.obtener_ranking(limite)
+        if sin_conexion(resultado):
+            return self.local.obtener_ranking(limite)
+        return resultado
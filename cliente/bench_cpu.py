@@ -0,0 +1,63 @@
+"""
+Benchmark de CPU del cliente: loop real de BuckshotRouletteGame
+Mide el % de CPU del proceso en reposo (sin eventos) y activo (petición
+lenta en vuelo, con el indicador de red animándose) en cada pantalla.
+Usa el driver de vídeo "dummy"; no necesita servidor.
+Uso:
+    python bench_cpu.py --segundos 5
+"""
+import argparse
+import os
+import threading
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+
+from main import BuckshotRouletteGame
+
+
+def medir(pantalla, segundos, activo):
+    """Returns: (% de CPU, iteraciones del loop por segundo)"""
+    game = BuckshotRouletteGame()
+    game.pantalla_actual = pantalla
+    if activo:
+        # Petición que tarda todo el escenario: indicador de red en marcha
+        game.red.enviar('peticion_lenta', time.sleep, segundos + 1)
+
+    def parar():
+        time.sleep(segundos)
+        pygame.event.post(pygame.event.Event(pygame.QUIT))
+    threading.Thread(target=parar, daemon=True).start()
+
+    cpu, reloj = time.process_time(), time.perf_counter()
+    try:
+        game.run()
+    except SystemExit:
+        pass
+    duracion = time.perf_counter() - reloj
+    iteraciones = game.frames_activos + game.frames_reposo
+    return (time.process_time() - cpu) / duracion, iteraciones / duracion
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU del cliente en reposo y activo")
+    parser.add_argument('--segundos', type=float, default=5.0)
+    args = parser.parse_args()
+
+    resultados = []
+    for pantalla in ('inicio', 'juego', 'ranking'):
+        for activo in (False, True):
+            resultados.append((pantalla, activo, *medir(pantalla, args.segundos, activo)))
+
+    print("=" * 60)
+    print(f"🧪 BENCHMARK CPU CLIENTE - {args.segundos:.0f}s por escenario")
+    print("=" * 60)
+    print(f"{'PANTALLA':<12}{'ESTADO':<10}{'CPU':>8}{'ITER/S':>10}")
+    for pantalla, activo, cpu, iteraciones in resultados:
+        print(f"{pantalla:<12}{'activo' if activo else 'reposo':<10}{cpu:>8.1%}{iteraciones:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
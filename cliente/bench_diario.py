@@ -0,0 +1,67 @@
+"""
+Benchmark del diario de puntuaciones: coste de guardar N puntuaciones
+sin conexión con la caché JSON antigua (leer + reescribir todo el fichero
+en cada guardado) frente al diario JSONL de solo añadido.
+Uso:
+    python bench_diario.py --puntuaciones 2000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from api_client import APIClient
+from diario import DiarioPuntuaciones
+
+
+def guardar_json_antiguo(ruta, puntuacion):
+    """Estrategia anterior: O(n) por puntuación"""
+    cache = []
+    if os.path.exists(ruta):
+        with open(ruta, 'r') as f:
+            cache = json.load(f)
+    cache.append(puntuacion)
+    with open(ruta, 'w') as f:
+        json.dump(cache, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Caché JSON antigua vs diario JSONL")
+    parser.add_argument('--puntuaciones', type=int, default=2000)
+    args = parser.parse_args()
+    n = args.puntuaciones
+
+    print("=" * 60)
+    print(f"🧪 BENCHMARK DIARIO - {n} puntuaciones")
+    print("=" * 60)
+    print(f"{'ESTRATEGIA':<22}{'TOTAL S':>10}{'MS/ÚLTIMA':>12}{'PETICIONES':>12}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, 'cache.json')
+        inicio = time.perf_counter()
+        for i in range(n):
+            ultima = time.perf_counter()
+            guardar_json_antiguo(ruta, {'nombre': f'J{i}', 'puntos': i, 'sincronizado': False})
+        fin = time.perf_counter()
+        print(f"{'JSON reescrito':<22}{fin - inicio:>10.2f}{(fin - ultima) * 1000:>12.3f}{n:>12}")
+
+        diario = DiarioPuntuaciones(os.path.join(tmp, 'diario.jsonl'))
+        inicio = time.perf_counter()
+        for i in range(n):
+            ultima = time.perf_counter()
+            diario.agregar({'nombre': f'J{i}', 'puntos': i})
+        fin = time.perf_counter()
+        lotes = -(-n // APIClient.TAMANO_LOTE)
+        print(f"{'Diario JSONL':<22}{fin - inicio:>10.2f}{(fin - ultima) * 1000:>12.3f}{lotes:>12}")
+
+        inicio = time.perf_counter()
+        pendientes = diario.pendientes()
+        diario.confirmar([p['session_id'] for p in pendientes])
+        diario.compactar()
+        print(f"\n   Lectura + confirmación + compactación: "
+              f"{(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark de latencia: conexión nueva por petición vs sesión keep-alive
+Requiere el servidor en marcha (API_URL, por defecto http://localhost:5000/api)
+Uso:
+    python bench_latencia.py --peticiones 500
+"""
+import argparse
+import os
+import time
+
+import requests
+
+from api_client import APIClient
+
+
+def percentiles(muestras):
+    ordenadas = sorted(muestras)
+    n = len(ordenadas)
+    return {p: ordenadas[min(int(p / 100 * n), n - 1)] * 1000 for p in (50, 95, 99)}
+
+
+def imprimir(nombre, muestras):
+    p = percentiles(muestras)
+    media = sum(muestras) / len(muestras) * 1000
+    print(f"{nombre:<28}{media:>9.2f}{p[50]:>9.2f}{p[95]:>9.2f}{p[99]:>9.2f}")
+
+
+def medir(funcion, n):
+    muestras = []
+    for _ in range(n):
+        inicio = time.perf_counter()
+        funcion()
+        muestras.append(time.perf_counter() - inicio)
+    return muestras
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia con y sin keep-alive")
+    parser.add_argument('--peticiones', type=int, default=500)
+    args = parser.parse_args()
+
+    base_url = os.getenv('API_URL', 'http://localhost:5000/api')
+    api_client = APIClient(base_url)
+
+    print("=" * 64)
+    print(f"🧪 BENCHMARK LATENCIA ({args.peticiones} peticiones GET /health)")
+    print("=" * 64)
+    print(f"{'MODO':<28}{'MEDIA':>9}{'P50':>9}{'P95':>9}{'P99':>9}   (ms)")
+
+    imprimir("requests.get (sin pool)",
+             medir(lambda: requests.get(f"{base_url}/health", timeout=5).json(), args.peticiones))
+    imprimir("APIClient (keep-alive)",
+             medir(lambda: api_client._hacer_peticion('health'), args.peticiones))
+
+    # Llamadas seguidas: secuencial vs lote sobre el pool
+    lote = [('ranking?limite=10', 'GET', None), ('estadisticas', 'GET', None), ('health', 'GET', None)]
+    imprimir("3 llamadas secuenciales",
+             medir(lambda: [api_client._hacer_peticion(*p) for p in lote], args.peticiones // 5))
+    imprimir("3 llamadas en lote",
+             medir(lambda: api_client.ejecutar_lote(lote), args.peticiones // 5))
+
+    stats = api_client.estadisticas_conexion()
+    print(f"\n🔌 APIClient: {stats['peticiones']} peticiones, "
+          f"{stats['conexiones_nuevas']} conexiones nuevas, "
+          f"reutilización {stats['ratio_reutilizacion']:.1%}")
+    api_client.cerrar()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Benchmark de peticiones por partida: turnos del bot por petición (clásico)
+vs resueltos en el servidor dentro de /api/disparar (auto_bot)
+Requiere el servidor en marcha (API_URL, por defecto http://localhost:5000/api)
+Uso:
+    python bench_peticiones.py --partidas 200
+"""
+import argparse
+import time
+
+from api_client import APIClient
+
+
+def jugar_partida(api_client, auto_bot):
+    """Jugar una partida disparando siempre al bot. Returns: peticiones usadas"""
+    inicio = api_client.peticiones_enviadas
+    resultado = api_client.iniciar_juego("bench", auto_bot=auto_bot)
+    if not resultado:
+        raise RuntimeError("No se pudo iniciar la partida")
+
+    turno_jugador = True
+    while True:
+        if turno_jugador:
+            resultado = api_client.disparar('bot')
+        else:
+            resultado = api_client.turno_bot()
+        if not resultado or resultado.get('error'):
+            raise RuntimeError(f"Error en la partida: {resultado}")
+        if resultado.get('game_over'):
+            return api_client.peticiones_enviadas - inicio
+        turno_jugador = resultado.get('turno_jugador', True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peticiones HTTP por partida")
+    parser.add_argument('--partidas', type=int, default=200)
+    args = parser.parse_args()
+
+    api_client = APIClient()
+    print("=" * 60)
+    print(f"🧪 BENCHMARK PETICIONES POR PARTIDA ({args.partidas} partidas)")
+    print("=" * 60)
+    print(f"{'MODO':<12}{'PETICIONES/PARTIDA':>20}{'SEGUNDOS/PARTIDA':>18}")
+
+    for nombre, auto_bot in (('clasico', False), ('auto_bot', True)):
+        total = 0
+        inicio = time.perf_counter()
+        for _ in range(args.partidas):
+            total += jugar_partida(api_client, auto_bot)
+        duracion = time.perf_counter() - inicio
+        print(f"{nombre:<12}{total / args.partidas:>20.2f}{duracion / args.partidas:>18.4f}")
+
+
+if __name__ == '__main__':
+    main()
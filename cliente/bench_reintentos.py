@@ -0,0 +1,141 @@
+"""
+Benchmark de reintentos: simulación de eventos discretos de una caída
+N clientes juegan (una petición cada ~PENSAR segundos); el servidor cae
+durante CAIDA segundos y vuelve en frío (capacidad que sube del 20% al 100%
+en ARRANQUE segundos), respondiendo 503 + Retry-After cuando se satura.
+Se compara el reintento ingenuo (3 intentos seguidos) con
+PoliticaReintentos + CircuitBreaker (las clases reales, con reloj y RNG
+simulados).
+Uso:
+    python bench_reintentos.py --clientes 10000
+"""
+import argparse
+import heapq
+import random
+
+from reintentos import CircuitBreaker, PoliticaReintentos
+
+LATENCIA = 0.05       # s por petición (respuesta o error de conexión)
+RETRY_AFTER = 1.0     # s que anuncia el servidor al saturarse
+ARRANQUE = 20.0       # s hasta recuperar la capacidad completa
+
+
+class Servidor:
+    """Servidor caído hasta fin_caida; después atiende capacidad peticiones/s"""
+
+    def __init__(self, fin_caida, capacidad):
+        self.fin_caida = fin_caida
+        self.capacidad = capacidad
+        self.por_segundo = {}
+
+    def capacidad_en(self, segundo):
+        """Capacidad del segundo dado (rampa de arranque en frío)"""
+        fraccion = min(1.0, 0.2 + 0.8 * (segundo - self.fin_caida) / ARRANQUE)
+        return int(self.capacidad * fraccion)
+
+    def atender(self, ahora):
+        """Returns: (ok, reintentable, retry_after)"""
+        segundo = int(ahora)
+        self.por_segundo[segundo] = self.por_segundo.get(segundo, 0) + 1
+        if ahora < self.fin_caida:
+            return None, True, None            # sin conexión
+        if self.por_segundo[segundo] > self.capacidad_en(segundo):
+            return None, True, RETRY_AFTER     # 503 saturado
+        return True, False, None
+
+
+def simular(modo, clientes, pensar, caida, capacidad, duracion, semilla):
+    rng = random.Random(semilla)
+    servidor = Servidor(caida, capacidad)
+    ahora = [0.0]
+    reloj = lambda: ahora[0]
+
+    politica = PoliticaReintentos(rng=rng, dormir=None)
+    circuitos = [CircuitBreaker(reloj=reloj, rng=rng) for _ in range(clientes)]
+    recuperado = [None] * clientes
+    fallos_rapidos = 0
+
+    # Evento: (instante, desempate, cliente, intento)
+    eventos = [(rng.expovariate(1 / pensar), c, c, 0) for c in range(clientes)]
+    heapq.heapify(eventos)
+    desempate = clientes
+
+    while eventos:
+        t, _, c, intento = heapq.heappop(eventos)
+        if t >= duracion:
+            break
+        ahora[0] = t
+
+        if modo == 'politica' and not circuitos[c].permitir():
+            # Circuito abierto: falla sin tocar la red, el jugador sigue
+            fallos_rapidos += 1
+            siguiente, intento = t + rng.expovariate(1 / pensar), 0
+        else:
+            ok, reintentable, retry_after = servidor.atender(t)
+            ahora[0] = t = t + LATENCIA
+            if ok:
+                if modo == 'politica':
+                    circuitos[c].registrar_exito()
+                if t >= caida and recuperado[c] is None:
+                    recuperado[c] = t - caida
+                siguiente, intento = t + rng.expovariate(1 / pensar), 0
+            else:
+                if modo == 'politica':
+                    circuitos[c].registrar_fallo(retry_after)
+                if intento + 1 < politica.intentos:
+                    espera = politica.espera(intento, retry_after) if modo == 'politica' else 0.0
+                    siguiente, intento = t + espera, intento + 1
+                else:
+                    siguiente, intento = t + rng.expovariate(1 / pensar), 0
+
+        desempate += 1
+        heapq.heappush(eventos, (siguiente, desempate, c, intento))
+
+    tras_caida = [n for s, n in servidor.por_segundo.items() if s >= caida]
+    tiempos = sorted(r for r in recuperado if r is not None)
+    return {
+        'total': sum(servidor.por_segundo.values()),
+        'pico_caida': max((n for s, n in servidor.por_segundo.items() if s < caida), default=0),
+        'pico_recuperacion': max(tras_caida, default=0),
+        'rechazadas': sum(max(n - servidor.capacidad_en(s), 0)
+                          for s, n in servidor.por_segundo.items() if s >= caida),
+        'fallos_rapidos': fallos_rapidos,
+        'recuperados': len(tiempos) / clientes,
+        'p50': tiempos[len(tiempos) // 2] if tiempos else None,
+        'p99': tiempos[min(int(len(tiempos) * 0.99), len(tiempos) - 1)] if tiempos else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tormenta de reintentos tras una caída")
+    parser.add_argument('--clientes', type=int, default=10_000)
+    parser.add_argument('--pensar', type=float, default=2.0, help="s medios entre acciones")
+    parser.add_argument('--caida', type=float, default=30.0, help="s de servidor caído")
+    parser.add_argument('--capacidad', type=int, default=6_000,
+                        help="peticiones/s con el servidor ya caliente")
+    parser.add_argument('--duracion', type=float, default=90.0)
+    parser.add_argument('--semilla', type=int, default=0)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"🧪 BENCHMARK REINTENTOS - {args.clientes} clientes, caída de {args.caida:.0f}s, "
+          f"capacidad {args.capacidad}/s")
+    print("=" * 60)
+    demanda = args.clientes / args.pensar
+    print(f"   Demanda normal ≈ {demanda:,.0f} peticiones/s")
+
+    print(f"\n{'MODO':<12}{'TOTAL':>10}{'PICO CAÍDA':>12}{'PICO RECUP.':>13}"
+          f"{'RECHAZADAS':>12}{'RECUP.':>8}{'P50 s':>8}{'P99 s':>8}")
+    for modo in ('ingenuo', 'politica'):
+        r = simular(modo, args.clientes, args.pensar, args.caida, args.capacidad,
+                    args.duracion, args.semilla)
+        p50 = f"{r['p50']:.2f}" if r['p50'] is not None else "-"
+        p99 = f"{r['p99']:.2f}" if r['p99'] is not None else "-"
+        print(f"{modo:<12}{r['total']:>10,}{r['pico_caida']:>12,}{r['pico_recuperacion']:>13,}"
+              f"{r['rechazadas']:>12,}{r['recuperados']:>8.1%}{p50:>8}{p99:>8}")
+        if r['fallos_rapidos']:
+            print(f"{'':<12}  ({r['fallos_rapidos']:,} fallos rápidos con el circuito abierto)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark de render: CPU por frame de cada pantalla
+Se usa el driver de vídeo "dummy", así que mide solo el trabajo de Python
+y SDL al componer el frame (sin el coste de presentar en pantalla).
+Uso:
+    python bench_render.py --frames 2000
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+
+from pantallas import PantallaInicio, PantallaJuego, PantallaRanking
+
+MENSAJES = [
+    "¡BANG! Disparaste al bot y era una bala REAL. El bot pierde una vida.",
+    "Click... Era una bala de fogueo. Sigue siendo tu turno.",
+    "El bot se disparó a sí mismo con una bala de fogueo y repite turno.",
+]
+
+
+def preparar(screen, ancho, alto):
+    """Pantallas con datos representativos de una partida"""
+    juego = PantallaJuego(screen, ancho, alto)
+    juego.actualizar_datos({'vidas_jugador': 2, 'vidas_bot': 1, 'puntos': 300,
+                            'balas_restantes': 5, 'mensaje': MENSAJES[0]})
+    ranking = PantallaRanking(screen, ancho, alto)
+    ranking.actualizar_ranking([(f"Jugador{i}", 1000 - i * 50, None) for i in range(10)],
+                               550, "Jugador9")
+    return {
+        'inicio': PantallaInicio(screen, ancho, alto),
+        'juego': juego,
+        'ranking': ranking,
+    }
+
+
+def medir(pantalla, frames, cambiar_mensaje=False):
+    """ms de CPU por frame (render + update de las zonas sucias)"""
+    inicio = time.process_time()
+    for i in range(frames):
+        # Cada 60 frames llega una respuesta nueva (mensaje distinto)
+        if cambiar_mensaje and i % 60 == 0:
+            pantalla.actualizar_datos({'mensaje': MENSAJES[(i // 60) % len(MENSAJES)]})
+        pantalla.render([])
+        rects = pantalla.tomar_sucios()
+        if rects:
+            pygame.display.update(rects)
+    return (time.process_time() - inicio) / frames * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU por frame de las pantallas")
+    parser.add_argument('--frames', type=int, default=2000)
+    args = parser.parse_args()
+
+    pygame.init()
+    screen = pygame.display.set_mode((800, 600))
+    pantallas = preparar(screen, 800, 600)
+
+    print("=" * 60)
+    print(f"🧪 BENCHMARK RENDER - {args.frames} frames por pantalla")
+    print("=" * 60)
+    print(f"{'PANTALLA':<12}{'CPU MS/FRAME':>14}{'% DE 16.7MS':>14}")
+    for nombre, pantalla in pantallas.items():
+        ms = medir(pantalla, args.frames, cambiar_mensaje=(nombre == 'juego'))
+        print(f"{nombre:<12}{ms:>14.3f}{ms / (1000 / 60):>14.1%}")
+
+    try:
+        from texto import cache_texto
+        print(f"\n📊 Caché de texto: {cache_texto.estadisticas()}")
+    except ImportError:
+        pass
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
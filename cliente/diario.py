@@ -0,0 +1,133 @@
+"""
+Diario de puntuaciones pendientes - JSONL solo de añadido
+Cada puntuación sin subir es una línea {"entrada": {...}}; al confirmarla
+el servidor se añade {"confirmada": session_id}. Guardar y confirmar son
+O(1); la compactación reescribe el fichero sin lo confirmado cada cierto
+número de confirmaciones.
+Las que el servidor rechaza no se borran: {"rechazada": session_id,
+"mensaje": ...} las saca de las pendientes y se quedan en el fichero.
+"""
+import json
+import os
+import threading
+import uuid
+
+
+class DiarioPuntuaciones:
+    """Cola persistente de puntuaciones para subir al servidor"""
+
+    # Confirmaciones acumuladas antes de reescribir el fichero
+    COMPACTAR_CADA = 200
+
+    def __init__(self, ruta="puntuaciones_pendientes.jsonl", cache_antigua=None):
+        self.ruta = ruta
+        self.confirmaciones = 0
+        # La partida local anota desde el hilo del juego y la sincronización
+        # confirma (y compacta) desde otro
+        self._lock = threading.RLock()
+        if cache_antigua:
+            self._migrar(cache_antigua)
+
+    def _escribir(self, registros):
+        """Añadir líneas al diario (flush + fsync: sobrevive a un cierre brusco)"""
+        with open(self.ruta, 'a', encoding='utf-8') as f:
+            for registro in registros:
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _leer(self):
+        """Returns: (entradas pendientes en orden, nº de confirmaciones, rechazadas)"""
+        if not os.path.exists(self.ruta):
+            return [], 0, {}
+        pendientes = {}
+        rechazadas = {}
+        confirmaciones = 0
+        with open(self.ruta, 'r', encoding='utf-8') as f:
+            for linea in f:
+                try:
+                    registro = json.loads(linea)
+                except ValueError:
+                    continue  # línea a medio escribir tras un corte
+                if 'entrada' in registro:
+                    entrada = registro['entrada']
+                    pendientes[entrada['session_id']] = entrada
+                elif 'confirmada' in registro:
+                    pendientes.pop(registro['confirmada'], None)
+                    confirmaciones += 1
+                elif 'rechazada' in registro:
+                    entrada = pendientes.pop(registro['rechazada'], None)
+                    if entrada is not None:
+                        rechazadas[registro['rechazada']] = (entrada, registro.get('mensaje'))
+        return list(pendientes.values()), confirmaciones, rechazadas
+
+    def _migrar(self, cache_antigua):
+        """Importar la caché JSON anterior (puntuaciones_temp.json) una vez"""
+        if not os.path.exists(cache_antigua):
+            return
+        try:
+            with open(cache_antigua, 'r') as f:
+                cache = json.load(f)
+            for puntuacion in cache:
+                if not puntuacion.pop('sincronizado', False):
+                    self.agregar(puntuacion)
+            os.remove(cache_antigua)
+            print(f"📦 Caché {cache_antigua} migrada al diario")
+        except (OSError, ValueError) as e:
+            print(f"❌ Error al migrar caché antigua: {e}")
+
+    def agregar(self, entrada):
+        """Añadir una puntuación (con session_id único para deduplicar en el servidor)"""
+        entrada = dict(entrada)
+        entrada.setdefault('session_id', f"local-{uuid.uuid4()}")
+        with self._lock:
+            self._escribir([{'entrada': entrada}])
+        return entrada['session_id']
+
+    def pendientes(self):
+        """Puntuaciones aún no confirmadas ni rechazadas por el servidor"""
+        with self._lock:
+            return self._leer()[0]
+
+    def rechazadas(self):
+        """Returns: lista de (entrada, motivo) que el servidor no aceptó"""
+        with self._lock:
+            return list(self._leer()[2].values())
+
+    def confirmar(self, session_ids):
+        """Marcar como subidas; compacta cada COMPACTAR_CADA confirmaciones"""
+        if not session_ids:
+            return
+        with self._lock:
+            self._escribir([{'confirmada': session_id} for session_id in session_ids])
+            self.confirmaciones += len(session_ids)
+            if self.confirmaciones >= self.COMPACTAR_CADA:
+                self.compactar()
+
+    def rechazar(self, rechazos):
+        """Sacar de las pendientes sin borrarlas. rechazos: [(session_id, motivo), ...]"""
+        if not rechazos:
+            return
+        with self._lock:
+            self._escribir([{'rechazada': session_id, 'mensaje': motivo} for session_id, motivo in rechazos])
+
+    def compactar(self):
+        """Reescribir el diario con las pendientes y las rechazadas (reemplazo atómico)"""
+        with self._lock:
+            pendientes, _, rechazadas = self._leer()
+            if not pendientes and not rechazadas:
+                if os.path.exists(self.ruta):
+                    os.remove(self.ruta)
+            else:
+                registros = [{'entrada': entrada} for entrada in pendientes]
+                for session_id, (entrada, motivo) in rechazadas.items():
+                    registros.append({'entrada': entrada})
+                    registros.append({'rechazada': session_id, 'mensaje': motivo})
+                temporal = self.ruta + ".tmp"
+                with open(temporal, 'w', encoding='utf-8') as f:
+                    for registro in registros:
+                        f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temporal, self.ruta)
+            self.confirmaciones = 0
@@ -0,0 +1,263 @@
+"""
+Enjambre de jugadores sin interfaz - prueba de carga del servidor
+Cada jugador virtual es un APIClient con su FlujoJuego (las mismas reglas
+que la ventana, sin Pygame): inicia partida, dispara hasta el game over,
+pide el ranking y vuelve a empezar, con un tiempo de pensar aleatorio
+entre acciones. Miles de jugadores se reparten entre un pool de hilos
+con un planificador por orden de llegada (heap).
+Uso:
+    python enjambre.py --jugadores 2000 --hilos 64 --pensar 0.5 --duracion 30
+    (API_URL=http://localhost:5000/api por defecto)
+"""
+import argparse
+import contextlib
+import heapq
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from api_client import APIClient
+from flujo import FlujoJuego
+
+
+class JugadorVirtual:
+    """Un jugador: su cliente, su partida y su siguiente acción"""
+
+    def __init__(self, numero, api_client, auto_bot, rng):
+        self.numero = numero
+        self.api_client = api_client
+        self.auto_bot = auto_bot
+        self.rng = rng
+        self.flujo = FlujoJuego()
+        self.partidas = 0
+
+    def siguiente_accion(self):
+        """Returns: (tipo, función, argumentos) según el estado de la partida"""
+        flujo = self.flujo
+        if flujo.game_over:
+            return 'ranking', self.api_client.obtener_ranking, ()
+        if not flujo.en_partida:
+            nombre = f"Bot{self.numero}"
+            flujo.empezar('iniciar_juego', nombre)
+            return 'iniciar_juego', self.api_client.iniciar_juego, (nombre, self.auto_bot)
+        if not flujo.turno_jugador:
+            flujo.empezar('turno_bot')
+            return 'turno_bot', self.api_client.turno_bot, ()
+        flujo.empezar('disparar')
+        return 'disparar', self.api_client.disparar, (self.rng.choice(FlujoJuego.OBJETIVOS),)
+
+    def jugar(self, estadisticas):
+        """Ejecutar una acción y registrar su latencia"""
+        tipo, funcion, argumentos = self.siguiente_accion()
+        inicio = time.perf_counter()
+        resultado = funcion(*argumentos)
+        latencia = time.perf_counter() - inicio
+
+        if tipo == 'ranking':
+            ok = bool(resultado) and not resultado.get('error')
+            self.flujo.reiniciar()
+            self.partidas += 1
+            estadisticas.registrar(tipo, latencia, ok, partida=True)
+            return
+        ok = self.flujo.aplicar(tipo, resultado)
+        if not ok and tipo != 'iniciar_juego':
+            # Partida perdida (sesión caducada, error del servidor): empezar otra
+            self.flujo.reiniciar()
+        estadisticas.registrar(tipo, latencia, ok)
+
+
+class Estadisticas:
+    """Latencias y errores por endpoint (compartidas entre hilos)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencias = {}
+        self.errores = {}
+        self.partidas = 0
+        self.retrasos = []
+
+    def registrar(self, tipo, latencia, ok, partida=False):
+        with self.lock:
+            self.latencias.setdefault(tipo, []).append(latencia)
+            if not ok:
+                self.errores[tipo] = self.errores.get(tipo, 0) + 1
+            if partida:
+                self.partidas += 1
+
+    def retraso(self, segundos):
+        """Retraso del planificador sobre la hora prevista de la acción"""
+        with self.lock:
+            self.retrasos.append(segundos)
+
+
+def percentil(ordenadas, p):
+    return ordenadas[min(int(p / 100 * len(ordenadas)), len(ordenadas) - 1)]
+
+
+class Enjambre:
+    """Planificador: heap (hora prevista, jugador) atendido por N hilos"""
+
+    def __init__(self, jugadores, hilos, pensar, duracion, max_partidas=None):
+        self.jugadores = jugadores
+        self.hilos = hilos
+        self.pensar = pensar
+        self.duracion = duracion
+        self.max_partidas = max_partidas
+        self.estadisticas = Estadisticas()
+        self.cola = []
+        self.condicion = threading.Condition()
+        self.parar = False
+
+    def _pensar(self, jugador):
+        return jugador.rng.expovariate(1 / self.pensar) if self.pensar > 0 else 0.0
+
+    def _programar(self, jugador, cuando):
+        with self.condicion:
+            heapq.heappush(self.cola, (cuando, jugador.numero, jugador))
+            self.condicion.notify()
+
+    def _siguiente(self):
+        """Esperar al primer jugador cuya acción ya toca (None al terminar)"""
+        with self.condicion:
+            while not self.parar:
+                if self.cola:
+                    cuando = self.cola[0][0]
+                    ahora = time.monotonic()
+                    if cuando <= ahora:
+                        jugador = heapq.heappop(self.cola)[2]
+                        self.estadisticas.retraso(ahora - cuando)
+                        return jugador
+                    self.condicion.wait(cuando - ahora)
+                else:
+                    self.condicion.wait()
+        return None
+
+    def _trabajar(self):
+        while True:
+            jugador = self._siguiente()
+            if jugador is None:
+                return
+            try:
+                jugador.jugar(self.estadisticas)
+            except Exception:
+                jugador.flujo.reiniciar()
+                self.estadisticas.registrar('excepcion', 0.0, False)
+            if self.max_partidas and self.estadisticas.partidas >= self.max_partidas:
+                self.detener()
+                return
+            self._programar(jugador, time.monotonic() + self._pensar(jugador))
+
+    def detener(self):
+        with self.condicion:
+            self.parar = True
+            self.condicion.notify_all()
+
+    def ejecutar(self):
+        """Returns: segundos transcurridos"""
+        inicio = time.monotonic()
+        # Arranque escalonado: la primera acción de cada uno dentro de un tiempo de pensar
+        for jugador in self.jugadores:
+            self._programar(jugador, inicio + self._pensar(jugador))
+
+        hilos = [threading.Thread(target=self._trabajar, daemon=True) for _ in range(self.hilos)]
+        for hilo in hilos:
+            hilo.start()
+        temporizador = threading.Timer(self.duracion, self.detener)
+        temporizador.daemon = True
+        temporizador.start()
+        for hilo in hilos:
+            hilo.join()
+        temporizador.cancel()
+        return time.monotonic() - inicio
+
+
+def crear_jugadores(n, base_url, hilos, auto_bot, semilla, directorio):
+    """
+    Un APIClient por jugador (su session_id y sus circuit breakers) sobre
+    una única sesión HTTP compartida: tantas conexiones como hilos, no
+    una por jugador. Cada uno con su diario y su clave en
+    directorio/jugador-<n>: ni comparten fichero ni tocan los del usuario
+    """
+    http = requests.Session()
+    adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=hilos, max_retries=0)
+    http.mount('http://', adaptador)
+    http.mount('https://', adaptador)
+
+    jugadores = []
+    for numero in range(n):
+        directorio_local = os.path.join(directorio, f"jugador-{numero}")
+        os.makedirs(directorio_local)
+        api_client = APIClient(base_url, directorio_local)
+        api_client.http.close()
+        api_client.http = http
+        jugadores.append(JugadorVirtual(numero, api_client, auto_bot, random.Random(semilla + numero)))
+    return jugadores, http
+
+
+def informe(estadisticas, jugadores, segundos):
+    peticiones_http = {}
+    for jugador in jugadores:
+        for endpoint, n in jugador.api_client.peticiones_por_endpoint.items():
+            peticiones_http[endpoint] = peticiones_http.get(endpoint, 0) + n
+    acciones = sum(len(l) for l in estadisticas.latencias.values())
+
+    print("=" * 60)
+    print(f"🧪 ENJAMBRE - {len(jugadores)} jugadores, {segundos:.1f}s")
+    print("=" * 60)
+    print(f"{'ENDPOINT':<15}{'N':>8}{'ERR':>7}{'ERR%':>7}{'HTTP':>8}"
+          f"{'p50':>8}{'p95':>8}{'p99':>8}{'MAX':>8}  (ms)")
+    for tipo in sorted(estadisticas.latencias):
+        ordenadas = sorted(estadisticas.latencias[tipo])
+        n = len(ordenadas)
+        errores = estadisticas.errores.get(tipo, 0)
+        ms = [percentil(ordenadas, p) * 1000 for p in (50, 95, 99)] + [ordenadas[-1] * 1000]
+        print(f"{tipo:<15}{n:>8}{errores:>7}{errores / n:>7.1%}{peticiones_http.get(tipo, 0):>8}"
+              + "".join(f"{v:>8.1f}" for v in ms))
+    print("-" * 60)
+    print(f"🎮 Partidas:      {estadisticas.partidas} ({estadisticas.partidas / segundos:.1f}/s)")
+    print(f"📨 Acciones:      {acciones} ({acciones / segundos:.1f}/s)")
+    if estadisticas.retrasos:
+        retrasos = sorted(estadisticas.retrasos)
+        print(f"⏱️ Retraso planificador p50/p99: {percentil(retrasos, 50) * 1000:.1f} / "
+              f"{percentil(retrasos, 99) * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Jugadores virtuales contra el servidor")
+    parser.add_argument('--url', default=os.getenv('API_URL', 'http://localhost:5000/api'))
+    parser.add_argument('--jugadores', type=int, default=1000)
+    parser.add_argument('--hilos', type=int, default=64)
+    parser.add_argument('--pensar', type=float, default=0.5,
+                        help="segundos medios entre acciones de un jugador (exponencial)")
+    parser.add_argument('--duracion', type=float, default=30.0)
+    parser.add_argument('--partidas', type=int, default=None,
+                        help="parar al completar este número de partidas")
+    parser.add_argument('--sin-auto-bot', action='store_true',
+                        help="pedir cada turno del bot con /turno_bot")
+    parser.add_argument('--semilla', type=int, default=0)
+    args = parser.parse_args()
+
+    # Diarios de esta ejecución (puntuaciones de prueba): se borran al terminar
+    directorio = tempfile.mkdtemp(prefix="enjambre-")
+    # Los prints de APIClient (uno por cliente y por error) ocultarían el informe
+    try:
+        with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+            jugadores, http = crear_jugadores(args.jugadores, args.url, args.hilos,
+                                              not args.sin_auto_bot, args.semilla, directorio)
+            enjambre = Enjambre(jugadores, args.hilos, args.pensar, args.duracion, args.partidas)
+            segundos = enjambre.ejecutar()
+            http.close()
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    informe(enjambre.estadisticas, jugadores, segundos)
+
+
+if __name__ == '__main__':
+    main()
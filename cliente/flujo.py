@@ -0,0 +1,73 @@
+"""
+Flujo de una partida - estado y reglas del cliente sin Pygame
+Lo comparten la ventana (main.py) y los jugadores sin interfaz
+(enjambre.py): qué acciones son válidas, cuál está en vuelo y cómo
+aplica cada respuesta del servidor al estado de la partida.
+"""
+
+
+class FlujoJuego:
+    """Estado de la partida en el cliente"""
+
+    # Acciones que mandan una petición de juego al servidor
+    ACCIONES_JUEGO = ('iniciar_juego', 'disparar', 'turno_bot')
+    OBJETIVOS = ('bot', 'jugador')
+
+    def __init__(self):
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Volver al estado inicial (sin partida)"""
+        self.datos_juego = {}
+        self.nombre_jugador = ""
+        self.en_partida = False
+        self.game_over = False
+        # Una sola acción de juego en vuelo por sesión
+        self.accion_en_vuelo = None
+
+    @property
+    def turno_jugador(self):
+        return self.datos_juego.get('turno_jugador', True)
+
+    def validar_disparo(self, objetivo, session_id):
+        """Returns: None si se puede disparar, o dict de error"""
+        if objetivo not in self.OBJETIVOS:
+            return {'error': True, 'mensaje': 'Objetivo inválido'}
+        if not session_id:
+            return {'error': True, 'mensaje': 'Sin sesión activa'}
+        if not isinstance(session_id, str) or session_id.strip() == "":
+            return {'error': True, 'mensaje': 'session_id inválido'}
+        return None
+
+    def empezar(self, tipo, nombre=None):
+        """
+        Registrar el envío de una acción de juego
+        Returns: False si ya hay otra en vuelo (la acción se descarta)
+        """
+        if self.accion_en_vuelo:
+            return False
+        if tipo == 'iniciar_juego':
+            self.reiniciar()
+            self.nombre_jugador = nombre
+        self.accion_en_vuelo = tipo
+        return True
+
+    def aplicar(self, tipo, resultado):
+        """
+        Aplicar la respuesta de una acción de juego
+        Returns: True si fue correcta (y el estado se actualizó)
+        """
+        if self.accion_en_vuelo == tipo:
+            self.accion_en_vuelo = None
+        if not resultado or resultado.get('error'):
+            return False
+
+        if tipo == 'iniciar_juego':
+            self.datos_juego = dict(resultado)
+            self.en_partida = True
+        else:
+            self.datos_juego.update(resultado)
+        if resultado.get('game_over'):
+            self.game_over = True
+            self.en_partida = False
+        return True
@@ -4,10 +4,22 @@ Main entry point
 """
 import pygame
 import sys
+from collections import deque
 from pantallas import PantallaInicio, PantallaJuego, PantallaRanking
 from api_client import APIClient
+from backend import BackendAuto
+from flujo import FlujoJuego
+from red import TrabajadorRed
+from texto import cache_texto, fuente, render_texto, vaciar as vaciar_texto
+
+# Evento que el hilo de red publica al dejar una respuesta
+EVENTO_RED = pygame.USEREVENT + 1
 
 class BuckshotRouletteGame:
+    # Espera máxima sin eventos cuando no hay nada que animar
+    ESPERA_REPOSO_MS = 500
+    ACCIONES_JUEGO = FlujoJuego.ACCIONES_JUEGO
+    
     def __init__(self):
         pygame.init()
         
@@ -21,13 +33,27 @@ class BuckshotRouletteGame:
         self.clock = pygame.time.Clock()
         self.FPS = 60
         
-        # Cliente API
-        self.api_client = APIClient()
+        # Backend: servidor o motor local según la conectividad
+        # (las llamadas se hacen en el hilo de red)
+        self.api_client = BackendAuto(APIClient())
+        self.red = TrabajadorRed(self.api_client, al_responder=self._despertar)
+        self.font_red = fuente(22)
+        self.rect_indicador = pygame.Rect(self.WIDTH - 170, 8, 170, 24)
+        self.indicador_visible = False
+        
+        # Tiempos de frame (ms), separados según haya peticiones en vuelo
+        self.tiempos_frame = deque(maxlen=3600)
+        self.tiempos_frame_red = deque(maxlen=3600)
+        self.frames_activos = 0
+        self.frames_reposo = 0
         
-        # Estado del juego
+        # Estado del juego (la partida en sí vive en flujo, sin Pygame);
+        # los clicks de acción con otra en vuelo se descartan
         self.pantalla_actual = "inicio"
-        self.datos_juego = {}
-        self.nombre_jugador = ""
+        self.flujo = FlujoJuego()
+        self.game_over_pendiente = False
+        self.clicks = 0
+        self.clicks_ignorados = 0
         
         # Inicializar pantallas
         self.pantallas = {
@@ -38,11 +64,12 @@ class BuckshotRouletteGame:
         
     def iniciar_juego(self, nombre):
         """Iniciar nueva partida"""
-        self.nombre_jugador = nombre
-        resultado = self.api_client.iniciar_juego(nombre)
-        
-        if resultado and not resultado.get('error'):
-            self.datos_juego = resultado
+        self.flujo.empezar('iniciar_juego', nombre)
+        self.red.enviar('iniciar_juego', self.api_client.iniciar_juego, nombre)
+    
+    def _al_iniciar_juego(self, resultado):
+        """Respuesta de iniciar_juego"""
+        if self.flujo.aplicar('iniciar_juego', resultado):
             self.pantalla_actual = "juego"
             self.pantallas["juego"].actualizar_datos(resultado)
             return True
@@ -56,41 +83,39 @@ class BuckshotRouletteGame:
 
         print(f"Disparando con session_id: {self.api_client.session_id} y objetivo: {objetivo}")
     
-        # Validar que el objetivo sea válido
-        if objetivo not in ("bot", "jugador"):
-            print(f"❌ Objetivo inválido para disparar: {objetivo}")
-            return {'error': True, 'mensaje': 'Objetivo inválido'}
-    
-    # Validar que haya sesión activa válida
-        if not self.api_client.session_id:
-            print("❌ No hay sesión activa para disparar")
-            return {'error': True, 'mensaje': 'Sin sesión activa'}
+        # Validar objetivo y sesión activa
+        error = self.flujo.validar_disparo(objetivo, self.api_client.session_id)
+        if error:
+            print(f"❌ No se puede disparar: {error['mensaje']}")
+            return error
     
-    # Opcional: puedes hacer una verificación adicional si quieres que session_id no sea vacío
-        if not isinstance(self.api_client.session_id, str) or self.api_client.session_id.strip() == "":
-            print("❌ session_id inválido")
-            return {'error': True, 'mensaje': 'session_id inválido'}
+        # Llamar a la API para disparar (la respuesta llega en _al_disparar)
+        self.flujo.empezar('disparar')
+        self.red.enviar('disparar', self.api_client.disparar, objetivo)
     
-    # Llamar a la API para disparar
-        resultado = self.api_client.disparar(objetivo)
-
-        if resultado and not resultado.get('error'):
-            self.datos_juego.update(resultado)
-            self.pantallas["juego"].actualizar_datos(resultado)
+    def _al_disparar(self, resultado):
+        """Respuesta de disparar"""
+        if self.flujo.aplicar('disparar', resultado):
+            # Modo auto_bot: el servidor ya resolvió los turnos del bot
+            if resultado.get('eventos'):
+                self.pantallas["juego"].encolar_eventos(resultado['eventos'])
+            else:
+                self.pantallas["juego"].actualizar_datos(resultado)
         
-            # Game over
+            # Game over (tras terminar de mostrar los eventos)
             if resultado.get('game_over'):
-                self.pantalla_actual = "ranking"
-                self.cargar_ranking()
+                self.game_over_pendiente = True
         
             return resultado
     
     def turno_bot(self):
         """Ejecutar turno del bot"""
-        resultado = self.api_client.turno_bot()
-        
-        if resultado and not resultado.get('error'):
-            self.datos_juego.update(resultado)
+        self.flujo.empezar('turno_bot')
+        self.red.enviar('turno_bot', self.api_client.turno_bot)
+    
+    def _al_turno_bot(self, resultado):
+        """Respuesta de turno_bot"""
+        if self.flujo.aplicar('turno_bot', resultado):
             self.pantallas["juego"].actualizar_datos(resultado)
             
             if resultado.get('game_over'):
@@ -102,13 +127,15 @@ class BuckshotRouletteGame:
     
     def cargar_ranking(self):
         """Cargar ranking global"""
-        resultado = self.api_client.obtener_ranking()
-        
+        self.red.enviar('ranking', self.api_client.obtener_ranking)
+    
+    def _al_cargar_ranking(self, resultado):
+        """Respuesta de obtener_ranking"""
         if resultado and not resultado.get('error'):
             self.pantallas["ranking"].actualizar_ranking(
                 resultado.get('ranking', []),
-                self.datos_juego.get('puntos', 0),
-                self.nombre_jugador
+                self.flujo.datos_juego.get('puntos', 0),
+                self.flujo.nombre_jugador
             )
     
     def cambiar_pantalla(self, nueva_pantalla):
@@ -121,24 +148,123 @@ class BuckshotRouletteGame:
     def reiniciar_juego(self):
         """Reiniciar juego completo"""
         self.pantalla_actual = "inicio"
-        self.datos_juego = {}
-        self.nombre_jugador = ""
+        self.flujo.reiniciar()
+        self.game_over_pendiente = False
+    
+    def comprobar_game_over(self):
+        """Pasar al ranking cuando termine la animación del último disparo"""
+        if self.game_over_pendiente and not self.pantallas["juego"].animando():
+            self.game_over_pendiente = False
+            self.pantalla_actual = "ranking"
+            self.cargar_ranking()
+    
+    def _despertar(self):
+        """Llamado desde el hilo de red: sacar al loop de event.wait"""
+        pygame.event.post(pygame.event.Event(EVENTO_RED))
+    
+    def procesar_respuestas(self):
+        """Despachar las respuestas de red que hayan llegado (sin bloquear)"""
+        manejadores = {
+            'iniciar_juego': self._al_iniciar_juego,
+            'disparar': self._al_disparar,
+            'turno_bot': self._al_turno_bot,
+            'ranking': self._al_cargar_ranking
+        }
+        for tipo, resultado, _ in self.red.obtener_respuestas():
+            manejadores[tipo](resultado)
+    
+    def dibujar_indicador_red(self, pantalla):
+        """
+        Indicador de petición en curso (esquina superior derecha)
+        Returns: rectángulos modificados
+        """
+        if not self.red.ocupado():
+            if not self.indicador_visible:
+                return []
+            # Borrar el indicador una vez al terminar
+            self.indicador_visible = False
+            self.screen.fill(pantalla.FONDO, self.rect_indicador)
+            return [self.rect_indicador]
+        
+        self.indicador_visible = True
+        self.screen.fill(pantalla.FONDO, self.rect_indicador)
+        
+        # Tres puntos que se encienden por turnos
+        fase = (pygame.time.get_ticks() // 200) % 3
+        for i in range(3):
+            color = (255, 0, 0) if i == fase else (90, 90, 90)
+            pygame.draw.circle(self.screen, color, (self.WIDTH - 60 + i * 16, 20), 5)
+        texto = render_texto(self.font_red, "Conectando", (150, 150, 150))
+        self.screen.blit(texto, texto.get_rect(midright=(self.WIDTH - 72, 20)))
+        return [self.rect_indicador]
+    
+    def peticiones_por_click(self):
+        """Peticiones HTTP de juego (incluidos reintentos) por click de acción"""
+        por_endpoint = self.api_client.peticiones_por_endpoint
+        peticiones = sum(por_endpoint.get(tipo, 0) for tipo in self.ACCIONES_JUEGO)
+        return {
+            'clicks': self.clicks,
+            'ignorados': self.clicks_ignorados,
+            'peticiones': peticiones,
+            'por_click': round(peticiones / self.clicks, 2) if self.clicks else 0.0
+        }
+    
+    def estadisticas_frames(self):
+        """Percentiles de tiempo de frame (ms) sin y con peticiones en vuelo"""
+        def percentiles(muestras):
+            if not muestras:
+                return None
+            ordenadas = sorted(muestras)
+            n = len(ordenadas)
+            return {f"p{p}": ordenadas[min(int(p / 100 * n), n - 1)] for p in (50, 95, 99)}
+        
+        return {
+            'reposo': percentiles(self.tiempos_frame),
+            'en_vuelo': percentiles(self.tiempos_frame_red),
+            'frames_activos': self.frames_activos,
+            'esperas_reposo': self.frames_reposo
+        }
     
     def run(self):
         """Loop principal del juego"""
         running = True
+        reposo = False
+        pantalla_dibujada = None
         
         while running:
+            # En reposo se duerme hasta el próximo evento (ratón, teclado,
+            # respuesta de red) en lugar de pintar 60 frames por segundo
+            if reposo:
+                primero = pygame.event.wait(self.ESPERA_REPOSO_MS)
+                events = [primero] if primero.type != pygame.NOEVENT else []
+                events += pygame.event.get()
+                self.frames_reposo += 1
+            else:
+                events = pygame.event.get()
+            
+            self.procesar_respuestas()
+            
             # Eventos
-            events = pygame.event.get()
             for event in events:
                 if event.type == pygame.QUIT:
                     running = False
+                elif event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+                    self.pantallas[self.pantalla_actual].invalidar()
             
-            # Render pantalla actual
+            # Render pantalla actual (redibujado completo al cambiar de pantalla)
             pantalla = self.pantallas[self.pantalla_actual]
+            if pantalla is not pantalla_dibujada:
+                pantalla.invalidar()
+                pantalla_dibujada = pantalla
             accion = pantalla.render(events)
             
+            # Clicks de acción mientras otra espera respuesta: se ignoran
+            if accion and accion['tipo'] in self.ACCIONES_JUEGO:
+                self.clicks += 1
+                if self.flujo.accion_en_vuelo:
+                    self.clicks_ignorados += 1
+                    accion = None
+            
             # Procesar acciones
             if accion:
                 if accion['tipo'] == 'iniciar_juego':
@@ -159,10 +285,30 @@ class BuckshotRouletteGame:
                 elif accion['tipo'] == 'salir':
                     running = False
             
-            # Update display
-            pygame.display.flip()
-            self.clock.tick(self.FPS)
+            self.comprobar_game_over()
+            
+            # Solo se envían a pantalla las zonas que cambiaron
+            rects = pantalla.tomar_sucios() + self.dibujar_indicador_red(pantalla)
+            if rects:
+                pygame.display.update(rects)
+            
+            animando = self.pantallas["juego"].animando() or self.game_over_pendiente
+            tiempo_frame = self.clock.tick(self.FPS)
+            if not reposo:
+                self.frames_activos += 1
+                if self.red.ocupado():
+                    self.tiempos_frame_red.append(tiempo_frame)
+                else:
+                    self.tiempos_frame.append(tiempo_frame)
+            cambia_pantalla = self.pantallas[self.pantalla_actual] is not pantalla
+            reposo = not (rects or animando or cambia_pantalla or self.red.ocupado())
         
+        print(f"📊 Tiempos de frame (ms): {self.estadisticas_frames()}")
+        print(f"📊 Caché de texto: {cache_texto.estadisticas()}")
+        print(f"📊 Peticiones por click: {self.peticiones_por_click()}")
+        self.red.detener()
+        self.api_client.cerrar()
+        vaciar_texto()
         pygame.quit()
         sys.exit()
 
@@ -0,0 +1,232 @@
+"""
+Motor de juego local - las reglas del servidor dentro del cliente
+Permite jugar sin conexión con la misma interfaz que APIClient
+(iniciar_juego, disparar, turno_bot, obtener_ranking). Cada partida
+terminada se entrega como registro (semilla + jugadas) para subirla más
+tarde: el servidor la rejuega y calcula los puntos él mismo.
+"""
+import hashlib
+import hmac
+import json
+import random
+import secrets
+import uuid
+from datetime import datetime
+
+# Reglas: copia de Config en servidor/config.py, que es la fuente de verdad.
+# El servidor rejuega las partidas subidas con sus reglas, así que si
+# divergen se rechazan (servidor/tests/test_reglas_cliente.py lo comprueba)
+MAX_VIDAS = 3
+PUNTOS_BALA_REAL = 10
+PUNTOS_FOGUEO_SELF = 5
+MIN_BALAS_REALES = 1
+MAX_BALAS_REALES = 4
+MIN_BALAS_FOGUEO = 1
+MAX_BALAS_FOGUEO = 4
+BOT_PROB_DISPARAR_JUGADOR = 0.7
+MAX_EVENTOS_AUTO_BOT = 100
+
+VERSION_REGISTRO = 1
+
+
+def firmar(registro, clave):
+    """
+    HMAC-SHA256 del registro en JSON canónico (sin el campo firma)
+    clave: la de la instalación, emitida por el servidor (POST /api/instalaciones)
+    """
+    contenido = {k: v for k, v in registro.items() if k != 'firma'}
+    canonico = json.dumps(contenido, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hmac.new(clave.encode(), canonico.encode(), hashlib.sha256).hexdigest()
+
+
+class MotorLocal:
+    """Backend local compatible con APIClient"""
+
+    def __init__(self, al_terminar=None):
+        """
+        al_terminar: función que recibe el registro de cada partida
+        terminada (ej. encolarlo para subirlo al servidor)
+        """
+        self.al_terminar = al_terminar
+        self.session_id = None
+        self.sesion = None
+        self.partidas_terminadas = []
+        self.peticiones_por_endpoint = {}
+
+    def cerrar(self):
+        """Sin conexiones que cerrar (compatibilidad con APIClient)"""
+
+    def _contar(self, endpoint):
+        self.peticiones_por_endpoint[endpoint] = self.peticiones_por_endpoint.get(endpoint, 0) + 1
+
+    # ========== REGLAS ==========
+
+    def _cargar_escopeta(self):
+        rng = self.sesion['rng']
+        num_reales = rng.randint(MIN_BALAS_REALES, MAX_BALAS_REALES)
+        num_fogueo = rng.randint(MIN_BALAS_FOGUEO, MAX_BALAS_FOGUEO)
+        escopeta = [1] * num_reales + [0] * num_fogueo
+        rng.shuffle(escopeta)
+        self.sesion['escopeta'] = escopeta
+        return num_reales, num_fogueo
+
+    def _estado(self, sesion):
+        return {
+            'vidas_jugador': sesion['vidas_jugador'],
+            'vidas_bot': sesion['vidas_bot'],
+            'puntos': sesion['puntos'],
+            'balas_restantes': len(sesion['escopeta']),
+            'turno_jugador': sesion['turno_jugador']
+        }
+
+    def _recargar(self):
+        num_reales, num_fogueo = self._cargar_escopeta()
+        return dict(self._estado(self.sesion), recarga=True, local=True,
+                    mensaje=f'NUEVA RONDA: {num_reales} reales, {num_fogueo} fogueo')
+
+    def _fin_de_partida(self, sesion):
+        """Entregar el registro de la partida (se firma al subirlo)"""
+        registro = {
+            'version': VERSION_REGISTRO,
+            'session_id': self.session_id,
+            'nombre': sesion['nombre'],
+            'puntos': sesion['puntos'],
+            'balas_disparadas': sesion['balas_disparadas'],
+            'victoria': sesion['vidas_bot'] <= 0,
+            'semilla': sesion['semilla'],
+            'jugadas': sesion['jugadas'],
+            'inicio': sesion['inicio'],
+            'fecha': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+
+        self.partidas_terminadas.append((registro['nombre'], registro['puntos'], registro['fecha']))
+        self.session_id = None
+        self.sesion = None
+        if self.al_terminar:
+            self.al_terminar(registro)
+
+    def _respuesta_disparo(self, sesion, mensaje, cambiar_turno):
+        game_over = sesion['vidas_jugador'] <= 0 or sesion['vidas_bot'] <= 0
+        if game_over:
+            if sesion['vidas_bot'] <= 0:
+                mensaje = "¡VICTORIA! Derrotaste al bot"
+            self._fin_de_partida(sesion)
+        return dict(self._estado(sesion), success=True, local=True, mensaje=mensaje,
+                    cambiar_turno=cambiar_turno, game_over=game_over)
+
+    def _disparo_bot(self):
+        sesion = self.sesion
+        if not sesion['escopeta']:
+            return self._recargar()
+
+        if sesion['rng'].random() < BOT_PROB_DISPARAR_JUGADOR:
+            objetivo = 'jugador'
+        else:
+            objetivo = 'bot'
+        bala = sesion['escopeta'].pop(0)
+        sesion['balas_disparadas'] += 1
+        sesion['jugadas'].append(['bot', objetivo, bala])
+
+        if objetivo == 'jugador':
+            sesion['vidas_jugador'] -= bala
+            mensaje = "El bot te disparó con bala REAL" if bala else "El bot te disparó - Fogueo"
+            sesion['turno_jugador'] = True
+            cambiar_turno = True
+        else:
+            sesion['vidas_bot'] -= bala
+            mensaje = ("El bot se disparó con bala REAL" if bala
+                       else "El bot se disparó - Fogueo, sigue jugando")
+            cambiar_turno = False
+
+        return self._respuesta_disparo(sesion, mensaje, cambiar_turno)
+
+    # ========== ENDPOINTS DEL JUEGO ==========
+
+    def iniciar_juego(self, nombre, auto_bot=True):
+        """Iniciar una partida local"""
+        self._contar('iniciar_juego')
+        semilla = secrets.randbits(64)
+        self.session_id = f"local-{uuid.uuid4()}"
+        self.sesion = {
+            'nombre': nombre,
+            'vidas_jugador': MAX_VIDAS,
+            'vidas_bot': MAX_VIDAS,
+            'puntos': 0,
+            'escopeta': [],
+            'turno_jugador': True,
+            'balas_disparadas': 0,
+            'semilla': semilla,
+            'rng': random.Random(semilla),
+            'auto_bot': auto_bot,
+            'jugadas': [],
+            'inicio': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+        num_reales, num_fogueo = self._cargar_escopeta()
+        return dict(self._estado(self.sesion),
+                    error=False, success=True, local=True,
+                    session_id=self.session_id, auto_bot=auto_bot,
+                    mensaje=f'Sin conexión - partida local. Escopeta cargada: '
+                            f'{num_reales} reales, {num_fogueo} fogueo')
+
+    def disparar(self, objetivo):
+        """Disparo del jugador (en modo auto_bot encadena los turnos del bot)"""
+        self._contar('disparar')
+        sesion = self.sesion
+        if sesion is None:
+            return {'error': True, 'mensaje': 'Sin sesión activa'}
+        if not sesion['turno_jugador']:
+            return dict(self._estado(sesion), error=True, mensaje='No es tu turno', game_over=False)
+        if not sesion['escopeta']:
+            return self._recargar()
+
+        bala = sesion['escopeta'].pop(0)
+        sesion['balas_disparadas'] += 1
+        sesion['jugadas'].append(['jugador', objetivo, bala])
+
+        if objetivo == 'bot':
+            sesion['vidas_bot'] -= bala
+            sesion['puntos'] += PUNTOS_BALA_REAL * bala
+            mensaje = "💥 ¡BANG! Bala REAL al bot" if bala else "✨ Click - Fogueo al bot"
+            cambiar_turno = True
+        elif bala:
+            sesion['vidas_jugador'] -= 1
+            mensaje = "💀 ¡BANG! Te disparaste con bala REAL"
+            cambiar_turno = True
+        else:
+            sesion['puntos'] += PUNTOS_FOGUEO_SELF
+            mensaje = "🎲 Fogueo - Sigues jugando"
+            cambiar_turno = False
+        if cambiar_turno:
+            sesion['turno_jugador'] = False
+
+        respuesta = self._respuesta_disparo(sesion, mensaje, cambiar_turno)
+        if sesion['auto_bot'] and not respuesta['game_over'] and not sesion['turno_jugador']:
+            respuesta = self._resolver_turnos_bot(respuesta)
+        return respuesta
+
+    def _resolver_turnos_bot(self, respuesta_jugador):
+        """Igual que el servidor: eventos encadenados del bot"""
+        sesion = self.sesion
+        eventos = [dict(respuesta_jugador, actor='jugador')]
+        while not sesion['turno_jugador'] and len(eventos) <= MAX_EVENTOS_AUTO_BOT:
+            evento = self._disparo_bot()
+            eventos.append(dict(evento, actor='bot'))
+            if evento.get('game_over'):
+                break
+        respuesta = dict(eventos[-1])
+        respuesta.pop('actor')
+        respuesta['eventos'] = eventos
+        return respuesta
+
+    def turno_bot(self):
+        """Un disparo del bot (o recarga)"""
+        self._contar('turno_bot')
+        if self.sesion is None:
+            return {'error': True, 'mensaje': 'Sin sesión activa'}
+        return self._disparo_bot()
+
+    def obtener_ranking(self, limite=10):
+        """Ranking de las partidas jugadas en local"""
+        self._contar('ranking')
+        ranking = sorted(self.partidas_terminadas, key=lambda p: p[1], reverse=True)
+        return {'success': True, 'local': True, 'ranking': ranking[:limite]}
@@ -1,8 +1,16 @@
 """
 Pantallas del juego - Inicio, Juego, Ranking
+Render en modo retenido: cada zona de la pantalla se redibuja solo cuando
+cambia su firma (los datos que muestra) y se devuelve como rectángulo sucio
+para pygame.display.update(rects).
 """
 import pygame
 import sys
+from collections import deque
+from texto import fuente, partir_lineas, render_texto
+
+# Firma de una zona que aún no se ha dibujado nunca
+_SIN_DIBUJAR = object()
 
 class Button:
     """Clase para botones interactivos"""
@@ -13,13 +21,14 @@ class Button:
         self.hover_color = hover_color
         self.text_color = text_color
         self.current_color = color
-        self.font = pygame.font.Font(None, 32)
+        self.font = fuente(32)
+        self.armado = False
     
     def draw(self, screen):
         pygame.draw.rect(screen, self.current_color, self.rect, border_radius=10)
         pygame.draw.rect(screen, (255, 0, 0), self.rect, 3, border_radius=10)
         
-        text_surface = self.font.render(self.text, True, self.text_color)
+        text_surface = render_texto(self.font, self.text, self.text_color)
         text_rect = text_surface.get_rect(center=self.rect.center)
         screen.blit(text_surface, text_rect)
     
@@ -31,10 +40,26 @@ class Button:
             self.current_color = self.color
             return False
     
-    def check_click(self, mouse_pos, mouse_pressed):
-        if self.rect.collidepoint(mouse_pos) and mouse_pressed[0]:
-            return True
-        return False
+    def check_click(self, events):
+        """
+        Click por flanco: MOUSEBUTTONDOWN dentro del botón lo arma y
+        MOUSEBUTTONUP dentro lo dispara. Mantener pulsado no repite.
+        """
+        click = False
+        for event in events:
+            if event.type not in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP) or event.button != 1:
+                continue
+            dentro = self.rect.collidepoint(event.pos)
+            if event.type == pygame.MOUSEBUTTONDOWN:
+                self.armado = dentro
+            else:
+                click = click or (self.armado and dentro)
+                self.armado = False
+        return click
+    
+    def desarmar(self):
+        """Olvidar una pulsación a medias (el botón deja de mostrarse)"""
+        self.armado = False
 
 
 class InputBox:
@@ -46,7 +71,7 @@ class InputBox:
         self.color = self.color_inactive
         self.text = ''
         self.placeholder = placeholder
-        self.font = pygame.font.Font(None, 36)
+        self.font = fuente(36)
         self.active = False
     
     def handle_event(self, event):
@@ -73,32 +98,79 @@ class InputBox:
         
         display_text = self.text if self.text else self.placeholder
         text_color = (255, 255, 255) if self.text else (100, 100, 100)
-        text_surface = self.font.render(display_text, True, text_color)
+        text_surface = render_texto(self.font, display_text, text_color)
         screen.blit(text_surface, (self.rect.x + 10, self.rect.y + 10))
+    
+    def firma(self):
+        """Estado visible de la caja (si cambia hay que redibujarla)"""
+        return (self.text, tuple(self.color))
 
 
-class PantallaInicio:
-    """Pantalla de inicio con input de nombre"""
+class Pantalla:
+    """Base de las pantallas: zonas con firma y rectángulos sucios"""
+    FONDO = (20, 20, 20)
+    
     def __init__(self, screen, width, height):
         self.screen = screen
         self.width = width
         self.height = height
-        self.font_titulo = pygame.font.Font(None, 72)
-        self.font_texto = pygame.font.Font(None, 28)
+        self.firmas = {}
+        self.sucios = []
+        self.todo_sucio = True
+    
+    def invalidar(self):
+        """Forzar un redibujado completo en el próximo frame"""
+        self.todo_sucio = True
+    
+    def zona(self, clave, rect, firma, dibujar):
+        """Redibujar la zona si su firma cambió desde el último frame"""
+        if not self.todo_sucio and self.firmas.get(clave, _SIN_DIBUJAR) == firma:
+            return
+        self.firmas[clave] = firma
+        self.screen.fill(self.FONDO, rect)
+        dibujar()
+        self.sucios.append(pygame.Rect(rect))
+    
+    def empezar_frame(self):
+        """Preparar el frame; con todo_sucio se pinta el fondo completo"""
+        if self.todo_sucio:
+            self.screen.fill(self.FONDO)
+    
+    def tomar_sucios(self):
+        """Rectángulos modificados en el frame (y reset del estado)"""
+        if self.todo_sucio:
+            self.todo_sucio = False
+            self.sucios = []
+            return [self.screen.get_rect()]
+        sucios, self.sucios = self.sucios, []
+        return sucios
+    
+    def zona_boton(self, clave, boton):
+        """Zona de un botón, que cambia con el hover"""
+        boton.check_hover(pygame.mouse.get_pos())
+        self.zona(clave, boton.rect, boton.current_color,
+                  lambda: boton.draw(self.screen))
+
+
+class PantallaInicio(Pantalla):
+    """Pantalla de inicio con input de nombre"""
+    FONDO = (30, 0, 0)
+    
+    def __init__(self, screen, width, height):
+        super().__init__(screen, width, height)
+        self.font_titulo = fuente(72)
+        self.font_texto = fuente(28)
         
         # Input box para nombre
         self.input_box = InputBox(200, 300, 400, 50, "Ingresa tu nombre")
         
         # Botón iniciar
-        self.btn_iniciar = Button(250, 400, 300, 60, "COMENZAR", 
+        self.btn_iniciar = Button(250, 400, 300, 60, "COMENZAR",
                                    (200, 0, 0), (255, 0, 0))
     
-    def render(self, events):
-        # Fondo degradado
-        self.screen.fill((30, 0, 0))
-        
+    def dibujar_cabecera(self):
         # Título
-        titulo = self.font_titulo.render("🎰 BUCKSHOT ROULETTE", True, (255, 0, 0))
+        titulo = render_texto(self.font_titulo, "🎰 BUCKSHOT ROULETTE", (255, 0, 0))
         titulo_rect = titulo.get_rect(center=(self.width // 2, 100))
         self.screen.blit(titulo, titulo_rect)
         
@@ -111,41 +183,50 @@ class PantallaInicio:
         
         y = 180
         for linea in instrucciones:
-            texto = self.font_texto.render(linea, True, (200, 200, 200))
+            texto = render_texto(self.font_texto, linea, (200, 200, 200))
             texto_rect = texto.get_rect(center=(self.width // 2, y))
             self.screen.blit(texto, texto_rect)
             y += 35
-        
-        # Input box
-        self.input_box.draw(self.screen)
-        
-        # Botón
-        self.btn_iniciar.draw(self.screen)
-        self.btn_iniciar.check_hover(pygame.mouse.get_pos())
+    
+    def render(self, events):
+        self.empezar_frame()
         
         # Procesar eventos
+        accion = None
         for event in events:
             enter_pressed = self.input_box.handle_event(event)
             if enter_pressed and self.input_box.text.strip():
-                return {'tipo': 'iniciar_juego', 'nombre': self.input_box.text.strip()}
+                accion = {'tipo': 'iniciar_juego', 'nombre': self.input_box.text.strip()}
+        
+        # Título e instrucciones (estáticos)
+        self.zona('cabecera', (0, 40, self.width, 240), None, self.dibujar_cabecera)
+        
+        # Input box
+        self.zona('input', self.input_box.rect, self.input_box.firma(),
+                  lambda: self.input_box.draw(self.screen))
+        
+        # Botón
+        self.zona_boton('iniciar', self.btn_iniciar)
         
         # Click en botón
-        if self.btn_iniciar.check_click(pygame.mouse.get_pos(), pygame.mouse.get_pressed()):
+        if self.btn_iniciar.check_click(events):
             if self.input_box.text.strip():
-                return {'tipo': 'iniciar_juego', 'nombre': self.input_box.text.strip()}
+                accion = {'tipo': 'iniciar_juego', 'nombre': self.input_box.text.strip()}
         
-        return None
+        return accion
 
 
-class PantallaJuego:
+class PantallaJuego(Pantalla):
     """Pantalla principal del juego"""
+    # Tiempo que se muestra cada evento resuelto por el servidor (modo auto_bot)
+    DURACION_EVENTO_MS = 900
+    
     def __init__(self, screen, width, height):
-        self.screen = screen
-        self.width = width
-        self.height = height
-        self.font_stat = pygame.font.Font(None, 36)
-        self.font_label = pygame.font.Font(None, 24)
-        self.font_mensaje = pygame.font.Font(None, 28)
+        super().__init__(screen, width, height)
+        self.font_titulo = fuente(48)
+        self.font_stat = fuente(36)
+        self.font_label = fuente(24)
+        self.font_mensaje = fuente(28)
         
         # Datos del juego
         self.vidas_jugador = 3
@@ -155,6 +236,13 @@ class PantallaJuego:
         self.mensaje = "Prepárate para jugar..."
         self.turno_jugador = True
         
+        # Líneas del mensaje ya partidas (se recalculan al cambiar el mensaje)
+        self.lineas_mensaje = partir_lineas(self.font_mensaje, self.mensaje, 680)
+        
+        # Eventos pendientes de animar (disparos del bot encadenados)
+        self.eventos_pendientes = deque()
+        self.proximo_evento_ms = 0
+        
         # Botones
         self.btn_disparar_bot = Button(150, 400, 500, 60, "Disparar al BOT",
                                         (180, 50, 50), (220, 70, 70))
@@ -162,6 +250,7 @@ class PantallaJuego:
                                          (180, 120, 0), (220, 150, 0))
         self.btn_turno_bot = Button(150, 440, 500, 60, "Turno del Bot",
                                      (100, 100, 100), (150, 150, 150))
+        self.rect_botones = self.btn_disparar_bot.rect.union(self.btn_disparar_self.rect)
     
     def actualizar_datos(self, datos):
         """Actualizar datos desde API"""
@@ -169,8 +258,32 @@ class PantallaJuego:
         self.vidas_bot = datos.get('vidas_bot', self.vidas_bot)
         self.puntos = datos.get('puntos', self.puntos)
         self.balas_restantes = datos.get('balas_restantes', self.balas_restantes)
-        self.mensaje = datos.get('mensaje', self.mensaje)
-        self.turno_jugador = not datos.get('cambiar_turno', False) if datos.get('cambiar_turno') is not None else self.turno_jugador
+        mensaje = datos.get('mensaje', self.mensaje)
+        if mensaje != self.mensaje:
+            self.mensaje = mensaje
+            self.lineas_mensaje = partir_lineas(self.font_mensaje, mensaje, 680)
+        if datos.get('turno_jugador') is not None:
+            self.turno_jugador = datos['turno_jugador']
+        elif datos.get('cambiar_turno') is not None:
+            self.turno_jugador = not datos['cambiar_turno']
+    
+    def encolar_eventos(self, eventos):
+        """Mostrar eventos uno tras otro (el primero inmediatamente)"""
+        if not eventos:
+            return
+        self.eventos_pendientes.extend(eventos[1:])
+        self.actualizar_datos(eventos[0])
+        self.proximo_evento_ms = pygame.time.get_ticks() + self.DURACION_EVENTO_MS
+    
+    def animando(self):
+        """True mientras queden eventos por mostrar"""
+        return bool(self.eventos_pendientes)
+    
+    def _avanzar_eventos(self):
+        """Aplicar el siguiente evento cuando vence su tiempo"""
+        if self.eventos_pendientes and pygame.time.get_ticks() >= self.proximo_evento_ms:
+            self.actualizar_datos(self.eventos_pendientes.popleft())
+            self.proximo_evento_ms = pygame.time.get_ticks() + self.DURACION_EVENTO_MS
     
     def dibujar_stat_box(self, x, y, label, valor, color=(255, 0, 0)):
         """Dibujar caja de estadística"""
@@ -178,88 +291,94 @@ class PantallaJuego:
         pygame.draw.rect(self.screen, (40, 40, 40), rect, border_radius=10)
         pygame.draw.rect(self.screen, color, rect, 3, border_radius=10)
         
-        label_surf = self.font_label.render(label, True, (150, 150, 150))
+        label_surf = render_texto(self.font_label, label, (150, 150, 150))
         label_rect = label_surf.get_rect(center=(x + 90, y + 30))
         self.screen.blit(label_surf, label_rect)
         
-        valor_surf = self.font_stat.render(str(valor), True, color)
+        valor_surf = render_texto(self.font_stat, str(valor), color)
         valor_rect = valor_surf.get_rect(center=(x + 90, y + 65))
         self.screen.blit(valor_surf, valor_rect)
     
-    def render(self, events):
-        # Fondo
-        self.screen.fill((20, 20, 20))
-        
-        # Título
-        titulo = pygame.font.Font(None, 48).render("BUCKSHOT ROULETTE", True, (255, 0, 0))
+    def zona_stat_box(self, x, y, label, valor, color=(255, 0, 0)):
+        """Caja de estadística, redibujada solo si cambia su valor"""
+        self.zona(label, (x, y, 180, 100), valor,
+                  lambda: self.dibujar_stat_box(x, y, label, valor, color))
+    
+    def dibujar_titulo(self):
+        titulo = render_texto(self.font_titulo, "BUCKSHOT ROULETTE", (255, 0, 0))
         titulo_rect = titulo.get_rect(center=(self.width // 2, 40))
         self.screen.blit(titulo, titulo_rect)
-        
-        # Stats
-        self.dibujar_stat_box(50, 90, "Tus Vidas", self.vidas_jugador)
-        self.dibujar_stat_box(240, 90, "Vidas Bot", self.vidas_bot)
-        self.dibujar_stat_box(430, 90, "Puntos", self.puntos, (0, 200, 0))
-        self.dibujar_stat_box(50, 210, "Balas", self.balas_restantes, (255, 150, 0))
-        
-        # Mensaje
+    
+    def dibujar_mensaje(self):
         mensaje_rect = pygame.Rect(50, 330, 700, 50)
         pygame.draw.rect(self.screen, (40, 40, 40), mensaje_rect, border_radius=8)
         pygame.draw.rect(self.screen, (255, 0, 0), mensaje_rect, 2, border_radius=8)
         
-        # Dividir mensaje en líneas si es muy largo
-        palabras = self.mensaje.split()
-        lineas = []
-        linea_actual = ""
-        
-        for palabra in palabras:
-            test_linea = linea_actual + " " + palabra if linea_actual else palabra
-            if self.font_mensaje.size(test_linea)[0] < 680:
-                linea_actual = test_linea
-            else:
-                lineas.append(linea_actual)
-                linea_actual = palabra
-        if linea_actual:
-            lineas.append(linea_actual)
-        
+        # Mensaje ya dividido en líneas (ver actualizar_datos)
+        lineas = self.lineas_mensaje
         y_offset = 340 if len(lineas) == 1 else 333
         for linea in lineas[:2]:  # Máximo 2 líneas
-            mensaje_surf = self.font_mensaje.render(linea, True, (255, 255, 255))
+            mensaje_surf = render_texto(self.font_mensaje, linea, (255, 255, 255))
             self.screen.blit(mensaje_surf, (60, y_offset))
             y_offset += 25
+    
+    def dibujar_espera(self):
+        espera = render_texto(self.font_mensaje, "El bot está jugando...", (150, 150, 150))
+        self.screen.blit(espera, espera.get_rect(center=(self.width // 2, 470)))
+    
+    def render(self, events):
+        self._avanzar_eventos()
+        self.empezar_frame()
         
-        # Botones según turno
-        accion = None
+        # Título
+        self.zona('titulo', (0, 10, self.width, 60), None, self.dibujar_titulo)
         
-        if self.turno_jugador:
-            self.btn_disparar_bot.draw(self.screen)
-            self.btn_disparar_self.draw(self.screen)
-            
-            self.btn_disparar_bot.check_hover(pygame.mouse.get_pos())
-            self.btn_disparar_self.check_hover(pygame.mouse.get_pos())
+        # Stats
+        self.zona_stat_box(50, 90, "Tus Vidas", self.vidas_jugador)
+        self.zona_stat_box(240, 90, "Vidas Bot", self.vidas_bot)
+        self.zona_stat_box(430, 90, "Puntos", self.puntos, (0, 200, 0))
+        self.zona_stat_box(50, 210, "Balas", self.balas_restantes, (255, 150, 0))
+        
+        # Mensaje
+        self.zona('mensaje', (50, 330, 700, 50), self.lineas_mensaje, self.dibujar_mensaje)
+        
+        # Botones según turno: al cambiar de modo se limpia la zona entera
+        accion = None
+        modo = 'animando' if self.animando() else ('jugador' if self.turno_jugador else 'bot')
+        if self.firmas.get('modo_botones') != modo:
+            self.firmas = {k: v for k, v in self.firmas.items() if not k.startswith('btn_')}
+            for boton in (self.btn_disparar_bot, self.btn_disparar_self, self.btn_turno_bot):
+                boton.desarmar()
+        self.zona('modo_botones', self.rect_botones, modo, lambda: None)
+        
+        if modo == 'animando':
+            # Sin botones mientras se muestran los disparos del bot
+            self.zona('btn_espera', (150, 450, 500, 40), None, self.dibujar_espera)
+        elif modo == 'jugador':
+            self.zona_boton('btn_disparar_bot', self.btn_disparar_bot)
+            self.zona_boton('btn_disparar_self', self.btn_disparar_self)
             
-            if self.btn_disparar_bot.check_click(pygame.mouse.get_pos(), pygame.mouse.get_pressed()):
+            if self.btn_disparar_bot.check_click(events):
                 accion = {'tipo': 'disparar', 'objetivo': 'bot'}
-            elif self.btn_disparar_self.check_click(pygame.mouse.get_pos(), pygame.mouse.get_pressed()):
+            elif self.btn_disparar_self.check_click(events):
                 accion = {'tipo': 'disparar', 'objetivo': 'jugador'}
         else:
-            self.btn_turno_bot.draw(self.screen)
-            self.btn_turno_bot.check_hover(pygame.mouse.get_pos())
+            self.zona_boton('btn_turno_bot', self.btn_turno_bot)
             
-            if self.btn_turno_bot.check_click(pygame.mouse.get_pos(), pygame.mouse.get_pressed()):
+            if self.btn_turno_bot.check_click(events):
                 accion = {'tipo': 'turno_bot'}
         
         return accion
 
 
-class PantallaRanking:
+class PantallaRanking(Pantalla):
     """Pantalla de ranking global"""
     def __init__(self, screen, width, height):
-        self.screen = screen
-        self.width = width
-        self.height = height
-        self.font_titulo = pygame.font.Font(None, 56)
-        self.font_item = pygame.font.Font(None, 28)
-        self.font_score = pygame.font.Font(None, 32)
+        super().__init__(screen, width, height)
+        self.font_titulo = fuente(56)
+        self.font_subtitulo = fuente(36)
+        self.font_item = fuente(28)
+        self.font_score = fuente(32)
         
         self.ranking = []
         self.puntos_jugador = 0
@@ -275,27 +394,24 @@ class PantallaRanking:
         self.puntos_jugador = puntos
         self.nombre_jugador = nombre
     
-    def render(self, events):
-        # Fondo
-        self.screen.fill((20, 20, 20))
-        
+    def dibujar_cabecera(self):
         # Título
-        titulo = self.font_titulo.render("GAME OVER", True, (255, 0, 0))
+        titulo = render_texto(self.font_titulo, "GAME OVER", (255, 0, 0))
         titulo_rect = titulo.get_rect(center=(self.width // 2, 50))
         self.screen.blit(titulo, titulo_rect)
         
         # Tu puntuación
-        tu_score = self.font_score.render(f"Tu puntuación: {self.puntos_jugador} pts", 
-                                          True, (255, 200, 0))
+        tu_score = render_texto(self.font_score, f"Tu puntuación: {self.puntos_jugador} pts",
+                                (255, 200, 0))
         tu_score_rect = tu_score.get_rect(center=(self.width // 2, 110))
         self.screen.blit(tu_score, tu_score_rect)
         
         # Título ranking
-        ranking_titulo = pygame.font.Font(None, 36).render("TOP 10 GLOBAL", True, (255, 200, 0))
+        ranking_titulo = render_texto(self.font_subtitulo, "TOP 10 GLOBAL", (255, 200, 0))
         ranking_titulo_rect = ranking_titulo.get_rect(center=(self.width // 2, 160))
         self.screen.blit(ranking_titulo, ranking_titulo_rect)
-        
-        # Lista de ranking
+    
+    def dibujar_lista(self):
         y = 200
         for i, (nombre, puntos, fecha) in enumerate(self.ranking[:10], 1):
             # Fondo item
@@ -309,20 +425,29 @@ class PantallaRanking:
             pygame.draw.rect(self.screen, color_fondo, item_rect, border_radius=5)
             
             # Posición y nombre
-            pos_texto = self.font_item.render(f"{i}. {nombre}", True, (255, 255, 255))
+            pos_texto = render_texto(self.font_item, f"{i}. {nombre}", (255, 255, 255))
             self.screen.blit(pos_texto, (110, y + 5))
             
             # Puntos
-            puntos_texto = self.font_item.render(f"{puntos} pts", True, (255, 200, 0))
+            puntos_texto = render_texto(self.font_item, f"{puntos} pts", (255, 200, 0))
             self.screen.blit(puntos_texto, (600, y + 5))
             
             y += 32
+    
+    def render(self, events):
+        self.empezar_frame()
+        
+        # Cabecera y lista: cambian solo al llegar el ranking
+        self.zona('cabecera', (0, 20, self.width, 160), self.puntos_jugador,
+                  self.dibujar_cabecera)
+        self.zona('lista', (100, 200, 600, 320),
+                  (tuple(map(tuple, self.ranking[:10])), self.nombre_jugador, self.puntos_jugador),
+                  self.dibujar_lista)
         
         # Botón reiniciar
-        self.btn_reiniciar.draw(self.screen)
-        self.btn_reiniciar.check_hover(pygame.mouse.get_pos())
+        self.zona_boton('reiniciar', self.btn_reiniciar)
         
-        if self.btn_reiniciar.check_click(pygame.mouse.get_pos(), pygame.mouse.get_pressed()):
+        if self.btn_reiniciar.check_click(events):
             return {'tipo': 'reiniciar'}
         
         return None
@@ -0,0 +1,72 @@
+"""
+Trabajador de red - ejecuta las llamadas al APIClient fuera del loop de Pygame
+"""
+import queue
+import threading
+
+
+class TrabajadorRed:
+    """
+    Hilo de red con cola de peticiones y cola de respuestas
+    El loop principal envía acciones con enviar() y recoge resultados con
+    obtener_respuestas() sin bloquear nunca.
+    """
+
+    def __init__(self, api_client, al_responder=None):
+        self.api_client = api_client
+        # Aviso opcional al llegar una respuesta (ej. despertar el loop en reposo)
+        self.al_responder = al_responder
+        self.peticiones = queue.Queue()
+        self.respuestas = queue.Queue()
+        self._en_vuelo = 0
+        self._lock = threading.Lock()
+        self.hilo = threading.Thread(target=self._bucle, name="trabajador-red", daemon=True)
+        self.hilo.start()
+
+    def enviar(self, tipo, funcion, *args, contexto=None):
+        """
+        Encolar una llamada. tipo y contexto vuelven junto al resultado
+        para que el loop principal sepa cómo procesarlo
+        """
+        with self._lock:
+            self._en_vuelo += 1
+        self.peticiones.put((tipo, funcion, args, contexto))
+
+    def obtener_respuestas(self):
+        """Respuestas disponibles: lista de (tipo, resultado, contexto)"""
+        disponibles = []
+        while True:
+            try:
+                disponibles.append(self.respuestas.get_nowait())
+            except queue.Empty:
+                break
+        if disponibles:
+            with self._lock:
+                self._en_vuelo -= len(disponibles)
+        return disponibles
+
+    def ocupado(self):
+        """True si hay peticiones enviadas o en curso sin respuesta procesada"""
+        return self._en_vuelo > 0
+
+    def detener(self):
+        """Terminar el hilo tras las peticiones pendientes"""
+        self.peticiones.put(None)
+        self.hilo.join(timeout=1)
+
+    def _bucle(self):
+        while True:
+            tarea = self.peticiones.get()
+            if tarea is None:
+                return
+
+            tipo, funcion, args, contexto = tarea
+            try:
+                resultado = funcion(*args)
+            except Exception as e:
+                print(f"❌ Error en hilo de red ({tipo}): {e}")
+                resultado = {'error': True, 'mensaje': str(e)}
+
+            self.respuestas.put((tipo, resultado, contexto))
+            if self.al_responder:
+                self.al_responder()
@@ -0,0 +1,102 @@
+"""
+Política de reintentos - backoff exponencial con jitter, Retry-After y
+circuit breaker por endpoint
+"""
+import random
+import threading
+import time
+
+
+class PoliticaReintentos:
+    """
+    Backoff exponencial con "full jitter": la espera del intento n es
+    uniforme en [0, min(maximo, base * 2^n)], así los clientes que fallan a
+    la vez no reintentan a la vez. Si el servidor manda Retry-After se
+    respeta como mínimo.
+    """
+
+    def __init__(self, intentos=3, base=0.25, maximo=8.0, rng=None, dormir=time.sleep):
+        self.intentos = intentos
+        self.base = base
+        self.maximo = maximo
+        self.rng = rng or random.Random()
+        self.dormir = dormir
+
+    def espera(self, intento, retry_after=None):
+        """Segundos a esperar antes del reintento número intento+1"""
+        tope = min(self.maximo, self.base * (2 ** intento))
+        espera = self.rng.uniform(0, tope)
+        if retry_after is not None:
+            # Jitter encima de Retry-After para no despertar todos a la vez
+            espera = retry_after + self.rng.uniform(0, self.base)
+        return espera
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker de un endpoint
+    CERRADO: pasan todas las peticiones; tras umbral_fallos fallos seguidos
+    se abre. ABIERTO: falla rápido sin tocar la red hasta que vence la
+    apertura. SEMIABIERTO: deja pasar una única sonda; si va bien se
+    cierra, si falla vuelve a abrirse con el doble de tiempo (hasta un tope).
+    """
+
+    CERRADO = 'cerrado'
+    ABIERTO = 'abierto'
+    SEMIABIERTO = 'semiabierto'
+
+    def __init__(self, umbral_fallos=3, apertura=2.0, apertura_maxima=10.0,
+                 reloj=time.monotonic, rng=None):
+        self.umbral_fallos = umbral_fallos
+        self.apertura_inicial = apertura
+        self.apertura_maxima = apertura_maxima
+        self.reloj = reloj
+        self.rng = rng or random.Random()
+
+        self.estado = self.CERRADO
+        self.fallos = 0
+        self.apertura = apertura
+        self.abierto_hasta = 0.0
+        self.sonda_en_curso = False
+        self._lock = threading.Lock()
+
+    def permitir(self):
+        """True si la petición puede salir a la red"""
+        with self._lock:
+            if self.estado == self.CERRADO:
+                return True
+            if self.estado == self.ABIERTO:
+                if self.reloj() < self.abierto_hasta:
+                    return False
+                self.estado = self.SEMIABIERTO
+                self.sonda_en_curso = False
+            # SEMIABIERTO: una sola sonda a la vez
+            if self.sonda_en_curso:
+                return False
+            self.sonda_en_curso = True
+            return True
+
+    def registrar_exito(self):
+        with self._lock:
+            self.estado = self.CERRADO
+            self.fallos = 0
+            self.apertura = self.apertura_inicial
+            self.sonda_en_curso = False
+
+    def registrar_fallo(self, retry_after=None):
+        with self._lock:
+            self.fallos += 1
+            if self.estado == self.SEMIABIERTO:
+                self.apertura = min(self.apertura * 2, self.apertura_maxima)
+                self._abrir(retry_after)
+            elif self.fallos >= self.umbral_fallos:
+                self._abrir(retry_after)
+
+    def _abrir(self, retry_after):
+        # Apertura con jitter (±50%) para que las sondas no lleguen sincronizadas
+        duracion = self.apertura * self.rng.uniform(0.5, 1.5)
+        if retry_after is not None:
+            duracion = max(duracion, retry_after)
+        self.estado = self.ABIERTO
+        self.abierto_hasta = self.reloj() + duracion
+        self.sonda_en_curso = False
@@ -0,0 +1,84 @@
+"""
+Caché de fuentes y superficies de texto para las pantallas
+Las fuentes se cargan una vez y cada texto renderizado se reutiliza
+mientras no cambie (LRU por fuente, texto y color).
+"""
+from collections import OrderedDict
+
+import pygame
+
+_fuentes = {}
+
+
+def fuente(tamano, nombre=None):
+    """Fuente cargada una sola vez por (nombre, tamaño)"""
+    clave = (nombre, tamano)
+    f = _fuentes.get(clave)
+    if f is None:
+        f = _fuentes[clave] = pygame.font.Font(nombre, tamano)
+    return f
+
+
+def vaciar():
+    """Liberar fuentes y superficies (obligatorio antes de pygame.quit())"""
+    _fuentes.clear()
+    cache_texto.superficies.clear()
+
+
+class CacheTexto:
+    """Superficies de texto con desalojo LRU"""
+
+    def __init__(self, maximo=512):
+        self.maximo = maximo
+        self.superficies = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def render(self, f, texto, color):
+        """Equivalente a f.render(texto, True, color), cacheado"""
+        clave = (f, texto, tuple(color))
+        superficie = self.superficies.get(clave)
+        if superficie is not None:
+            self.superficies.move_to_end(clave)
+            self.aciertos += 1
+            return superficie
+
+        self.fallos += 1
+        superficie = f.render(texto, True, color)
+        self.superficies[clave] = superficie
+        if len(self.superficies) > self.maximo:
+            self.superficies.popitem(last=False)
+        return superficie
+
+    def estadisticas(self):
+        total = self.aciertos + self.fallos
+        return {
+            'entradas': len(self.superficies),
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'tasa_acierto': self.aciertos / total if total else 0.0
+        }
+
+
+cache_texto = CacheTexto()
+
+
+def render_texto(f, texto, color):
+    """Superficie de texto desde la caché global"""
+    return cache_texto.render(f, texto, color)
+
+
+def partir_lineas(f, texto, ancho):
+    """Dividir texto en líneas que quepan en ancho píxeles"""
+    lineas = []
+    linea_actual = ""
+    for palabra in texto.split():
+        test_linea = linea_actual + " " + palabra if linea_actual else palabra
+        if f.size(test_linea)[0] < ancho:
+            linea_actual = test_linea
+        else:
+            lineas.append(linea_actual)
+            linea_actual = palabra
+    if linea_actual:
+        lineas.append(linea_actual)
+    return lineas
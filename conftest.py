@@ -0,0 +1,3 @@
+# test_connection.py (aquí y en la copia de Buckshot/) es un script manual
+# contra PostgreSQL, no un test
+collect_ignore_glob = ['*/test_connection.py']
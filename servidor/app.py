@@ -1,36 +1,56 @@
 """
 API REST Flask - Servidor Buckshot Roulette
 """
-from flask import Flask, jsonify, request, render_template_string
+from flask import Flask, Response, g, jsonify, request, render_template_string
 from flask_cors import CORS
 from ranking_web import RankingWeb
+import atexit
 import logging
+from collections import OrderedDict
 from datetime import datetime
+from functools import partial, wraps
+import hmac
 import os 
-import random 
+import secrets
+import signal
+import sys
+import threading
+import time
+import tracemalloc
 
 from config import get_config
+from consultas import consultas_peticion, iniciar_peticion, terminar_peticion
 from database import init_db
-from models import BuckshotGame, Puntuacion, SesionJuego
-
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+from diario import DiarioResultados
+from instantanea import Instantaneas
+from limites import LimitadorPeticiones, limitado
+from memoria import ContableMemoria, rss_actual
+from metricas import metricas
+from models import BuckshotGame, EstadoSesion, Puntuacion, SesionJuego, clave_instalacion
+from perfilador import Muestreos, PerfilPorPeticion, a_collapsed, a_speedscope
+from registro import configurar_logging
+from segador import Segador
+from sesiones import AlmacenSesiones
 
 # Crear app Flask
 app = Flask(__name__)
 config = get_config()
 app.config.from_object(config)
 
+# tracemalloc cuanto antes: solo ve las asignaciones posteriores
+if config.MEMORIA_TRACEMALLOC > 0:
+    tracemalloc.start(config.MEMORIA_TRACEMALLOC)
+
+# Configurar logging (cola + hilo escritor, JSON)
+manejador_logs, listener_logs = configurar_logging(config)
+logger = logging.getLogger(__name__)
+
 # Configurar CORS
 CORS(app, resources={
     r"/api/*": {
         "origins": config.CORS_ORIGINS,
         "methods": ["GET", "POST", "OPTIONS"],
-        "allow_headers": ["Content-Type"]
+        "allow_headers": ["Content-Type", "Idempotency-Key"]
     }
 })
 
@@ -44,14 +64,114 @@ try:
     models.db = db
     
 except Exception as e:
-    logger.error(f"❌ Error al conectar base de datos: {e}")
+    logger.error("❌ Error al conectar base de datos: %s", e)
     raise
 
 # Inicializar juego
 game = BuckshotGame(config)
+if not config.SEMILLA_SERVIDOR:
+    logger.warning("⚠️ SERVER_SEED no definida, usando semilla de servidor efímera")
+
+# Resultados de partidas: diario local y reproducción en la BD en segundo plano
+diario = None
+if config.DIARIO_DIR:
+    diario = DiarioResultados(config.DIARIO_DIR, config.DIARIO_LOTE, config.DIARIO_MAX_BYTES,
+                              config.DIARIO_ESPERA_MS)
+    diario.arrancar()
+    metricas.gauge('buckshot_diario_pendientes', lambda: diario.pendientes,
+                   'Resultados confirmados en el diario y aún no en la BD')
+    metricas.gauge('buckshot_diario_bytes_pendientes', diario.bytes_pendientes,
+                   'Bytes del diario propio aún no reproducidos')
+
+# Partidas en curso: en memoria y, si se configura, hibernadas en disco
+sesiones = AlmacenSesiones(config.HIBERNACION_RUTA, config.HIBERNACION_INACTIVIDAD,
+                           config.HIBERNACION_LOTE)
+sesiones.arrancar(config.HIBERNACION_INTERVALO)
+
+# Reinicio en caliente: adoptar las partidas de procesos que ya salieron
+# (antes de arrancar el segador, que programa también las adoptadas)
+# (con el recargador de Flask el proceso padre también carga app.py: solo el hijo)
+instantaneas = None
+recargador_padre = (config.DEBUG and __name__ == '__main__'
+                    and os.environ.get('WERKZEUG_RUN_MAIN') != 'true')
+if config.INSTANTANEA_DIR and not recargador_padre:
+    instantaneas = Instantaneas(sesiones, config.INSTANTANEA_DIR)
+    instantaneas.adoptar()
+    instantaneas.arrancar(config.INSTANTANEA_INTERVALO)
+    # worker_exit de gunicorn.conf.py la llama antes; atexit cubre `python app.py`
+    atexit.register(instantaneas.cerrar)
+
+# Partidas abandonadas: fuera de memoria/disco y marcadas en sesiones_juego
+segador = None
+if config.SEGADOR_INACTIVIDAD > 0:
+    segador = Segador(sesiones, config.SEGADOR_INACTIVIDAD, config.SEGADOR_GUARDAR_PUNTOS,
+                      config.SEGADOR_RESOLUCION, config.SEGADOR_LOTE)
+    segador.arrancar()
+
+# Últimas respuestas de partidas terminadas: (session_id, clave) -> respuesta
+respuestas_finalizadas = OrderedDict()
+
+# Métricas (/metrics)
+metricas.gauge('buckshot_sesiones_activas', lambda: len(sesiones), 'Partidas en memoria en este worker')
+metricas.gauge('buckshot_sesiones_frias', lambda: sesiones.frias,
+               'Partidas hibernadas en disco (fichero compartido por los workers)')
+metricas.describir('buckshot_sesiones_hibernadas_total', 'counter', 'Partidas pasadas a disco')
+metricas.describir('buckshot_sesiones_rehidratadas_total', 'counter', 'Partidas devueltas a memoria')
+metricas.describir('buckshot_rehidratacion_segundos', 'histogram', 'Lectura de una partida hibernada')
+if segador is not None:
+    metricas.gauge('buckshot_segador_temporizadores', lambda: segador.rueda.pendientes,
+                   'Temporizadores de inactividad en la rueda del segador')
+    metricas.gauge('buckshot_segador_ultimo_lote', lambda: segador.ultimo_lote,
+                   'Partidas abandonadas en el último tick del segador')
+    metricas.gauge('buckshot_segador_pendientes_bd', lambda: len(segador.pendientes_bd),
+                   'Partidas abandonadas que aún no se han podido marcar en la BD')
 
-# Almacenamiento temporal de sesiones (en producción usar Redis)
-sesiones = {}
+# Memoria del almacén de sesiones (estimación periódica) y del proceso
+contable_memoria = ContableMemoria(sesiones, config.MEMORIA_MUESTRA)
+contable_memoria.arrancar(config.MEMORIA_INTERVALO)
+metricas.gauge('buckshot_sesiones_bytes', lambda: contable_memoria.ultima['bytes_almacen'],
+               'Bytes estimados de todas las partidas en memoria')
+metricas.gauge('buckshot_bytes_por_sesion', lambda: contable_memoria.ultima['bytes_por_sesion'],
+               'Bytes estimados por partida en memoria')
+metricas.gauge('buckshot_proceso_rss_bytes', rss_actual, 'Memoria residente del worker')
+if config.METRICAS_DIR:
+    metricas.usar_directorio(config.METRICAS_DIR, config.METRICAS_INTERVALO)
+
+
+metricas.describir('buckshot_peticiones_sobre_presupuesto_total', 'counter',
+                   'Peticiones que superaron PRESUPUESTO_CONSULTAS')
+
+
+@app.before_request
+def iniciar_cronometro():
+    g.inicio_peticion = time.perf_counter()
+    g.token_consultas = iniciar_peticion()
+
+
+@app.after_request
+def registrar_metricas(respuesta):
+    """Cuenta y latencia por ruta (la plantilla de la ruta, no la URL)"""
+    inicio = g.pop('inicio_peticion', None)
+    if inicio is not None:
+        ruta = request.url_rule.rule if request.url_rule else 'sin_ruta'
+        metricas.observar('buckshot_peticion_segundos', time.perf_counter() - inicio, (('ruta', ruta),))
+        metricas.contar('buckshot_peticiones_total', (('ruta', ruta), ('metodo', request.method),
+                                                      ('estado', str(respuesta.status_code))))
+        
+        num_consultas, segundos_db = consultas_peticion()
+        if num_consultas > config.PRESUPUESTO_CONSULTAS:
+            metricas.contar('buckshot_peticiones_sobre_presupuesto_total', (('ruta', ruta),))
+            logger.warning("⚠️ %s %s hizo %d consultas (%.1f ms en BD), presupuesto %d",
+                           request.method, ruta, num_consultas, segundos_db * 1000,
+                           config.PRESUPUESTO_CONSULTAS)
+    return respuesta
+
+
+@app.teardown_request
+def cerrar_peticion(exception=None):
+    token = g.pop('token_consultas', None)
+    if token is not None:
+        terminar_peticion(token)
 
 
 # ============== ENDPOINTS API ==============
@@ -66,24 +186,245 @@ def health_check():
     }), 200
 
 
+# ============== LÓGICA DE TURNOS ==============
+
+# Límite de seguridad de disparos del bot resueltos en una sola petición
+MAX_EVENTOS_AUTO_BOT = 100
+
+
+def _recargar(sesion):
+    """Recargar escopeta vacía. Returns: respuesta de nueva ronda"""
+    escopeta, num_reales, num_fogueo = game.cargar_escopeta(sesion.rng)
+    sesion.escopeta = bytearray(escopeta)
+    
+    return {
+        'recarga': True,
+        'mensaje': f'NUEVA RONDA: {num_reales} reales, {num_fogueo} fogueo',
+        'balas_restantes': len(escopeta),
+        'vidas_jugador': sesion.vidas_jugador,
+        'vidas_bot': sesion.vidas_bot,
+        'puntos': sesion.puntos,
+        'turno_jugador': sesion.turno_jugador
+    }
+
+
+def _finalizar_partida(session_id, sesion):
+    """
+    Guardar resultado (en el diario si lo hay) y liberar la sesión
+    Si la escritura falla la excepción sube y la partida, ya terminada, se
+    queda en memoria: el siguiente disparo o turno_bot vuelve a guardarla
+    (_reintentar_fin). Repetir no duplica: guardar usa ON CONFLICT
+    """
+    with metricas.medir('buckshot_fin_partida_segundos'):
+        if diario is not None:
+            diario.anotar(session_id, sesion.nombre, sesion.puntos, sesion.balas_disparadas)
+        else:
+            Puntuacion.guardar(sesion.nombre, sesion.puntos, session_id)
+            SesionJuego.finalizar(session_id, sesion.puntos, sesion.balas_disparadas)
+    del sesiones[session_id]
+
+
+def _partida_terminada(sesion):
+    return sesion.vidas_jugador <= 0 or sesion.vidas_bot <= 0
+
+
+def _reintentar_fin(session_id, sesion):
+    """
+    Partida terminada cuyo resultado no se pudo guardar: guardarlo ahora
+    Returns: respuesta de fin de partida (sin disparar)
+    """
+    _finalizar_partida(session_id, sesion)
+    logger.info("💾 Resultado guardado al reintentar: session %.8s...", session_id)
+    return {
+        'success': True,
+        'mensaje': "¡VICTORIA! Derrotaste al bot" if sesion.vidas_bot <= 0 else "Partida terminada",
+        'vidas_jugador': sesion.vidas_jugador,
+        'vidas_bot': sesion.vidas_bot,
+        'puntos': sesion.puntos,
+        'balas_restantes': len(sesion.escopeta),
+        'turno_jugador': sesion.turno_jugador,
+        'game_over': True
+    }
+
+
+def _ejecutar_turno_bot(session_id, sesion):
+    """
+    Un disparo del bot (o recarga si la escopeta está vacía)
+    Returns: dict de respuesta
+    """
+    if not sesion.escopeta:
+        return _recargar(sesion)
+    
+    # Bot decide (con lo que sabe antes de disparar)
+    reales = sum(sesion.escopeta)
+    estado = (sesion.vidas_bot, sesion.vidas_jugador,
+              reales, len(sesion.escopeta) - reales)
+    objetivo = game.decidir_objetivo_bot(sesion.rng, estado)
+    
+    # Extraer bala
+    bala = sesion.escopeta.pop(0)
+    sesion.balas_disparadas += 1
+    
+    # Procesar disparo del bot
+    if objetivo == 'jugador':
+        if bala == 1:
+            sesion.vidas_jugador -= 1
+            mensaje = "El bot te disparó con bala REAL"
+        else:
+            mensaje = "El bot te disparó - Fogueo"
+        cambiar_turno = True
+    else:
+        if bala == 1:
+            sesion.vidas_bot -= 1
+            mensaje = "El bot se disparó con bala REAL"
+        else:
+            mensaje = "El bot se disparó - Fogueo, sigue jugando"
+        cambiar_turno = False
+    
+    if cambiar_turno:
+        sesion.turno_jugador = True
+    
+    # Verificar game over
+    game_over = _partida_terminada(sesion)
+    
+    if game_over:
+        _finalizar_partida(session_id, sesion)
+        
+        if sesion.vidas_bot <= 0:
+            mensaje = "¡VICTORIA! Derrotaste al bot"
+    
+    return {
+        'success': True,
+        'mensaje': mensaje,
+        'vidas_jugador': sesion.vidas_jugador,
+        'vidas_bot': sesion.vidas_bot,
+        'puntos': sesion.puntos,
+        'balas_restantes': len(sesion.escopeta),
+        'cambiar_turno': cambiar_turno,
+        'turno_jugador': sesion.turno_jugador,
+        'game_over': game_over
+    }
+
+
+def _resolver_turnos_bot(session_id, sesion, respuesta_jugador):
+    """
+    Modo auto_bot: encadenar todos los disparos del bot tras el del jugador
+    Returns: respuesta con el estado final y la lista ordenada de 'eventos'
+    """
+    eventos = [dict(respuesta_jugador, actor='jugador')]
+    
+    while not sesion.turno_jugador and len(eventos) <= MAX_EVENTOS_AUTO_BOT:
+        evento = _ejecutar_turno_bot(session_id, sesion)
+        eventos.append(dict(evento, actor='bot'))
+        if evento.get('game_over'):
+            break
+    
+    respuesta = dict(eventos[-1])
+    respuesta.pop('actor')
+    respuesta['eventos'] = eventos
+    return respuesta
+
+
+# ============== IDEMPOTENCIA ==============
+
+def _recordar(cache, clave, respuesta, maximo):
+    """Guardar en un OrderedDict acotado (descarta las más antiguas)"""
+    cache[clave] = respuesta
+    cache.move_to_end(clave)
+    while len(cache) > maximo:
+        cache.popitem(last=False)
+
+
+# Locks por sesión (repartidos en franjas fijas: sin crecer con las partidas)
+LOCKS_SESION = [threading.Lock() for _ in range(256)]
+
+
+def _lock_sesion(session_id):
+    return LOCKS_SESION[hash(session_id) % len(LOCKS_SESION)]
+
+
+def idempotente(vista):
+    """
+    Acciones con cabecera Idempotency-Key: si la clave ya se procesó para
+    esa sesión se devuelve la respuesta guardada en lugar de volver a
+    ejecutar (reintentos tras timeout no disparan balas de más)
+    Las acciones de una misma sesión van de una en una (lock de la sesión
+    desde la búsqueda en la caché hasta guardar la respuesta): un reintento
+    que llega con la primera petición aún en curso espera su respuesta.
+    """
+    @wraps(vista)
+    def envoltura(*args, **kwargs):
+        data = request.get_json(silent=True) or {}
+        session_id = data.get('session_id')
+        if not isinstance(session_id, str):
+            return vista(*args, **kwargs)
+        with _lock_sesion(session_id):
+            return _ejecutar_idempotente(vista, session_id, args, kwargs)
+
+    return envoltura
+
+
+def _ejecutar_idempotente(vista, session_id, args, kwargs):
+    """Cuerpo de idempotente, con el lock de la sesión"""
+    clave = request.headers.get('Idempotency-Key')
+    if not clave:
+        return vista(*args, **kwargs)
+
+    sesion = sesiones.get(session_id)
+
+    if sesion is not None:
+        guardada = (sesion.respuestas or {}).get(clave)
+    else:
+        guardada = respuestas_finalizadas.get((session_id, clave))
+
+    if guardada is not None:
+        respuesta = jsonify(guardada)
+        respuesta.headers['Idempotent-Replayed'] = 'true'
+        return respuesta, 200
+
+    respuesta, status = vista(*args, **kwargs)
+    if status != 200 or sesion is None:
+        return respuesta, status
+
+    contenido = respuesta.get_json()
+    if session_id in sesiones:
+        if sesion.respuestas is None:
+            sesion.respuestas = OrderedDict()
+        cache = sesion.respuestas
+        _recordar(cache, clave, contenido, config.IDEMPOTENCIA_MAX_POR_SESION)
+    else:
+        # La partida terminó con esta acción: recordar fuera de la sesión
+        _recordar(respuestas_finalizadas, (session_id, clave), contenido,
+                  config.IDEMPOTENCIA_MAX_FINALIZADAS)
+    return respuesta, status
+
+
+# ============== ENDPOINTS DE JUEGO ==============
+
+# Longitud máxima del nombre del jugador (columnas VARCHAR(100))
+MAX_NOMBRE = 100
+
 @app.route('/api/iniciar_juego', methods=['POST'])
 def iniciar_juego():
+    """
+    POST /api/iniciar_juego
+    Body: {"nombre": "Jugador", "auto_bot": true}
+    auto_bot: el servidor resuelve los turnos del bot dentro de /api/disparar
+    """
     try:
         data = request.get_json()
-        nombre = data.get('nombre', 'Jugador')
+        nombre = data.get('nombre')
+        # Mismo límite que la BD (VARCHAR(100)), antes de guardar la partida en memoria
+        nombre = nombre.strip()[:MAX_NOMBRE] if isinstance(nombre, str) else ''
+        nombre = nombre or 'Jugador'
+        auto_bot = bool(data.get('auto_bot', False))
         session_id = game.generar_session_id()
-        escopeta, num_reales, num_fogueo = game.cargar_escopeta()
-        sesiones[session_id] = {
-            'nombre': nombre,
-            'vidas_jugador': config.MAX_VIDAS,
-            'vidas_bot': config.MAX_VIDAS,
-            'puntos': 0,
-            'escopeta': escopeta,
-            'turno_jugador': True,
-            'balas_disparadas': 0
-        }
-        SesionJuego.crear(session_id, nombre)
-        logger.info(f"🎮 Juego iniciado: {nombre} (session: {session_id[:8]}...)")
+        semilla = game.semilla_sesion(session_id)
+        rng = game.crear_flujo(semilla)
+        escopeta, num_reales, num_fogueo = game.cargar_escopeta(rng)
+        sesiones[session_id] = EstadoSesion(nombre, config.MAX_VIDAS, escopeta, semilla, rng, auto_bot)
+        SesionJuego.crear(session_id, nombre, semilla)
+        logger.info("🎮 Juego iniciado: %s (session: %.8s...)", nombre, session_id)
         return jsonify({
             'error': False,  # <<--- AÑADE ESTO
             'success': True,
@@ -93,23 +434,23 @@ def iniciar_juego():
             'vidas_bot': config.MAX_VIDAS,
             'puntos': 0,
             'balas_restantes': len(escopeta),
-            'turno_jugador': True
+            'turno_jugador': True,
+            'auto_bot': auto_bot
         }), 200
     except Exception as e:
-        logger.error(f"❌ Error en iniciar_juego: {e}")
+        logger.error("❌ Error en iniciar_juego: %s", e)
         return jsonify({'error': True, 'mensaje': str(e)}), 500
 
 
 @app.route('/api/disparar', methods=['POST'])
+@idempotente
 def disparar():
     try:
         data = request.get_json()
         session_id = data.get('session_id')
         objetivo = data.get('objetivo')
         
-        print("Datos de session_id", session_id)
-        print("Datos de objetivo", objetivo)
-        print("Datos de sesiones", sesiones.keys())  # solo claves para no saturar logs
+        logger.debug("🎯 Disparo: session %s, objetivo %s", session_id, objetivo)
         
         # Validar sesión
         if session_id not in sesiones:
@@ -117,78 +458,74 @@ def disparar():
         
         sesion = sesiones[session_id]
         
+        if _partida_terminada(sesion):
+            return jsonify(_reintentar_fin(session_id, sesion)), 200
+        
         # Verificar turno
-        if not sesion['turno_jugador']:
+        if not sesion.turno_jugador:
             # En lugar de error 400, devolver estado para sincronizar cliente
             return jsonify({
                 'error': True,
                 'mensaje': 'No es tu turno',
-                'turno_jugador': sesion['turno_jugador'],
-                'vidas_jugador': sesion['vidas_jugador'],
-                'vidas_bot': sesion['vidas_bot'],
-                'puntos': sesion['puntos'],
-                'balas_restantes': len(sesion.get('escopeta', [])),
+                'turno_jugador': sesion.turno_jugador,
+                'vidas_jugador': sesion.vidas_jugador,
+                'vidas_bot': sesion.vidas_bot,
+                'puntos': sesion.puntos,
+                'balas_restantes': len(sesion.escopeta),
                 'game_over': False
             }), 200
         
         # Verificar si hay balas
-        if not sesion['escopeta']:
-            escopeta, num_reales, num_fogueo = game.cargar_escopeta()
-            sesion['escopeta'] = escopeta
-            
-            return jsonify({
-                'recarga': True,
-                'mensaje': f'NUEVA RONDA: {num_reales} reales, {num_fogueo} fogueo',
-                'balas_restantes': len(escopeta),
-                'vidas_jugador': sesion['vidas_jugador'],
-                'vidas_bot': sesion['vidas_bot'],
-                'puntos': sesion['puntos'],
-                'turno_jugador': sesion['turno_jugador']
-            }), 200
+        if not sesion.escopeta:
+            return jsonify(_recargar(sesion)), 200
         
-        bala = sesion['escopeta'].pop(0)
-        sesion['balas_disparadas'] += 1
+        bala = sesion.escopeta.pop(0)
+        sesion.balas_disparadas += 1
         
         resultado = game.procesar_disparo(bala, objetivo, True)
         
         if objetivo == 'bot' and resultado['dano'] > 0:
-            sesion['vidas_bot'] -= resultado['dano']
+            sesion.vidas_bot -= resultado['dano']
         elif objetivo == 'jugador' and resultado['dano'] > 0:
-            sesion['vidas_jugador'] -= resultado['dano']
+            sesion.vidas_jugador -= resultado['dano']
         
-        sesion['puntos'] += resultado['puntos_ganados']
+        sesion.puntos += resultado['puntos_ganados']
         
         if resultado['cambiar_turno']:
-            sesion['turno_jugador'] = False
+            sesion.turno_jugador = False
         
-        game_over = sesion['vidas_jugador'] <= 0 or sesion['vidas_bot'] <= 0
+        game_over = _partida_terminada(sesion)
         
         if game_over:
-            Puntuacion.guardar(sesion['nombre'], sesion['puntos'], session_id)
-            SesionJuego.finalizar(session_id, sesion['puntos'], sesion['balas_disparadas'])
-            del sesiones[session_id]
+            _finalizar_partida(session_id, sesion)
             
-            if sesion['vidas_bot'] <= 0:
+            if sesion.vidas_bot <= 0:
                 resultado['mensaje'] = "¡VICTORIA! Derrotaste al bot"
         
-        return jsonify({
+        respuesta = {
             'success': True,
             'mensaje': resultado['mensaje'],
-            'vidas_jugador': sesion.get('vidas_jugador', 0),
-            'vidas_bot': sesion.get('vidas_bot', 0),
-            'puntos': sesion.get('puntos', 0),
-            'balas_restantes': len(sesion.get('escopeta', [])),
+            'vidas_jugador': sesion.vidas_jugador,
+            'vidas_bot': sesion.vidas_bot,
+            'puntos': sesion.puntos,
+            'balas_restantes': len(sesion.escopeta),
             'cambiar_turno': resultado['cambiar_turno'],
-            'turno_jugador': sesion.get('turno_jugador', True),
+            'turno_jugador': sesion.turno_jugador,
             'game_over': game_over
-        }), 200
+        }
+        
+        if sesion.auto_bot and not game_over and not sesion.turno_jugador:
+            respuesta = _resolver_turnos_bot(session_id, sesion, respuesta)
+        
+        return jsonify(respuesta), 200
     
     except Exception as e:
-        logger.error(f"❌ Error en disparar: {e}")
+        logger.error("❌ Error en disparar: %s", e)
         return jsonify({'error': True, 'mensaje': str(e)}), 500
 
 
 @app.route('/api/turno_bot', methods=['POST'])
+@idempotente
 def turno_bot():
     """
     POST /api/turno_bot
@@ -203,73 +540,13 @@ def turno_bot():
             return jsonify({'error': True, 'mensaje': 'Sesión inválida'}), 400
         
         sesion = sesiones[session_id]
+        if _partida_terminada(sesion):
+            return jsonify(_reintentar_fin(session_id, sesion)), 200
         
-        # Verificar si hay balas
-        if not sesion['escopeta']:
-            escopeta, num_reales, num_fogueo = game.cargar_escopeta()
-            sesion['escopeta'] = escopeta
-            
-            return jsonify({
-                'recarga': True,
-                'mensaje': f'NUEVA RONDA: {num_reales} reales, {num_fogueo} fogueo',
-                'balas_restantes': len(escopeta),
-                'vidas_jugador': sesion['vidas_jugador'],
-                'vidas_bot': sesion['vidas_bot'],
-                'puntos': sesion['puntos'],
-                'turno_jugador': sesion['turno_jugador']
-            }), 200
-        
-        # Extraer bala
-        bala = sesion['escopeta'].pop(0)
-        sesion['balas_disparadas'] += 1
-        
-        # Bot decide
-        objetivo = 'jugador' if random.random() < 0.7 else 'bot'
-        
-        # Procesar disparo del bot
-        if objetivo == 'jugador':
-            if bala == 1:
-                sesion['vidas_jugador'] -= 1
-                mensaje = "El bot te disparó con bala REAL"
-            else:
-                mensaje = "El bot te disparó - Fogueo"
-            cambiar_turno = True
-        else:
-            if bala == 1:
-                sesion['vidas_bot'] -= 1
-                mensaje = "El bot se disparó con bala REAL"
-            else:
-                mensaje = "El bot se disparó - Fogueo, sigue jugando"
-            cambiar_turno = False
-        
-        if cambiar_turno:
-            sesion['turno_jugador'] = True
-        
-        # Verificar game over
-        game_over = sesion['vidas_jugador'] <= 0 or sesion['vidas_bot'] <= 0
-        
-        if game_over:
-            Puntuacion.guardar(sesion['nombre'], sesion['puntos'], session_id)
-            SesionJuego.finalizar(session_id, sesion['puntos'], sesion['balas_disparadas'])
-            del sesiones[session_id]
-            
-            if sesion['vidas_bot'] <= 0:
-                mensaje = "¡VICTORIA! Derrotaste al bot"
-        
-        return jsonify({
-            'success': True,
-            'mensaje': mensaje,
-            'vidas_jugador': sesion.get('vidas_jugador', 0),
-            'vidas_bot': sesion.get('vidas_bot', 0),
-            'puntos': sesion.get('puntos', 0),
-            'balas_restantes': len(sesion.get('escopeta', [])),
-            'cambiar_turno': cambiar_turno,
-            'turno_jugador': sesion.get('turno_jugador', True),
-            'game_over': game_over
-        }), 200
+        return jsonify(_ejecutar_turno_bot(session_id, sesion)), 200
     
     except Exception as e:
-        logger.error(f"❌ Error en turno_bot: {e}")
+        logger.error("❌ Error en turno_bot: %s", e)
         return jsonify({'error': True, 'mensaje': str(e)}), 500
 
 
@@ -291,7 +568,90 @@ def obtener_ranking():
         }), 200
     
     except Exception as e:
-        logger.error(f"❌ Error en obtener_ranking: {e}")
+        logger.error("❌ Error en obtener_ranking: %s", e)
+        return jsonify({'error': True, 'mensaje': str(e)}), 500
+
+
+def _partidas_locales_desactivadas():
+    return jsonify({
+        'error': True,
+        'mensaje': 'Este servidor no acepta partidas locales (sin CLAVE_FIRMA_PARTIDAS)'
+    }), 403
+
+
+# Límite por IP de los endpoints sin autenticar de las partidas locales
+limite_instalaciones = LimitadorPeticiones(config.LIMITE_INSTALACIONES_POR_MINUTO)
+limite_lotes = LimitadorPeticiones(config.LIMITE_LOTES_POR_MINUTO)
+
+
+@app.route('/api/instalaciones', methods=['POST'])
+@limitado(limite_instalaciones, 'instalaciones')
+def registrar_instalacion():
+    """
+    POST /api/instalaciones
+    Identificador y clave con la que una instalación del cliente firma sus
+    partidas locales (derivada de CLAVE_FIRMA_PARTIDAS: no se guarda)
+    """
+    if not config.CLAVE_FIRMA_PARTIDAS:
+        return _partidas_locales_desactivadas()
+    instalacion = secrets.token_hex(16)
+    logger.info("🔑 Instalación registrada: %.8s...", instalacion)
+    return jsonify({
+        'success': True,
+        'instalacion': instalacion,
+        'clave': clave_instalacion(config.CLAVE_FIRMA_PARTIDAS, instalacion)
+    }), 200
+
+
+@app.route('/api/puntuaciones/lote', methods=['POST'])
+@limitado(limite_lotes, 'puntuaciones_lote')
+def guardar_puntuaciones_lote():
+    """
+    POST /api/puntuaciones/lote
+    Body: {"puntuaciones": [{"session_id", "nombre", "puntos", "fecha",
+                             "semilla", "jugadas", "instalacion", "firma"}, ...]}
+    Partidas jugadas sin conexión: cada una tiene que venir firmada con la
+    clave de su instalación y se rejuega para comprobar los puntos. Se
+    guardan como no verificadas (fuera del ranking). Devuelve el estado de
+    cada una (guardada, duplicada o invalida) para que el cliente recorte
+    su diario.
+    """
+    if not config.CLAVE_FIRMA_PARTIDAS:
+        return _partidas_locales_desactivadas()
+    try:
+        data = request.get_json(silent=True) or {}
+        entradas = data.get('puntuaciones')
+        if not isinstance(entradas, list) or not entradas:
+            return jsonify({'error': True, 'mensaje': 'Lista de puntuaciones vacía'}), 400
+        if len(entradas) > config.LOTE_MAX_PUNTUACIONES:
+            return jsonify({
+                'error': True,
+                'mensaje': f'Máximo {config.LOTE_MAX_PUNTUACIONES} puntuaciones por lote'
+            }), 413
+        # Acotar el trabajo de rejugar el lote antes de empezar
+        jugadas = sum(len(e['jugadas']) for e in entradas
+                      if isinstance(e, dict) and isinstance(e.get('jugadas'), list))
+        if jugadas > config.LOTE_MAX_JUGADAS:
+            return jsonify({
+                'error': True,
+                'mensaje': f'Máximo {config.LOTE_MAX_JUGADAS} jugadas por lote'
+            }), 413
+        
+        resultados = Puntuacion.guardar_lote(entradas, partial(
+            Puntuacion.verificar_partida_local, clave_maestra=config.CLAVE_FIRMA_PARTIDAS, config=config),
+            verificadas=False)
+        resumen = {}
+        for resultado in resultados:
+            resumen[resultado['estado']] = resumen.get(resultado['estado'], 0) + 1
+        
+        return jsonify({
+            'success': True,
+            'resultados': resultados,
+            'resumen': resumen
+        }), 200
+    
+    except Exception as e:
+        logger.error("❌ Error en guardar_puntuaciones_lote: %s", e)
         return jsonify({'error': True, 'mensaje': str(e)}), 500
 
 
@@ -306,9 +666,120 @@ def obtener_estadisticas():
         }), 200
     
     except Exception as e:
-        logger.error(f"❌ Error en obtener_estadisticas: {e}")
+        logger.error("❌ Error en obtener_estadisticas: %s", e)
         return jsonify({'error': True, 'mensaje': str(e)}), 500
 
+@app.route('/metrics', methods=['GET'])
+def exponer_metricas():
+    """GET /metrics (formato de texto de Prometheus)"""
+    return Response(metricas.exponer(), mimetype='text/plain; version=0.0.4')
+
+# ============== ADMINISTRACIÓN ==============
+
+def solo_admin(vista):
+    """
+    Endpoints de administración: cabecera X-Admin-Token igual a ADMIN_TOKEN
+    (sin ADMIN_TOKEN configurado no existen: 404)
+    """
+    @wraps(vista)
+    def envoltura(*args, **kwargs):
+        if not config.ADMIN_TOKEN:
+            return jsonify({'error': True, 'mensaje': 'Endpoint no encontrado'}), 404
+        token = request.headers.get('X-Admin-Token', '')
+        if not hmac.compare_digest(token.encode(), config.ADMIN_TOKEN.encode()):
+            return jsonify({'error': True, 'mensaje': 'No autorizado'}), 403
+        return vista(*args, **kwargs)
+    
+    return envoltura
+
+
+@app.route('/api/admin/consultas', methods=['GET'])
+@solo_admin
+def resumen_consultas():
+    """
+    GET /api/admin/consultas?limite=20
+    Consultas con más tiempo acumulado y últimas consultas lentas con su plan
+    """
+    limite = request.args.get('limite', 20, type=int)
+    resumen = db.consultas.resumen(limite)
+    resumen['presupuesto_por_peticion'] = config.PRESUPUESTO_CONSULTAS
+    return jsonify({'success': True, **resumen}), 200
+
+
+@app.route('/api/admin/memoria', methods=['GET'])
+@solo_admin
+def informe_memoria():
+    """
+    GET /api/admin/memoria?limite=20&agrupar=lineno|filename|traceback
+    RSS, estimación del almacén de sesiones y, con MEMORIA_TRACEMALLOC,
+    sitios con más memoria y diferencia desde la llamada anterior
+    """
+    limite = request.args.get('limite', 20, type=int)
+    agrupar = request.args.get('agrupar', 'lineno')
+    if agrupar not in ('lineno', 'filename', 'traceback'):
+        return jsonify({'error': True, 'mensaje': 'agrupar debe ser lineno, filename o traceback'}), 400
+    return jsonify({'success': True, 'almacen': sesiones.estadisticas(),
+                    **contable_memoria.informe(limite, agrupar)}), 200
+
+
+muestreos = Muestreos()
+
+
+def _resumen_perfil(perfil):
+    return {k: v for k, v in perfil.items() if k != 'pilas'}
+
+
+def iniciar_perfil():
+    """
+    POST /api/admin/perfil?segundos=10&hz=100
+    Muestrear en segundo plano las pilas de los hilos de ESTE worker (pid
+    en la respuesta) durante 'segundos'; el resultado, en GET /api/admin/perfil/<id>
+    """
+    segundos = min(max(request.args.get('segundos', 10, type=float), 0.1), config.PERFIL_MAX_SEGUNDOS)
+    hz = min(max(request.args.get('hz', 100, type=int), 1), 1000)
+    perfil = muestreos.iniciar(segundos, hz)
+    if perfil is None:
+        return jsonify({'error': True, 'mensaje': f'Ya hay un muestreo en curso en el worker {os.getpid()}'}), 409
+    logger.info("🔬 Perfil %s: %.0fs a %d Hz", perfil['id'], segundos, hz)
+    return jsonify({'success': True, **_resumen_perfil(perfil),
+                    'resultado': f"/api/admin/perfil/{perfil['id']}"}), 202
+
+
+def obtener_perfil(id_perfil):
+    """
+    GET /api/admin/perfil/<id>?formato=collapsed|speedscope
+    202 mientras se muestrea; solo lo tiene el worker que lo hizo
+    """
+    perfil = muestreos.obtener(id_perfil)
+    if perfil is None:
+        return jsonify({'error': True, 'mensaje': f'Perfil {id_perfil} no encontrado en el worker '
+                                                  f'{os.getpid()} (cada worker guarda los suyos)'}), 404
+    if perfil['estado'] == 'en_curso':
+        return jsonify({'success': True, **_resumen_perfil(perfil)}), 202
+    if perfil['estado'] == 'error':
+        return jsonify({'error': True, 'mensaje': 'El muestreo falló', **_resumen_perfil(perfil)}), 500
+    
+    nombre = f"perfil-{perfil['id']}"
+    if request.args.get('formato') == 'speedscope':
+        respuesta = jsonify(a_speedscope(perfil['pilas'], perfil['hz'], f"worker {perfil['pid']}"))
+        respuesta.headers['Content-Disposition'] = f'attachment; filename="{nombre}.speedscope.json"'
+    else:
+        respuesta = Response(a_collapsed(perfil['pilas']), mimetype='text/plain')
+    respuesta.headers['X-Perfil-Pid'] = str(perfil['pid'])
+    return respuesta, 200
+
+
+# Sin PERFILADO no se registra nada (ni ruta ni middleware)
+if config.PERFILADO:
+    if config.ADMIN_TOKEN:
+        app.add_url_rule('/api/admin/perfil', view_func=solo_admin(iniciar_perfil), methods=['POST'])
+        app.add_url_rule('/api/admin/perfil/<id_perfil>', view_func=solo_admin(obtener_perfil),
+                         methods=['GET'])
+        app.wsgi_app = PerfilPorPeticion(app.wsgi_app, config.ADMIN_TOKEN, config.PERFIL_DIR)
+        logger.info("🔬 Perfilado activo (perfiles por petición en %s)", config.PERFIL_DIR)
+    else:
+        logger.warning("⚠️ PERFILADO requiere ADMIN_TOKEN, perfilado desactivado")
+
 # ============== PÁGINA WEB RANKING ==============
 
 @app.route('/')
@@ -336,7 +807,7 @@ def shutdown_session(exception=None):
 
 
 if __name__ == '__main__':
-    import random  # Necesario para turno_bot
-    
+    # SIGTERM -> salida normal, para que atexit guarde la instantánea
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
     port = int(os.getenv('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=config.DEBUG)
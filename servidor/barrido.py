@@ -0,0 +1,299 @@
+"""
+Barrido de parámetros de balance - simula cada combinación en paralelo
+Uso:
+    python barrido.py --max-vidas 2:5 --puntos-bala-real 5,10,15 \\
+        --partidas 200000 --salida barrido.csv
+    python barrido.py ... --salida barrido.csv --reanudar   # continuar tras interrupción
+
+Rangos: "3" (valor fijo), "1:4" (inclusivo), "5:20:5" (con paso) o "5,10,15"
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+from config import Config
+from models import derivar_semilla
+from simulacion import comprobar_estrategias, configurar, jugar_lote
+from torneo import intervalo_wilson, media_e_intervalo
+
+# Parámetros barribles: opción CLI -> atributo de Config
+PARAMETROS = {
+    'max_vidas': 'MAX_VIDAS',
+    'puntos_bala_real': 'PUNTOS_BALA_REAL',
+    'puntos_fogueo_self': 'PUNTOS_FOGUEO_SELF',
+    'min_balas_reales': 'MIN_BALAS_REALES',
+    'max_balas_reales': 'MAX_BALAS_REALES',
+    'min_balas_fogueo': 'MIN_BALAS_FOGUEO',
+    'max_balas_fogueo': 'MAX_BALAS_FOGUEO',
+}
+
+COLUMNAS = list(PARAMETROS.values()) + [
+    'partidas', 'victorias_bot', 'victorias_bot_ic95_bajo', 'victorias_bot_ic95_alto',
+    'puntos_promedio', 'puntos_std', 'puntos_p10', 'puntos_p50', 'puntos_p90',
+    'balas_promedio', 'balas_std'
+]
+
+
+def parsear_rango(texto):
+    """Convertir '1:4', '5:20:5', '5,10,15' o '3' en lista de enteros"""
+    if ',' in texto:
+        return [int(v) for v in texto.split(',') if v.strip()]
+    if ':' in texto:
+        partes = [int(v) for v in texto.split(':')]
+        inicio, fin = partes[0], partes[1]
+        paso = partes[2] if len(partes) > 2 else 1
+        return list(range(inicio, fin + 1, paso))
+    return [int(texto)]
+
+
+def generar_puntos(rangos):
+    """Producto cartesiano de rangos, descartando combinaciones inválidas"""
+    nombres = list(rangos)
+    for valores in itertools.product(*(rangos[n] for n in nombres)):
+        punto = dict(zip(nombres, valores))
+        if punto['MIN_BALAS_REALES'] > punto['MAX_BALAS_REALES']:
+            continue
+        if punto['MIN_BALAS_FOGUEO'] > punto['MAX_BALAS_FOGUEO']:
+            continue
+        if punto['MAX_VIDAS'] < 1 or punto['MIN_BALAS_REALES'] < 1:
+            continue
+        yield punto
+
+
+def clave_punto(punto):
+    """Clave estable de un punto del grid (para semillas y checkpoints)"""
+    return tuple(int(punto[atributo]) for atributo in PARAMETROS.values())
+
+
+def _simular_shard(tarea):
+    """Worker del pool: simula un shard de un punto del grid"""
+    clave, punto, estrategia_jugador, estrategia_bot, semilla, partidas = tarea
+    config = configurar(Config, **punto)
+    resultado = jugar_lote(config, estrategia_jugador, estrategia_bot, semilla,
+                           partidas, histograma=True)
+    return clave, resultado
+
+
+def percentil_histograma(histograma, total, fraccion):
+    """Percentil a partir de un histograma {valor: conteo}"""
+    objetivo = fraccion * total
+    acumulado = 0
+    for valor in sorted(histograma):
+        acumulado += histograma[valor]
+        if acumulado >= objetivo:
+            return valor
+    return 0
+
+
+def resumir_punto(punto, acumulado):
+    """Fila de resultados de un punto del grid"""
+    n = acumulado['partidas']
+    victorias_bot = n - acumulado['victorias_jugador']
+    ic_bajo, ic_alto = intervalo_wilson(victorias_bot, n)
+    puntos, puntos_std, _ = media_e_intervalo(
+        acumulado['suma_puntos'], acumulado['suma_puntos2'], n
+    )
+    balas, balas_std, _ = media_e_intervalo(
+        acumulado['suma_balas'], acumulado['suma_balas2'], n
+    )
+    histograma = acumulado['histograma_puntos']
+    fila = dict(punto)
+    fila.update({
+        'partidas': n,
+        'victorias_bot': round(victorias_bot / n, 6),
+        'victorias_bot_ic95_bajo': round(ic_bajo, 6),
+        'victorias_bot_ic95_alto': round(ic_alto, 6),
+        'puntos_promedio': round(puntos, 4),
+        'puntos_std': round(puntos_std, 4),
+        'puntos_p10': percentil_histograma(histograma, n, 0.10),
+        'puntos_p50': percentil_histograma(histograma, n, 0.50),
+        'puntos_p90': percentil_histograma(histograma, n, 0.90),
+        'balas_promedio': round(balas, 4),
+        'balas_std': round(balas_std, 4)
+    })
+    return fila
+
+
+class SalidaIncremental:
+    """
+    Escritura incremental de filas a CSV o JSON Lines
+    El propio archivo de salida es el checkpoint: cada fila se escribe
+    completa y con fsync, y al reanudar se saltan los puntos ya escritos
+    """
+
+    def __init__(self, ruta, reanudar=False):
+        self.ruta = ruta
+        self.formato = 'json' if ruta.endswith(('.json', '.jsonl')) else 'csv'
+        self.completados = set()
+
+        con_cabecera = False
+        if reanudar and os.path.exists(ruta):
+            con_cabecera = self._cargar_checkpoint()
+            modo = 'a'
+        else:
+            modo = 'w'
+
+        self.archivo = open(ruta, modo, newline='')
+        if self.formato == 'csv':
+            self.escritor = csv.DictWriter(self.archivo, fieldnames=COLUMNAS)
+            # También al reanudar un CSV vacío (cortado antes del fsync de la cabecera)
+            if not con_cabecera:
+                self.escritor.writeheader()
+                self._sincronizar()
+
+    def _cargar_checkpoint(self):
+        """
+        Leer puntos ya completados y descartar una última línea a medias
+        Returns: True si el CSV ya tiene cabecera
+        """
+        with open(self.ruta, 'rb') as f:
+            contenido = f.read()
+        fin_valido = contenido.rfind(b'\n') + 1
+        if fin_valido < len(contenido):
+            with open(self.ruta, 'r+b') as f:
+                f.truncate(fin_valido)
+
+        with open(self.ruta, 'r', newline='') as f:
+            if self.formato == 'csv':
+                filas = csv.DictReader(f)
+            else:
+                filas = (json.loads(linea) for linea in f if linea.strip())
+            for fila in filas:
+                self.completados.add(clave_punto(fila))
+            return self.formato == 'csv' and filas.fieldnames is not None
+
+    def _sincronizar(self):
+        self.archivo.flush()
+        os.fsync(self.archivo.fileno())
+
+    def escribir(self, fila):
+        if self.formato == 'csv':
+            self.escritor.writerow(fila)
+        else:
+            self.archivo.write(json.dumps(fila) + '\n')
+        self._sincronizar()
+        self.completados.add(clave_punto(fila))
+
+    def cerrar(self):
+        self.archivo.close()
+
+
+def ejecutar_barrido(rangos, partidas, salida, estrategia_jugador='contador',
+                     estrategia_bot='clasico', semilla=0, procesos=None,
+                     tam_shard=50_000, al_completar=None):
+    """
+    Simular todos los puntos pendientes del grid y escribirlos a la salida
+    conforme se completan. Returns: número de puntos simulados
+    """
+    tareas = []
+    pendientes = {}
+    puntos = {}
+    for punto in generar_puntos(rangos):
+        clave = clave_punto(punto)
+        if clave in salida.completados:
+            continue
+        puntos[clave] = punto
+        restantes = partidas
+        indice = 0
+        while restantes > 0:
+            n = min(tam_shard, restantes)
+            semilla_shard = derivar_semilla(semilla, *clave, indice)
+            tareas.append((clave, punto, estrategia_jugador, estrategia_bot, semilla_shard, n))
+            pendientes[clave] = pendientes.get(clave, 0) + 1
+            restantes -= n
+            indice += 1
+
+    if not tareas:
+        return 0
+
+    acumulados = {}
+    with Pool(processes=procesos or os.cpu_count() or 1) as pool:
+        for clave, parcial in pool.imap_unordered(_simular_shard, tareas):
+            acumulado = acumulados.get(clave)
+            if acumulado is None:
+                acumulados[clave] = parcial
+            else:
+                for campo, valor in parcial.items():
+                    if campo == 'histograma_puntos':
+                        histograma = acumulado[campo]
+                        for puntos_partida, conteo in valor.items():
+                            histograma[puntos_partida] = histograma.get(puntos_partida, 0) + conteo
+                    else:
+                        acumulado[campo] += valor
+
+            pendientes[clave] -= 1
+            if pendientes[clave] == 0:
+                fila = resumir_punto(puntos[clave], acumulados.pop(clave))
+                salida.escribir(fila)
+                if al_completar:
+                    al_completar(fila)
+
+    return len(puntos)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Barrido de parámetros de balance")
+    for opcion, atributo in PARAMETROS.items():
+        parser.add_argument(f"--{opcion.replace('_', '-')}", dest=opcion,
+                            default=str(getattr(Config, atributo)),
+                            help=f"Rango para {atributo} (por defecto {getattr(Config, atributo)})")
+    parser.add_argument('--partidas', type=int, default=100_000,
+                        help="Partidas simuladas por punto del grid")
+    parser.add_argument('--jugador', default='contador', help="Estrategia del jugador")
+    parser.add_argument('--bot', default='clasico', help="Estrategia del bot")
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--procesos', type=int, default=None)
+    parser.add_argument('--tam-shard', type=int, default=50_000)
+    parser.add_argument('--salida', default='barrido.csv',
+                        help="Archivo de salida (.csv o .jsonl)")
+    parser.add_argument('--reanudar', action='store_true',
+                        help="Continuar un barrido interrumpido usando la salida como checkpoint")
+    args = parser.parse_args(argv)
+
+    try:
+        comprobar_estrategias((args.jugador, args.bot), Config)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    rangos = {atributo: parsear_rango(getattr(args, opcion))
+              for opcion, atributo in PARAMETROS.items()}
+    total = sum(1 for _ in generar_puntos(rangos))
+
+    salida = SalidaIncremental(args.salida, reanudar=args.reanudar)
+    ya_hechos = len(salida.completados)
+    print(f"🔧 Barrido: {total} puntos, {args.partidas} partidas/punto "
+          f"({ya_hechos} ya completados)")
+
+    progreso = {'hechos': ya_hechos}
+    inicio = time.perf_counter()
+
+    def al_completar(fila):
+        progreso['hechos'] += 1
+        print(f"   [{progreso['hechos']}/{total}] "
+              + " ".join(f"{a}={fila[a]}" for a in PARAMETROS.values())
+              + f" -> bot {fila['victorias_bot']:.3f}, puntos {fila['puntos_promedio']:.1f}"
+              + f" (p10-p90 {fila['puntos_p10']}-{fila['puntos_p90']}),"
+              + f" balas {fila['balas_promedio']:.1f}")
+
+    try:
+        simulados = ejecutar_barrido(rangos, args.partidas, salida, args.jugador, args.bot,
+                                     args.semilla, args.procesos, args.tam_shard, al_completar)
+    except KeyboardInterrupt:
+        print(f"\n⏸️  Interrumpido - reanuda con --reanudar (salida: {args.salida})")
+        return 130
+    finally:
+        salida.cerrar()
+
+    duracion = time.perf_counter() - inicio
+    print(f"\n✅ {simulados} puntos simulados en {duracion:.1f}s -> {args.salida}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""
+Benchmarks del entrenamiento del bot
+1. Pasos/s del entorno vectorizado según tamaño de lote (acciones aleatorias)
+2. Pasos/s de entrenamiento Q-learning completo
+3. Evaluación de la política entrenada contra cada estrategia de jugador
+Uso:
+    python bench_entrenamiento.py --pasos 1000000
+"""
+import argparse
+import random
+import time
+
+from config import Config
+from entrenamiento_bot import EntornoVectorizado, EntrenadorQ, evaluar_politica
+
+
+def bench_entorno(lotes, pasos):
+    print("\n[1/3] 🏃 Entorno vectorizado (acciones aleatorias)")
+    print(f"{'LOTE':>8}{'PASOS/S':>14}{'PARTIDAS/S':>14}")
+    rng = random.Random(0)
+    for lote in lotes:
+        entorno = EntornoVectorizado(Config, lote, semilla=lote)
+        entorno.reset()
+        iteraciones = max(pasos // lote, 1)
+        inicio = time.perf_counter()
+        for _ in range(iteraciones):
+            entorno.step([rng.randrange(2) for _ in range(lote)])
+        duracion = time.perf_counter() - inicio
+        print(f"{lote:>8}{entorno.pasos / duracion:>14,.0f}"
+              f"{entorno.partidas_terminadas / duracion:>14,.0f}")
+
+
+def bench_entrenamiento(lote, pasos, rival):
+    print(f"\n[2/3] 🧠 Entrenamiento Q-learning (lote {lote}, rival '{rival}')")
+    entorno = EntornoVectorizado(Config, lote, rival, semilla=0)
+    entrenador = EntrenadorQ(entorno, semilla=0)
+    inicio = time.perf_counter()
+    entrenador.entrenar(pasos)
+    duracion = time.perf_counter() - inicio
+    print(f"   {entorno.pasos} pasos en {duracion:.2f}s -> {entorno.pasos / duracion:,.0f} pasos/s")
+    return entrenador.exportar_politica()
+
+
+def bench_evaluacion(politica, rivales, partidas):
+    print(f"\n[3/3] 📊 Victorias del bot ({partidas} partidas por rival)")
+    print(f"{'RIVAL':<16}{'CLASICO':>10}{'POLITICA':>10}{'MEJORA':>10}")
+    for rival in rivales:
+        clasico = evaluar_politica(None, Config, rival, partidas)
+        aprendida = evaluar_politica(politica, Config, rival, partidas)
+        print(f"{rival:<16}{clasico:>10.4f}{aprendida:>10.4f}{aprendida - clasico:>+10.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks del entrenamiento del bot")
+    parser.add_argument('--pasos', type=int, default=1_000_000)
+    parser.add_argument('--lote', type=int, default=4096)
+    parser.add_argument('--rival', default='contador')
+    parser.add_argument('--evaluacion', type=int, default=100_000)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🧪 BENCHMARK ENTRENAMIENTO BOT")
+    print("=" * 60)
+
+    bench_entorno([256, 1024, 4096], args.pasos // 4)
+    politica = bench_entrenamiento(args.lote, args.pasos, args.rival)
+    bench_evaluacion(politica, ['contador', 'aleatorio', 'siempre_rival'], args.evaluacion)
+
+
+if __name__ == '__main__':
+    main()
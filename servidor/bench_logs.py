@@ -0,0 +1,52 @@
+"""
+Benchmark de /api/disparar con muchas partidas vivas en memoria
+Rellena `sesiones` con N partidas y mide disparos/s con el cliente de
+pruebas de Flask (sin red). Cada disparo es fogueo al jugador: la partida
+nunca termina y la petición no toca la base de datos.
+Uso:
+    python bench_logs.py --sesiones 100000 --peticiones 20000
+    LOG_MUESTREO=disparar=0.01 LOG_NIVEL=DEBUG python bench_logs.py
+"""
+import argparse
+import logging
+import time
+
+import app as servidor
+from models import EstadoSesion
+
+
+def rellenar_sesiones(n, balas):
+    """N partidas vivas con la escopeta llena de fogueo"""
+    rng = servidor.game.crear_flujo(0)
+    for i in range(n):
+        servidor.sesiones[f"bench-{i}"] = EstadoSesion(f"Bench{i}", servidor.config.MAX_VIDAS,
+                                                       [0] * balas, 0, rng)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Disparos/s con N partidas vivas")
+    parser.add_argument('--sesiones', type=int, default=100_000)
+    parser.add_argument('--peticiones', type=int, default=20_000)
+    args = parser.parse_args()
+
+    rellenar_sesiones(args.sesiones, args.peticiones // args.sesiones + 2)
+    cliente = servidor.app.test_client()
+    session_ids = [f"bench-{i % args.sesiones}" for i in range(args.peticiones)]
+
+    inicio = time.perf_counter()
+    for session_id in session_ids:
+        cliente.post('/api/disparar', json={'session_id': session_id, 'objetivo': 'jugador'})
+    duracion = time.perf_counter() - inicio
+
+    print("=" * 60)
+    print(f"🧪 BENCHMARK DISPARAR - {args.sesiones} partidas vivas, "
+          f"log {logging.getLevelName(logging.getLogger().level)}")
+    print("=" * 60)
+    print(f"Peticiones:       {args.peticiones}")
+    print(f"Disparos/s:       {args.peticiones / duracion:,.0f}")
+    print(f"µs por disparo:   {duracion / args.peticiones * 1e6:,.1f}")
+    print(f"Logs descartados: {servidor.manejador_logs.descartados}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+"""
+Benchmark de RNG: throughput y pruebas de equidad chi-cuadrado
+Cada shard usa el mismo flujo por sesión que el servidor (FlujoAleatorio
+derivado de semilla de servidor + id), repartido en un pool de procesos.
+Uso:
+    python bench_rng.py --cargas 2000000
+    python bench_rng.py --cargas 200000000 --procesos 16   # cientos de millones
+"""
+import argparse
+import math
+import os
+import random
+import time
+from multiprocessing import Pool
+
+from config import Config
+from models import BuckshotGame, FlujoAleatorio, derivar_semilla
+
+CARGAS_POR_SHARD = 100_000
+
+
+def _contar_shard(tarea):
+    """Worker: genera cargas y decisiones del bot y devuelve conteos"""
+    semilla, cargas = tarea
+    game = BuckshotGame(Config)
+    rng = FlujoAleatorio(semilla)
+
+    composiciones = {}   # (reales, fogueo) -> cargas
+    posiciones = {}      # (reales, fogueo) -> [reales en cada posición]
+    for _ in range(cargas):
+        escopeta, reales, fogueo = game.cargar_escopeta(rng)
+        clave = (reales, fogueo)
+        composiciones[clave] = composiciones.get(clave, 0) + 1
+        conteo = posiciones.get(clave)
+        if conteo is None:
+            conteo = posiciones[clave] = [0] * len(escopeta)
+        for i, bala in enumerate(escopeta):
+            conteo[i] += bala
+
+    al_jugador = 0
+    for _ in range(cargas):
+        al_jugador += game.decidir_objetivo_bot(rng) == 'jugador'
+
+    return composiciones, posiciones, al_jugador
+
+
+def q_gamma(a, x):
+    """Función gamma incompleta regularizada superior Q(a, x)"""
+    if x <= 0:
+        return 1.0
+    if x < a + 1:
+        # Serie para P(a, x)
+        termino = suma = 1.0 / a
+        n = a
+        for _ in range(10_000):
+            n += 1
+            termino *= x / n
+            suma += termino
+            if abs(termino) < abs(suma) * 1e-15:
+                break
+        return 1.0 - suma * math.exp(-x + a * math.log(x) - math.lgamma(a))
+    # Fracción continua (Lentz) para Q(a, x)
+    minimo = 1e-300
+    b = x + 1 - a
+    c = 1 / minimo
+    d = 1 / b
+    h = d
+    for i in range(1, 10_000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = minimo if abs(d) < minimo else d
+        c = b + an / c
+        c = minimo if abs(c) < minimo else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return math.exp(-x + a * math.log(x) - math.lgamma(a)) * h
+
+
+def chi_cuadrado(observados, esperados):
+    """Returns: (estadístico, grados de libertad, p-valor)"""
+    estadistico = sum((o - e) ** 2 / e for o, e in zip(observados, esperados) if e > 0)
+    grados = len(observados) - 1
+    return estadistico, grados, q_gamma(grados / 2, estadistico / 2)
+
+
+def pruebas_equidad(composiciones, posiciones, al_jugador, total):
+    """Pruebas chi-cuadrado sobre los conteos agregados"""
+    rango_reales = range(Config.MIN_BALAS_REALES, Config.MAX_BALAS_REALES + 1)
+    rango_fogueo = range(Config.MIN_BALAS_FOGUEO, Config.MAX_BALAS_FOGUEO + 1)
+    celdas = [(r, f) for r in rango_reales for f in rango_fogueo]
+    resultados = []
+
+    # 1. Número de balas reales: uniforme en [MIN, MAX]
+    obs = [sum(composiciones.get((r, f), 0) for f in rango_fogueo) for r in rango_reales]
+    resultados.append(('Nº balas reales', *chi_cuadrado(obs, [total / len(obs)] * len(obs))))
+
+    # 2. Número de balas de fogueo
+    obs = [sum(composiciones.get((r, f), 0) for r in rango_reales) for f in rango_fogueo]
+    resultados.append(('Nº balas fogueo', *chi_cuadrado(obs, [total / len(obs)] * len(obs))))
+
+    # 3. Composición conjunta (reales, fogueo)
+    obs = [composiciones.get(c, 0) for c in celdas]
+    resultados.append(('Composición conjunta', *chi_cuadrado(obs, [total / len(obs)] * len(obs))))
+
+    # 4. Orden: para cada composición, cada posición es real con la misma frecuencia.
+    # Los conteos por posición suman siempre N*r, así que su varianza se corrige
+    # por p*(1-p)*n/(n-1) para que el estadístico siga una chi2 con n-1 gl
+    estadistico = grados = 0
+    for (r, f), conteo in posiciones.items():
+        n = r + f
+        if f == 0 or n < 2:
+            continue
+        p = r / n
+        esperado = composiciones[(r, f)] * p
+        escala = (1 - p) * n / (n - 1)
+        estadistico += sum((o - esperado) ** 2 for o in conteo) / (esperado * escala)
+        grados += n - 1
+    resultados.append(('Posición de reales', estadistico, grados, q_gamma(grados / 2, estadistico / 2)))
+
+    # 5. Decisiones del bot: Bernoulli(BOT_PROB_DISPARAR_JUGADOR)
+    p = Config.BOT_PROB_DISPARAR_JUGADOR
+    resultados.append(('Decisión del bot', *chi_cuadrado(
+        [al_jugador, total - al_jugador], [total * p, total * (1 - p)]
+    )))
+    return resultados
+
+
+def bench_throughput(n):
+    """Cargas y decisiones por segundo en un solo proceso"""
+    game = BuckshotGame(Config)
+    print(f"\n[1/2] ⚡ Throughput (1 proceso, {n} operaciones)")
+    print(f"{'GENERADOR':<22}{'CARGAS/S':>14}{'DECISIONES/S':>16}")
+    for nombre, rng in (('FlujoAleatorio', FlujoAleatorio(1)), ('random (global)', random)):
+        inicio = time.perf_counter()
+        for _ in range(n):
+            game.cargar_escopeta(rng)
+        cargas = n / (time.perf_counter() - inicio)
+        inicio = time.perf_counter()
+        for _ in range(n):
+            game.decidir_objetivo_bot(rng)
+        decisiones = n / (time.perf_counter() - inicio)
+        print(f"{nombre:<22}{cargas:>14,.0f}{decisiones:>16,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput y equidad del RNG")
+    parser.add_argument('--cargas', type=int, default=2_000_000,
+                        help="Cargas (y decisiones del bot) para las pruebas de equidad")
+    parser.add_argument('--procesos', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--semilla', default='bench')
+    parser.add_argument('--throughput', type=int, default=200_000)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🧪 BENCHMARK RNG - throughput y equidad")
+    print("=" * 60)
+
+    bench_throughput(args.throughput)
+
+    tareas = []
+    restantes = args.cargas
+    while restantes > 0:
+        n = min(CARGAS_POR_SHARD, restantes)
+        tareas.append((derivar_semilla(args.semilla, f"sesion-{len(tareas)}"), n))
+        restantes -= n
+
+    print(f"\n[2/2] 📐 Equidad ({args.cargas} cargas, {len(tareas)} flujos, "
+          f"{args.procesos} procesos)")
+    composiciones, posiciones, al_jugador = {}, {}, 0
+    inicio = time.perf_counter()
+    with Pool(processes=args.procesos) as pool:
+        for comp, pos, jug in pool.imap_unordered(_contar_shard, tareas):
+            for clave, n in comp.items():
+                composiciones[clave] = composiciones.get(clave, 0) + n
+            for clave, conteo in pos.items():
+                acumulado = posiciones.setdefault(clave, [0] * len(conteo))
+                for i, n in enumerate(conteo):
+                    acumulado[i] += n
+            al_jugador += jug
+    duracion = time.perf_counter() - inicio
+    print(f"   {2 * args.cargas / duracion:,.0f} sorteos/s agregados ({duracion:.1f}s)")
+
+    print(f"\n{'PRUEBA':<24}{'CHI2':>12}{'GL':>6}{'P-VALOR':>10}  RESULTADO")
+    for nombre, estadistico, grados, p_valor in pruebas_equidad(
+            composiciones, posiciones, al_jugador, args.cargas):
+        veredicto = "✅ OK" if p_valor >= 0.001 else "❌ SESGO"
+        print(f"{nombre:<24}{estadistico:>12.2f}{grados:>6}{p_valor:>10.4f}  {veredicto}")
+
+
+if __name__ == '__main__':
+    main()
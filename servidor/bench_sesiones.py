@@ -0,0 +1,143 @@
+"""
+Benchmark del almacén de sesiones: memoria por partida y tiempo por disparo
+- Memoria (tracemalloc) de N partidas como dict de campos (formato
+  anterior) y como EstadoSesion, y tamaño de EstadoSesion.empaquetar().
+- Tiempo por disparo del bot (_ejecutar_turno_bot de app.py) con
+  escopetas de fogueo, para que ninguna partida termine ni toque la BD.
+- Hibernación (AlmacenSesiones en un SQLite temporal): tiempo para pasar
+  las partidas a disco, bytes por partida en el fichero y latencia de
+  rehidratación.
+- Instantánea (instantanea.py): escritura y carga con mmap de todas las
+  partidas, como en un reinicio en caliente.
+Uso:
+    python bench_sesiones.py --sesiones 1000000 --disparos 200000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import app as servidor
+import instantanea
+from models import EstadoSesion, FlujoAleatorio
+from sesiones import AlmacenSesiones
+
+
+def como_dict(i, escopeta):
+    return {
+        'nombre': f"Jugador{i}",
+        'vidas_jugador': 3,
+        'vidas_bot': 3,
+        'puntos': 0,
+        'escopeta': list(escopeta),
+        'turno_jugador': True,
+        'balas_disparadas': 0,
+        'semilla': i * 2654435761,
+        'rng': FlujoAleatorio(i),
+        'auto_bot': False
+    }
+
+
+def como_estado(i, escopeta):
+    return EstadoSesion(f"Jugador{i}", 3, escopeta, i * 2654435761, FlujoAleatorio(i))
+
+
+def memoria(n, fabrica):
+    """Bytes por partida (incluye session_id y la entrada del dict sesiones)"""
+    escopeta = [1, 0, 1, 0, 0, 1, 0, 1]
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    sesiones = {f"{i:043d}": fabrica(i, escopeta) for i in range(n)}
+    total = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del sesiones
+    return total / n
+
+
+def tiempo_disparo(n_sesiones, disparos):
+    """µs por disparo del bot con partidas EstadoSesion"""
+    balas = disparos // n_sesiones + 1
+    sesiones = [(f"bench-{i}", EstadoSesion(f"Bench{i}", 3, bytes(balas), i, FlujoAleatorio(i)))
+                for i in range(n_sesiones)]
+    inicio = time.perf_counter()
+    for k in range(disparos):
+        session_id, sesion = sesiones[k % n_sesiones]
+        servidor._ejecutar_turno_bot(session_id, sesion)
+    return (time.perf_counter() - inicio) / disparos * 1e6
+
+
+def hibernacion(n_sesiones, rehidratar):
+    """(µs por partida hibernada, bytes por partida en disco, latencias de rehidratación en µs)"""
+    escopeta = [1, 0, 1, 0, 0, 1, 0, 1]
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, 'sesiones.sqlite3')
+        almacen = AlmacenSesiones(ruta, inactividad=0, lote=10_000)
+        for i in range(n_sesiones):
+            almacen[f"{i:043d}"] = como_estado(i, escopeta)
+        inicio = time.perf_counter()
+        almacen.hibernar()
+        us_hibernar = (time.perf_counter() - inicio) / n_sesiones * 1e6
+        almacen._conexion.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        bytes_disco = os.path.getsize(ruta) / n_sesiones
+
+        latencias = []
+        for i in random.sample(range(n_sesiones), min(rehidratar, n_sesiones)):
+            inicio = time.perf_counter()
+            almacen.get(f"{i:043d}")
+            latencias.append((time.perf_counter() - inicio) * 1e6)
+        almacen._conexion.close()
+    latencias.sort()
+    return us_hibernar, bytes_disco, latencias
+
+
+def instantanea_completa(n_sesiones):
+    """(segundos de escritura, segundos de carga, bytes del fichero)"""
+    escopeta = [1, 0, 1, 0, 0, 1, 0, 1]
+    partidas = [(f"{i:043d}", como_estado(i, escopeta)) for i in range(n_sesiones)]
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, 'sesiones.bin')
+        inicio = time.perf_counter()
+        instantanea.escribir(ruta, partidas)
+        escritura = time.perf_counter() - inicio
+        del partidas
+        inicio = time.perf_counter()
+        cargadas = instantanea.leer(ruta)
+        carga = time.perf_counter() - inicio
+        assert len(cargadas) == n_sesiones
+        return escritura, carga, os.path.getsize(ruta)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memoria y tiempo por disparo del almacén de sesiones")
+    parser.add_argument('--sesiones', type=int, default=1_000_000)
+    parser.add_argument('--disparos', type=int, default=200_000)
+    parser.add_argument('--rehidratar', type=int, default=10_000)
+    args = parser.parse_args()
+
+    bytes_dict = memoria(args.sesiones, como_dict)
+    bytes_estado = memoria(args.sesiones, como_estado)
+    empaquetada = len(como_estado(123456, [1, 0, 1, 0, 0, 1, 0, 1]).empaquetar())
+    us_disparo = tiempo_disparo(min(args.sesiones, 10_000), args.disparos)
+    us_hibernar, bytes_disco, latencias = hibernacion(args.sesiones, args.rehidratar)
+    escritura, carga, bytes_instantanea = instantanea_completa(args.sesiones)
+
+    print("=" * 60)
+    print(f"🧪 BENCHMARK SESIONES - {args.sesiones:,} partidas")
+    print("=" * 60)
+    print(f"{'FORMATO':<22}{'BYTES/PARTIDA':>15}{'TOTAL (MB)':>14}")
+    for nombre, por_partida in (('dict', bytes_dict), ('EstadoSesion', bytes_estado),
+                                ('empaquetada', empaquetada)):
+        print(f"{nombre:<22}{por_partida:>15,.0f}{por_partida * args.sesiones / 2**20:>14,.1f}")
+    print(f"{'en disco (SQLite)':<22}{bytes_disco:>15,.0f}{bytes_disco * args.sesiones / 2**20:>14,.1f}")
+    print(f"Disparo del bot:      {us_disparo:.2f} µs")
+    print(f"Hibernar:             {us_hibernar:.2f} µs/partida")
+    print(f"Rehidratar:           p50 {latencias[len(latencias) // 2]:.1f} µs, "
+          f"p99 {latencias[int(len(latencias) * 0.99)]:.1f} µs")
+    print(f"Instantánea:          escribir {escritura:.2f} s, cargar {carga:.2f} s "
+          f"({bytes_instantanea / 2**20:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+Benchmark de escalado del torneo: partidas/s según número de procesos
+Uso:
+    python bench_torneo.py --partidas 400000
+"""
+import argparse
+import os
+import time
+
+from torneo import ejecutar_torneo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Escalado del torneo por núcleos")
+    parser.add_argument('--partidas', type=int, default=400_000)
+    parser.add_argument('--tam-shard', type=int, default=10_000)
+    parser.add_argument('--max-procesos', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    niveles = []
+    procesos = 1
+    while procesos < args.max_procesos:
+        niveles.append(procesos)
+        procesos *= 2
+    niveles.append(args.max_procesos)
+
+    print("=" * 60)
+    print(f"🧪 BENCHMARK TORNEO - {args.partidas} partidas contador vs clasico")
+    print("=" * 60)
+    print(f"{'PROCESOS':>9}{'SEGUNDOS':>12}{'PARTIDAS/S':>14}{'SPEEDUP':>10}{'EFICIENCIA':>12}")
+
+    base = None
+    for procesos in niveles:
+        inicio = time.perf_counter()
+        ejecutar_torneo(['contador'], ['clasico'], args.partidas, semilla=1,
+                        procesos=procesos, tam_shard=args.tam_shard)
+        duracion = time.perf_counter() - inicio
+        base = base or duracion
+        speedup = base / duracion
+        print(f"{procesos:>9}{duracion:>12.2f}{args.partidas / duracion:>14,.0f}"
+              f"{speedup:>10.2f}{speedup / procesos:>12.0%}")
+
+
+if __name__ == '__main__':
+    main()
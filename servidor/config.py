@@ -30,6 +30,76 @@ class Config:
     # CORS
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', '*').split(',')
     
+    # Logging: 'json' o 'texto'; muestreo por ruta bajo WARNING ("disparar=0.01,turno_bot=0.01")
+    LOG_NIVEL = os.getenv('LOG_NIVEL', 'INFO').upper()
+    LOG_FORMATO = os.getenv('LOG_FORMATO', 'json')
+    LOG_MUESTREO = os.getenv('LOG_MUESTREO', '')
+    LOG_COLA_MAX = int(os.getenv('LOG_COLA_MAX', '10000'))
+
+    # Métricas: con varios workers de gunicorn, directorio compartido donde
+    # cada proceso vuelca sus totales cada METRICAS_INTERVALO segundos
+    METRICAS_DIR = os.getenv('METRICAS_DIR')
+    METRICAS_INTERVALO = float(os.getenv('METRICAS_INTERVALO', '5'))
+    
+    # Consultas: umbral de consulta lenta (se registra con su EXPLAIN, como
+    # mucho uno por consulta cada CONSULTA_LENTA_INTERVALO_PLAN segundos) y
+    # máximo de consultas por petición antes de avisar
+    CONSULTA_LENTA_MS = float(os.getenv('CONSULTA_LENTA_MS', '200'))
+    CONSULTA_LENTA_INTERVALO_PLAN = float(os.getenv('CONSULTA_LENTA_INTERVALO_PLAN', '60'))
+    PRESUPUESTO_CONSULTAS = int(os.getenv('PRESUPUESTO_CONSULTAS', '10'))
+    
+    # Endpoints de administración (/api/admin/*): desactivados si no se define
+    ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+    
+    # Perfilado bajo demanda (/api/admin/perfil y cabecera X-Perfil); requiere ADMIN_TOKEN
+    PERFILADO = os.getenv('PERFILADO', 'False') == 'True'
+    PERFIL_DIR = os.getenv('PERFIL_DIR', 'perfiles')
+    PERFIL_MAX_SEGUNDOS = float(os.getenv('PERFIL_MAX_SEGUNDOS', '60'))
+    
+    # Memoria: frames que guarda tracemalloc (0 = desactivado, tiene coste en
+    # cada asignación), cada cuántos segundos se estima el tamaño de
+    # `sesiones` y cuántas partidas se miden en cada estimación
+    MEMORIA_TRACEMALLOC = int(os.getenv('MEMORIA_TRACEMALLOC', '0'))
+    MEMORIA_INTERVALO = float(os.getenv('MEMORIA_INTERVALO', '30'))
+    MEMORIA_MUESTRA = int(os.getenv('MEMORIA_MUESTRA', '200'))
+    
+    # Hibernación: partidas sin tocar durante HIBERNACION_INACTIVIDAD segundos
+    # pasan a una tabla SQLite en HIBERNACION_RUTA (sin ruta, desactivada);
+    # se revisa cada HIBERNACION_INTERVALO segundos, de HIBERNACION_LOTE en lote
+    HIBERNACION_RUTA = os.getenv('HIBERNACION_RUTA')
+    HIBERNACION_INACTIVIDAD = float(os.getenv('HIBERNACION_INACTIVIDAD', '300'))
+    HIBERNACION_INTERVALO = float(os.getenv('HIBERNACION_INTERVALO', '30'))
+    HIBERNACION_LOTE = int(os.getenv('HIBERNACION_LOTE', '1000'))
+    
+    # Segador: partidas sin acceso en SEGADOR_INACTIVIDAD segundos (0 = nunca)
+    # se dan por abandonadas; un tick cada SEGADOR_RESOLUCION segundos, como
+    # mucho SEGADOR_LOTE hibernadas por tick. Con SEGADOR_GUARDAR_PUNTOS la
+    # puntuación parcial entra en el ranking
+    SEGADOR_INACTIVIDAD = float(os.getenv('SEGADOR_INACTIVIDAD', '1800'))
+    SEGADOR_RESOLUCION = float(os.getenv('SEGADOR_RESOLUCION', '1'))
+    SEGADOR_LOTE = int(os.getenv('SEGADOR_LOTE', '1000'))
+    SEGADOR_GUARDAR_PUNTOS = os.getenv('SEGADOR_GUARDAR_PUNTOS', 'False') == 'True'
+    
+    # Reinicio en caliente: instantánea de las partidas en memoria en
+    # INSTANTANEA_DIR (sin directorio, desactivado) cada INSTANTANEA_INTERVALO
+    # segundos y al salir; los workers nuevos adoptan las de los que salieron
+    INSTANTANEA_DIR = os.getenv('INSTANTANEA_DIR')
+    INSTANTANEA_INTERVALO = float(os.getenv('INSTANTANEA_INTERVALO', '60'))
+    
+    # Diario de resultados: con DIARIO_DIR, el resultado de cada partida se
+    # confirma al quedar en disco (fsync agrupado) y un hilo lo pasa a la BD
+    # de DIARIO_LOTE en DIARIO_LOTE; el fichero se vacía al superar
+    # DIARIO_MAX_BYTES con todo reproducido. DIARIO_ESPERA_MS: espera antes
+    # de cada fsync para juntar más resultados
+    DIARIO_DIR = os.getenv('DIARIO_DIR')
+    DIARIO_LOTE = int(os.getenv('DIARIO_LOTE', '500'))
+    DIARIO_MAX_BYTES = int(os.getenv('DIARIO_MAX_BYTES', str(16 * 2**20)))
+    DIARIO_ESPERA_MS = float(os.getenv('DIARIO_ESPERA_MS', '0'))
+    
+    # Idempotencia: respuestas recordadas por sesión y de partidas ya terminadas
+    IDEMPOTENCIA_MAX_POR_SESION = int(os.getenv('IDEMPOTENCIA_MAX_POR_SESION', '8'))
+    IDEMPOTENCIA_MAX_FINALIZADAS = int(os.getenv('IDEMPOTENCIA_MAX_FINALIZADAS', '10000'))
+    
     # Game Settings
     MAX_VIDAS = 3
     PUNTOS_BALA_REAL = 10
@@ -38,6 +108,31 @@ class Config:
     MAX_BALAS_REALES = 4
     MIN_BALAS_FOGUEO = 1
     MAX_BALAS_FOGUEO = 4
+    
+    # Bot clásico: probabilidad de disparar al jugador (el resto se dispara a sí mismo)
+    BOT_PROB_DISPARAR_JUGADOR = float(os.getenv('BOT_PROB_DISPARAR_JUGADOR', '0.7'))
+    
+    # Semilla del servidor: de ella y del session_id se deriva el RNG de cada partida
+    SEMILLA_SERVIDOR = os.getenv('SERVER_SEED')
+    
+    # Política aprendida (entrenamiento_bot.py); si no existe se usa el bot clásico
+    BOT_POLITICA_PATH = os.getenv('BOT_POLITICA_PATH')
+    
+    # Subida por lotes de puntuaciones jugadas sin conexión
+    LOTE_MAX_PUNTUACIONES = int(os.getenv('LOTE_MAX_PUNTUACIONES', '500'))
+    # Jugadas que se rejuegan como mucho por lote (suma de todas sus partidas)
+    LOTE_MAX_JUGADAS = int(os.getenv('LOTE_MAX_JUGADAS', '10000'))
+    # Clave maestra de las partidas locales: de ella se deriva la clave de
+    # cada instalación del cliente (POST /api/instalaciones), que firma sus
+    # partidas. Sin ella no se aceptan subidas de partidas locales.
+    # La firma y la rejugada solo prueban que la partida es coherente, no que
+    # se jugara limpia (el cliente conoce la semilla): las partidas locales
+    # se guardan como no verificadas y no entran en el ranking
+    CLAVE_FIRMA_PARTIDAS = os.getenv('CLAVE_FIRMA_PARTIDAS')
+    # Peticiones por minuto y por IP (en cada worker) a /api/instalaciones
+    # y a /api/puntuaciones/lote
+    LIMITE_INSTALACIONES_POR_MINUTO = float(os.getenv('LIMITE_INSTALACIONES_POR_MINUTO', '2'))
+    LIMITE_LOTES_POR_MINUTO = float(os.getenv('LIMITE_LOTES_POR_MINUTO', '10'))
 
 
 class DevelopmentConfig(Config):
@@ -49,9 +144,7 @@ class DevelopmentConfig(Config):
 class ProductionConfig(Config):
     """Configuración para producción"""
     DEBUG = False
-    # En producción, DATABASE_URL debe venir de variable de entorno
-    if not os.getenv('DATABASE_URL'):
-        raise ValueError("DATABASE_URL environment variable must be set in production")
+    # En producción, DATABASE_URL debe venir de variable de entorno (se valida en get_config)
 
 
 class TestingConfig(Config):
@@ -71,4 +164,6 @@ config_by_name = {
 def get_config():
     """Obtener configuración según variable de entorno"""
     env = os.getenv('FLASK_ENV', 'development')
+    if env == 'production' and not os.getenv('DATABASE_URL'):
+        raise ValueError("DATABASE_URL environment variable must be set in production")
     return config_by_name.get(env, DevelopmentConfig)
@@ -0,0 +1,11 @@
+"""
+pytest desde la raíz o desde servidor/: los módulos del servidor se
+importan por nombre (from models import ...), como en app.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Script manual contra PostgreSQL, no un test
+collect_ignore = ['test_connection.py']
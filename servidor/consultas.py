@@ -0,0 +1,122 @@
+"""
+Instrumentación de consultas SQL
+Duración y número de llamadas por consulta, registro de consultas lentas
+con su plan (EXPLAIN) y presupuesto de consultas por petición.
+"""
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Consultas de la petición en curso: [número, segundos] (None fuera de una petición)
+_consultas_peticion = contextvars.ContextVar('consultas_peticion', default=None)
+
+
+def normalizar(query):
+    """Una sola línea, sin espacios repetidos (las consultas ya van parametrizadas)"""
+    return " ".join(query.split())
+
+
+def iniciar_peticion():
+    """Empezar a contar las consultas de una petición. Returns: token para terminar_peticion"""
+    return _consultas_peticion.set([0, 0.0])
+
+
+def terminar_peticion(token):
+    """Returns: (consultas, segundos) de la petición"""
+    contador = _consultas_peticion.get()
+    _consultas_peticion.reset(token)
+    return tuple(contador) if contador else (0, 0.0)
+
+
+def consultas_peticion():
+    """(consultas, segundos) de la petición en curso hasta ahora"""
+    contador = _consultas_peticion.get()
+    return tuple(contador) if contador else (0, 0.0)
+
+
+class RegistroConsultas:
+    """Estadísticas por consulta y últimas consultas lentas"""
+
+    def __init__(self, umbral_ms=200.0, intervalo_plan=60.0, max_lentas=50):
+        self.umbral = umbral_ms / 1000
+        # Como mucho un EXPLAIN por consulta cada intervalo_plan segundos
+        self.intervalo_plan = intervalo_plan
+        self.estadisticas = {}
+        self.lentas = deque(maxlen=max_lentas)
+        self._ultimo_plan = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, query, segundos):
+        """
+        Apuntar una consulta ejecutada
+        Returns: None si no es lenta; si lo es, True cuando toca capturar su plan
+        """
+        contador = _consultas_peticion.get()
+        if contador is not None:
+            contador[0] += 1
+            contador[1] += segundos
+
+        clave = normalizar(query)
+        with self._lock:
+            estadistica = self.estadisticas.get(clave)
+            if estadistica is None:
+                estadistica = self.estadisticas[clave] = [0, 0.0, 0.0]
+            estadistica[0] += 1
+            estadistica[1] += segundos
+            estadistica[2] = max(estadistica[2], segundos)
+
+            if segundos < self.umbral:
+                return None
+            ahora = time.monotonic()
+            if ahora - self._ultimo_plan.get(clave, float('-inf')) < self.intervalo_plan:
+                return False
+            self._ultimo_plan[clave] = ahora
+            return True
+
+    def consulta_lenta(self, query, segundos, plan=None):
+        """Registrar una consulta lenta (con su plan si se capturó)"""
+        clave = normalizar(query)
+        with self._lock:
+            self.lentas.append({
+                'consulta': clave,
+                'ms': round(segundos * 1000, 2),
+                'plan': plan,
+                'fecha': datetime.now().isoformat(timespec='seconds')
+            })
+        logger.warning("🐢 Consulta lenta (%.1f ms): %s\n%s", segundos * 1000, clave, plan or "(sin plan)")
+
+    def resumen(self, limite=20):
+        """Consultas con más tiempo acumulado y últimas lentas"""
+        with self._lock:
+            filas = [(clave, *valores) for clave, valores in self.estadisticas.items()]
+            lentas = list(self.lentas)
+        filas.sort(key=lambda fila: fila[2], reverse=True)
+        return {
+            'umbral_ms': self.umbral * 1000,
+            'consultas': [
+                {
+                    'consulta': clave,
+                    'llamadas': llamadas,
+                    'total_ms': round(total * 1000, 2),
+                    'media_ms': round(total / llamadas * 1000, 2),
+                    'max_ms': round(maximo * 1000, 2)
+                }
+                for clave, llamadas, total, maximo in filas[:limite]
+            ],
+            'lentas': lentas[::-1]
+        }
+
+
+def sentencia_explain(query):
+    """
+    EXPLAIN a usar para la consulta: ANALYZE solo en SELECT (ANALYZE ejecuta
+    la sentencia; en un INSERT/UPDATE repetiría la escritura)
+    """
+    if normalizar(query).upper().startswith('SELECT'):
+        return "EXPLAIN (ANALYZE, BUFFERS) " + query
+    return "EXPLAIN " + query
@@ -6,6 +6,10 @@ from psycopg2 import pool, extras
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 from contextlib import contextmanager
 import logging
+import time
+
+from consultas import RegistroConsultas, sentencia_explain
+from metricas import metricas
 
 logger = logging.getLogger(__name__)
 
@@ -16,24 +20,27 @@ class Database:
     def __init__(self, config):
         self.config = config
         self.connection_pool = None
+        self.consultas = RegistroConsultas(config.CONSULTA_LENTA_MS, config.CONSULTA_LENTA_INTERVALO_PLAN)
         self._initialize_pool()
     
     def _initialize_pool(self):
         """Inicializar connection pool"""
         try:
-            self.connection_pool = psycopg2.pool.SimpleConnectionPool(
+            # Thread-safe: hilos de gunicorn (gthread) y los de fondo (segador,
+            # diario, hibernación) comparten el pool
+            self.connection_pool = psycopg2.pool.ThreadedConnectionPool(
                 self.config.DB_POOL_MIN,
                 self.config.DB_POOL_MAX,
                 self.config.DATABASE_URL
             )
             
             if self.connection_pool:
-                logger.info(f"✅ Connection pool creado: {self.config.DB_POOL_MIN}-{self.config.DB_POOL_MAX} conexiones")
+                logger.info("✅ Connection pool creado: %s-%s conexiones", self.config.DB_POOL_MIN, self.config.DB_POOL_MAX)
             else:
                 raise Exception("No se pudo crear el connection pool")
         
         except (Exception, psycopg2.DatabaseError) as error:
-            logger.error(f"❌ Error al crear connection pool: {error}")
+            logger.error("❌ Error al crear connection pool: %s", error)
             raise
     
     @contextmanager
@@ -47,13 +54,14 @@ class Database:
         """
         connection = None
         try:
-            connection = self.connection_pool.getconn()
+            with metricas.medir('buckshot_db_espera_pool_segundos'):
+                connection = self.connection_pool.getconn()
             yield connection
             connection.commit()
         except Exception as e:
             if connection:
                 connection.rollback()
-            logger.error(f"❌ Error en transacción: {e}")
+            logger.error("❌ Error en transacción: %s", e)
             raise
         finally:
             if connection:
@@ -74,33 +82,74 @@ class Database:
             finally:
                 cursor.close()
     
+    def _registrar(self, cursor, operacion, query, params, inicio, explicable=True):
+        """
+        Duración de la consulta (sin la espera del pool) en métricas y en el
+        registro de consultas; si es lenta, capturar su plan en la misma conexión
+        """
+        segundos = time.perf_counter() - inicio
+        metricas.observar('buckshot_db_consulta_segundos', segundos, (('operacion', operacion),))
+        lenta = self.consultas.registrar(query, segundos)
+        if lenta is not None:
+            plan = self._explicar(cursor, query, params) if lenta and explicable else None
+            self.consultas.consulta_lenta(query, segundos, plan)
+    
+    def _explicar(self, cursor, query, params):
+        """Plan de la consulta (en un savepoint: si falla no aborta la transacción)"""
+        cursor.execute("SAVEPOINT explicar")
+        try:
+            cursor.execute(sentencia_explain(query), params)
+            plan = "\n".join(fila[0] for fila in cursor.fetchall())
+            cursor.execute("RELEASE SAVEPOINT explicar")
+            return plan
+        except psycopg2.Error as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT explicar")
+            return f"(EXPLAIN falló: {e})"
+    
     def execute_query(self, query, params=None, fetch=False):
         """
         Ejecutar query simple
         """
         with self.get_cursor() as cursor:
+            inicio = time.perf_counter()
             cursor.execute(query, params)
-            
-            if fetch:
-                return cursor.fetchall()
-            return cursor.rowcount
+            resultado = cursor.fetchall() if fetch else cursor.rowcount
+            self._registrar(cursor, 'execute_query', query, params, inicio)
+            return resultado
     
     def execute_one(self, query, params=None):
         """
         Ejecutar query y obtener un solo resultado
         """
         with self.get_cursor() as cursor:
+            inicio = time.perf_counter()
             cursor.execute(query, params)
-            return cursor.fetchone()
+            resultado = cursor.fetchone()
+            self._registrar(cursor, 'execute_one', query, params, inicio)
+            return resultado
     
     def execute_many(self, query, params_list):
         """
         Ejecutar query múltiple (bulk insert/update)
         """
         with self.get_cursor() as cursor:
+            inicio = time.perf_counter()
             cursor.executemany(query, params_list)
+            self._registrar(cursor, 'execute_many', query, None, inicio, explicable=False)
             return cursor.rowcount
     
+    def execute_values(self, query, filas, template=None, fetch=False):
+        """
+        INSERT multi-fila (una sola sentencia por página de filas)
+        query lleva un único %s donde van los VALUES
+        """
+        with self.get_cursor() as cursor:
+            inicio = time.perf_counter()
+            resultado = extras.execute_values(cursor, query, filas, template,
+                                              page_size=max(len(filas), 1), fetch=fetch)
+            self._registrar(cursor, 'execute_values', query, None, inicio, explicable=False)
+            return resultado
+    
     def close_all_connections(self):
         """Cerrar todas las conexiones del pool"""
         if self.connection_pool:
@@ -133,6 +182,29 @@ class Database:
                 ON puntuaciones(fecha DESC)
             """)
             
+            # Una puntuación por session_id: lotes de los clientes, diarios y
+            # segador insertan con ON CONFLICT DO NOTHING. Sustituye al índice
+            # no único anterior (antes se quitan los duplicados que dejó)
+            cursor.execute("DROP INDEX IF EXISTS idx_puntuaciones_session")
+            cursor.execute("""
+                DELETE FROM puntuaciones a
+                USING puntuaciones b
+                WHERE a.session_id = b.session_id AND a.id > b.id
+                  AND NOT EXISTS (
+                      SELECT 1 FROM pg_indexes WHERE indexname = 'uq_puntuaciones_session'
+                  )
+            """)
+            cursor.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS uq_puntuaciones_session
+                ON puntuaciones(session_id) WHERE session_id IS NOT NULL
+            """)
+            
+            # Partidas locales subidas por los clientes: FALSE (fuera del ranking)
+            cursor.execute("""
+                ALTER TABLE puntuaciones
+                ADD COLUMN IF NOT EXISTS verificada BOOLEAN NOT NULL DEFAULT TRUE
+            """)
+            
             # Tabla de sesiones de juego (opcional, para analytics)
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS sesiones_juego (
@@ -147,6 +219,18 @@ class Database:
                 )
             """)
             
+            # Semilla del RNG de la partida (permite regenerarla)
+            cursor.execute("""
+                ALTER TABLE sesiones_juego
+                ADD COLUMN IF NOT EXISTS semilla NUMERIC(20, 0)
+            """)
+            
+            # Partidas cerradas por inactividad (segador)
+            cursor.execute("""
+                ALTER TABLE sesiones_juego
+                ADD COLUMN IF NOT EXISTS abandonada BOOLEAN NOT NULL DEFAULT FALSE
+            """)
+            
             logger.info("✅ Base de datos inicializada correctamente")
 
 
@@ -0,0 +1,270 @@
+"""
+Diario local de resultados (write-ahead) para cuando PostgreSQL falla
+- Al terminar una partida su resultado se añade a DIARIO_DIR/diario-<pid>.log
+  y se confirma al jugador en cuanto está en disco (fsync). Los resultados
+  que llegan mientras se hace un fsync van juntos en el siguiente.
+- Un hilo los reproduce en la BD en orden, por lotes (Puntuacion.guardar_lote
+  descarta los session_id ya guardados, SesionJuego.finalizar_lote las
+  sesiones ya cerradas), reintentando con espera creciente si la BD no
+  responde. Con todo reproducido el fichero se trunca.
+- Los diarios de procesos que ya no existen se reclaman (rename atómico) y
+  se reproducen enteros: repetir resultados ya guardados no duplica nada.
+Registro: longitud (4 bytes), CRC32 (4 bytes) y JSON. Un registro cortado
+o con CRC incorrecto marca el final del diario (escritura interrumpida,
+nunca confirmada).
+"""
+import glob
+import json
+import logging
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime
+
+from metricas import metricas, proceso_vivo
+from models import Puntuacion, SesionJuego
+
+logger = logging.getLogger(__name__)
+
+CABECERA = struct.Struct('<II')
+
+
+def codificar(resultado):
+    cuerpo = json.dumps(resultado, separators=(',', ':'), ensure_ascii=False).encode()
+    return CABECERA.pack(len(cuerpo), zlib.crc32(cuerpo)) + cuerpo
+
+
+def decodificar(datos, posicion=0):
+    """
+    Registros completos de datos desde posicion
+    Returns: (lista de resultados, posición tras el último registro válido)
+    """
+    resultados = []
+    while posicion + CABECERA.size <= len(datos):
+        largo, crc = CABECERA.unpack_from(datos, posicion)
+        inicio = posicion + CABECERA.size
+        cuerpo = datos[inicio:inicio + largo]
+        if len(cuerpo) < largo or zlib.crc32(cuerpo) != crc:
+            break
+        resultados.append(json.loads(cuerpo))
+        posicion = inicio + largo
+    return resultados, posicion
+
+
+class DiarioResultados:
+    """Diario de este worker: anotar (con fsync agrupado) y reproducir en la BD"""
+
+    # diario-<pid>.log o, ya reclamado por otro proceso, diario-<pid>.log.<pid>.reproduciendo
+    PATRON = re.compile(r'diario-(\d+)\.log(?:\.(\d+)\.reproduciendo)?$')
+
+    def __init__(self, directorio, lote=500, max_bytes=16 * 2**20, espera_ms=0.0):
+        self.directorio = directorio
+        self.lote = lote
+        self.max_bytes = max_bytes
+        self.espera = espera_ms / 1000
+        self.ruta = os.path.join(directorio, f"diario-{os.getpid()}.log")
+        os.makedirs(directorio, exist_ok=True)
+
+        self._cond = threading.Condition()
+        self._buffer = []
+        self._lote_abierto = 1      # lote al que se añaden los nuevos resultados
+        self._lote_sincronizado = 0  # último lote con fsync hecho
+        self._errores = {}           # lote -> OSError (lo recoge quien lo espera)
+        self._escrito = 0            # bytes con fsync
+        self._reproducido = 0        # bytes ya en la BD
+        self.pendientes = 0          # resultados confirmados y aún no en la BD
+        self._huerfanos_contados = {}  # ruta -> resultados ya sumados a pendientes
+        self._lock_fichero = threading.Lock()
+
+        # Un diario con nuestro pid es de un proceso anterior (pid reutilizado)
+        self._reclamar(self.ruta)
+        self._fd = os.open(self.ruta, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._fd_lectura = os.open(self.ruta, os.O_RDONLY)
+        # fsync del directorio: que la entrada del fichero nuevo también sobreviva
+        fd_directorio = os.open(directorio, os.O_RDONLY)
+        try:
+            os.fsync(fd_directorio)
+        finally:
+            os.close(fd_directorio)
+
+    def anotar(self, session_id, nombre, puntos, balas_disparadas):
+        """Añadir un resultado y esperar a que esté en disco"""
+        registro = codificar({
+            'session_id': session_id,
+            'nombre': nombre,
+            'puntos': puntos,
+            'balas': balas_disparadas,
+            'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        })
+        with self._cond:
+            self._buffer.append(registro)
+            mi_lote = self._lote_abierto
+            self._cond.notify_all()
+            while self._lote_sincronizado < mi_lote:
+                self._cond.wait()
+            error = self._errores.pop(mi_lote, None)
+        if error is not None:
+            raise error
+
+    def _escribir(self):
+        """Hilo escritor: un write + fsync por lote"""
+        while True:
+            with self._cond:
+                while not self._buffer:
+                    self._cond.wait()
+            if self.espera:
+                time.sleep(self.espera)  # dejar que se junten más resultados
+            with self._cond:
+                buffer, self._buffer = self._buffer, []
+                lote = self._lote_abierto
+                self._lote_abierto += 1
+            datos = b''.join(buffer)
+            with self._lock_fichero:
+                try:
+                    with metricas.medir('buckshot_diario_fsync_segundos'):
+                        os.write(self._fd, datos)
+                        os.fsync(self._fd)
+                    error = None
+                except OSError as e:
+                    logger.error("❌ No se pudo escribir el diario de resultados: %s", e)
+                    error = e
+                    try:
+                        os.ftruncate(self._fd, self._escrito)  # sin registros a medias al final
+                    except OSError:
+                        pass
+                # Dentro del lock del fichero: _truncar no puede borrar un lote recién escrito
+                with self._cond:
+                    if error is None:
+                        self._escrito += len(datos)
+                        self.pendientes += len(buffer)
+                    else:
+                        self._errores[lote] = error
+                    self._lote_sincronizado = lote
+                    self._cond.notify_all()
+            metricas.contar('buckshot_diario_fsync_total')
+            metricas.contar('buckshot_diario_anotados_total', n=len(buffer))
+
+    def _reproducir_lote(self, resultados):
+        """Guardar resultados en la BD (idempotente). Returns: guardados"""
+        entradas = [{'session_id': r['session_id'], 'nombre': r['nombre'], 'puntos': r['puntos'],
+                     'fecha': r['fecha']} for r in resultados]
+        estados = Puntuacion.guardar_lote(entradas)
+        SesionJuego.finalizar_lote([
+            (r['session_id'], r['puntos'], r['balas'], r['fecha']) for r in resultados])
+        guardados = sum(estado['estado'] == 'guardada' for estado in estados)
+        invalidas = [estado for estado in estados if estado['estado'] == 'invalida']
+        for estado in invalidas:
+            # No se reintenta (volvería a fallar): queda en el log y en la métrica
+            logger.error("❌ Resultado del diario rechazado (session %s): %s",
+                         estado['session_id'], estado.get('mensaje'))
+        metricas.contar('buckshot_diario_reproducidos_total', n=len(resultados))
+        metricas.contar('buckshot_diario_duplicados_total',
+                        n=sum(estado['estado'] == 'duplicada' for estado in estados))
+        if invalidas:
+            metricas.contar('buckshot_diario_rechazados_total', n=len(invalidas))
+        return guardados
+
+    def _reproducir_propio(self):
+        """Reproducir lo que haya con fsync en el diario propio. Returns: resultados reproducidos"""
+        with self._cond:
+            fin = self._escrito
+        if self._reproducido >= fin:
+            self._truncar()
+            return 0
+        datos = os.pread(self._fd_lectura, min(fin - self._reproducido, 4 * 2**20), self._reproducido)
+        resultados, consumidos = decodificar(datos)
+        if not resultados:
+            return 0
+        for i in range(0, len(resultados), self.lote):
+            self._reproducir_lote(resultados[i:i + self.lote])
+        with self._cond:
+            self._reproducido += consumidos
+            self.pendientes -= len(resultados)
+        return len(resultados)
+
+    def _truncar(self):
+        """Vaciar el fichero si todo está reproducido y ha crecido demasiado"""
+        if self._escrito < self.max_bytes:
+            return
+        with self._lock_fichero, self._cond:
+            if self._reproducido == self._escrito:
+                os.ftruncate(self._fd, 0)
+                self._escrito = self._reproducido = 0
+
+    def _reclamar(self, ruta):
+        """Renombrar un diario huérfano para reproducirlo. Returns: nueva ruta o None"""
+        reclamada = f"{ruta.split('.log')[0]}.log.{os.getpid()}.reproduciendo"
+        if reclamada == ruta:
+            return ruta
+        try:
+            os.rename(ruta, reclamada)
+        except FileNotFoundError:
+            return None  # no existe o lo reclamó otro worker
+        return reclamada
+
+    def _huerfanos(self):
+        """Diarios sin proceso vivo que los lleve (o reclamados por este)"""
+        for ruta in glob.glob(os.path.join(self.directorio, 'diario-*')):
+            coincidencia = self.PATRON.search(ruta)
+            if not coincidencia or ruta == self.ruta:
+                continue
+            duenio = int(coincidencia.group(2) or coincidencia.group(1))
+            if duenio == os.getpid() or not proceso_vivo(duenio):
+                yield ruta
+
+    def _reproducir_huerfanos(self):
+        """Reproducir enteros los diarios huérfanos y borrarlos"""
+        for ruta in self._huerfanos():
+            ruta = self._reclamar(ruta)
+            if ruta is None:
+                continue
+            with open(ruta, 'rb') as f:
+                datos = f.read()
+            resultados, consumidos = decodificar(datos)
+            if consumidos < len(datos):
+                logger.warning("⚠️ %s: %d bytes finales incompletos (escritura sin confirmar)",
+                               ruta, len(datos) - consumidos)
+            with self._cond:
+                if ruta not in self._huerfanos_contados:
+                    self._huerfanos_contados[ruta] = len(resultados)
+                    self.pendientes += len(resultados)
+            for i in range(0, len(resultados), self.lote):
+                self._reproducir_lote(resultados[i:i + self.lote])
+            os.remove(ruta)
+            with self._cond:
+                self.pendientes -= self._huerfanos_contados.pop(ruta)
+            logger.info("📒 Diario huérfano %s reproducido: %d resultados", ruta, len(resultados))
+
+    def _reproducir(self, sondeo):
+        """Hilo de reproducción: en orden, con espera creciente mientras falle la BD"""
+        espera = sondeo
+        ultimo_sondeo_huerfanos = float('-inf')
+        while True:
+            try:
+                if time.monotonic() - ultimo_sondeo_huerfanos > 30:
+                    self._reproducir_huerfanos()
+                    ultimo_sondeo_huerfanos = time.monotonic()
+                inicio = time.perf_counter()
+                reproducidos = self._reproducir_propio()
+                if reproducidos:
+                    metricas.observar('buckshot_diario_reproduccion_segundos', time.perf_counter() - inicio)
+                    continue
+                espera = sondeo
+            except Exception as e:
+                metricas.contar('buckshot_diario_errores_bd_total')
+                logger.error("❌ No se pudo reproducir el diario (reintento en %.0fs): %s", espera, e)
+                time.sleep(espera)
+                espera = min(espera * 2, 30.0)
+                continue
+            time.sleep(sondeo)
+
+    def bytes_pendientes(self):
+        return self._escrito - self._reproducido
+
+    def arrancar(self, sondeo=0.05):
+        """Hilos escritor y de reproducción (daemon)"""
+        threading.Thread(target=self._escribir, daemon=True).start()
+        threading.Thread(target=self._reproducir, args=(sondeo,), daemon=True).start()
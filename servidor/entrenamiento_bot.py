@@ -0,0 +1,272 @@
+"""
+Entrenamiento del bot por self-play con Q-learning tabular
+Uso:
+    python entrenamiento_bot.py --pasos 5000000 --lote 4096 --salida politica_bot.json
+    BOT_POLITICA_PATH=politica_bot.json python app.py   # el servidor carga la tabla
+"""
+import argparse
+import random
+import sys
+import time
+
+from config import Config
+from models import BuckshotGame, PoliticaBot
+from simulacion import crear_estrategia, estrategia_clasica, jugar_partida
+
+# Acciones del bot
+DISPARAR_JUGADOR = 0
+DISPARARSE = 1
+
+
+class EntornoVectorizado:
+    """
+    Lote de partidas que avanzan juntas desde el punto de vista del bot
+
+    step(acciones) aplica un disparo del bot en cada partida, juega los
+    turnos del jugador (estrategia fija) hasta que vuelve a tocarle al bot
+    y reinicia automáticamente las partidas terminadas.
+    Observación: índice plano de (vidas_bot, vidas_jugador, reales, fogueo)
+    """
+
+    def __init__(self, config, num_partidas, estrategia_jugador='contador', semilla=0):
+        self.config = config
+        self.game = BuckshotGame(config)
+        self.num_partidas = num_partidas
+        self.rng = random.Random(semilla)
+        self.decidir_jugador = crear_estrategia(estrategia_jugador, config)
+        self.dimensiones = PoliticaBot.dimensiones_para(config)
+        self.num_estados = 1
+        for d in self.dimensiones:
+            self.num_estados *= d
+
+        self.vidas_jugador = [0] * num_partidas
+        self.vidas_bot = [0] * num_partidas
+        self.escopetas = [None] * num_partidas
+        self.reales = [0] * num_partidas
+        self.fogueo = [0] * num_partidas
+        self.pasos = 0
+        self.partidas_terminadas = 0
+        self.victorias_bot = 0
+
+    def _observar(self, i):
+        return PoliticaBot.indice(self.dimensiones, self.vidas_bot[i], self.vidas_jugador[i],
+                                  self.reales[i], self.fogueo[i])
+
+    def _recargar_si_vacia(self, i):
+        if not self.escopetas[i]:
+            self.escopetas[i], self.reales[i], self.fogueo[i] = self.game.cargar_escopeta(self.rng)
+
+    def _extraer_bala(self, i):
+        self._recargar_si_vacia(i)
+        bala = self.escopetas[i].pop(0)
+        if bala == 1:
+            self.reales[i] -= 1
+        else:
+            self.fogueo[i] -= 1
+        return bala
+
+    def _jugar_turno_jugador(self, i):
+        """Turnos del jugador hasta que pasa al bot. Returns: True si terminó la partida"""
+        while True:
+            self._recargar_si_vacia(i)
+            al_rival = self.decidir_jugador(self.rng, self.reales[i], self.fogueo[i],
+                                            self.vidas_jugador[i], self.vidas_bot[i])
+            bala = self._extraer_bala(i)
+            if al_rival:
+                if bala == 1:
+                    self.vidas_bot[i] -= 1
+                    if self.vidas_bot[i] <= 0:
+                        return True
+                return False
+            if bala == 1:
+                self.vidas_jugador[i] -= 1
+                return self.vidas_jugador[i] <= 0
+
+    def _reiniciar_partida(self, i):
+        """Nueva partida (empieza el jugador) hasta el primer turno del bot"""
+        while True:
+            self.vidas_jugador[i] = self.config.MAX_VIDAS
+            self.vidas_bot[i] = self.config.MAX_VIDAS
+            self.escopetas[i], self.reales[i], self.fogueo[i] = self.game.cargar_escopeta(self.rng)
+            if not self._jugar_turno_jugador(i):
+                self._recargar_si_vacia(i)
+                return self._observar(i)
+
+    def reset(self):
+        return [self._reiniciar_partida(i) for i in range(self.num_partidas)]
+
+    def step(self, acciones):
+        """
+        Returns: (observaciones, recompensas, terminadas)
+        recompensa +1 si gana el bot, -1 si pierde, 0 si sigue la partida.
+        Si una partida termina, la observación es ya la de la partida nueva.
+        """
+        observaciones = [0] * self.num_partidas
+        recompensas = [0] * self.num_partidas
+        terminadas = [False] * self.num_partidas
+
+        for i, accion in enumerate(acciones):
+            bala = self._extraer_bala(i)
+            fin = False
+            gana_bot = False
+
+            if accion == DISPARAR_JUGADOR:
+                if bala == 1:
+                    self.vidas_jugador[i] -= 1
+                    fin = gana_bot = self.vidas_jugador[i] <= 0
+                if not fin:
+                    fin = self._jugar_turno_jugador(i)
+                    gana_bot = fin and self.vidas_jugador[i] <= 0
+            elif bala == 1:
+                # Se dispara con bala real: pierde vida y conserva el turno
+                self.vidas_bot[i] -= 1
+                fin = self.vidas_bot[i] <= 0
+
+            if fin:
+                recompensas[i] = 1 if gana_bot else -1
+                terminadas[i] = True
+                self.partidas_terminadas += 1
+                self.victorias_bot += gana_bot
+                observaciones[i] = self._reiniciar_partida(i)
+            else:
+                self._recargar_si_vacia(i)
+                observaciones[i] = self._observar(i)
+
+        self.pasos += self.num_partidas
+        return observaciones, recompensas, terminadas
+
+
+class EntrenadorQ:
+    """Q-learning tabular con exploración epsilon-greedy decreciente"""
+
+    def __init__(self, entorno, alfa=0.02, gamma=1.0, epsilon_inicial=1.0,
+                 epsilon_final=0.05, semilla=0):
+        self.entorno = entorno
+        self.alfa = alfa
+        self.gamma = gamma
+        self.epsilon_inicial = epsilon_inicial
+        self.epsilon_final = epsilon_final
+        self.rng = random.Random(semilla)
+        self.q = [[0.0, 0.0] for _ in range(entorno.num_estados)]
+        self.visitas = [0] * entorno.num_estados
+
+    def entrenar(self, pasos_totales, al_progreso=None):
+        """Entrenar durante pasos_totales transiciones (suma de todo el lote)"""
+        entorno = self.entorno
+        q = self.q
+        visitas = self.visitas
+        alfa, gamma, rng = self.alfa, self.gamma, self.rng
+        iteraciones = max(pasos_totales // entorno.num_partidas, 1)
+        observaciones = entorno.reset()
+
+        for iteracion in range(iteraciones):
+            progreso = iteracion / iteraciones
+            epsilon = self.epsilon_inicial + (self.epsilon_final - self.epsilon_inicial) * progreso
+
+            acciones = []
+            for estado in observaciones:
+                visitas[estado] += 1
+                if rng.random() < epsilon:
+                    acciones.append(rng.randrange(2))
+                else:
+                    valores = q[estado]
+                    acciones.append(DISPARAR_JUGADOR if valores[0] >= valores[1] else DISPARARSE)
+
+            siguientes, recompensas, terminadas = entorno.step(acciones)
+
+            for estado, accion, recompensa, terminada, siguiente in zip(
+                    observaciones, acciones, recompensas, terminadas, siguientes):
+                objetivo = recompensa
+                if not terminada:
+                    objetivo += gamma * max(q[siguiente])
+                q[estado][accion] += alfa * (objetivo - q[estado][accion])
+
+            observaciones = siguientes
+            if al_progreso and (iteracion + 1) % 100 == 0:
+                al_progreso(iteracion + 1, iteraciones, epsilon)
+
+    def exportar_politica(self):
+        """Política greedy como PoliticaBot ('-' en estados nunca visitados)"""
+        acciones = []
+        for valores, visitas in zip(self.q, self.visitas):
+            if visitas == 0:
+                acciones.append(PoliticaBot.SIN_DATOS)
+            elif valores[0] >= valores[1]:
+                acciones.append(PoliticaBot.DISPARAR_JUGADOR)
+            else:
+                acciones.append(PoliticaBot.DISPARARSE)
+        return PoliticaBot(self.entorno.dimensiones, ''.join(acciones))
+
+
+def evaluar_politica(politica, config, estrategia_jugador='contador', partidas=100_000, semilla=1):
+    """
+    Enfrentar una política (o None para el bot clásico) a una estrategia de jugador
+    Returns: tasa de victorias del bot
+    """
+    game = BuckshotGame(config)
+    rng = random.Random(semilla)
+    decidir_jugador = crear_estrategia(estrategia_jugador, config)
+    clasico = estrategia_clasica(config)
+
+    if politica is None:
+        decidir_bot = clasico
+    else:
+        def decidir_bot(rng, reales, fogueo, vidas_propias, vidas_rival):
+            objetivo = politica.decidir(vidas_propias, vidas_rival, reales, fogueo)
+            if objetivo is None:
+                return clasico(rng, reales, fogueo, vidas_propias, vidas_rival)
+            return objetivo == 'jugador'
+
+    victorias_bot = 0
+    for _ in range(partidas):
+        gana_jugador, _, _ = jugar_partida(game, decidir_jugador, decidir_bot, rng)
+        victorias_bot += not gana_jugador
+    return victorias_bot / partidas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Entrenar bot por self-play (Q-learning tabular)")
+    parser.add_argument('--pasos', type=int, default=5_000_000, help="Transiciones totales")
+    parser.add_argument('--lote', type=int, default=4096, help="Partidas por lote")
+    parser.add_argument('--rival', default='contador', help="Estrategia del jugador rival")
+    parser.add_argument('--alfa', type=float, default=0.02)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--evaluacion', type=int, default=200_000,
+                        help="Partidas para evaluar la política final")
+    parser.add_argument('--salida', default='politica_bot.json')
+    args = parser.parse_args(argv)
+
+    entorno = EntornoVectorizado(Config, args.lote, args.rival, args.semilla)
+    entrenador = EntrenadorQ(entorno, alfa=args.alfa, semilla=args.semilla)
+
+    print(f"🧠 Entrenando bot contra '{args.rival}': {args.pasos} pasos, lote {args.lote}")
+    inicio = time.perf_counter()
+
+    def al_progreso(iteracion, total, epsilon):
+        transcurrido = time.perf_counter() - inicio
+        print(f"   [{iteracion}/{total}] epsilon={epsilon:.3f} "
+              f"{entorno.pasos / transcurrido:,.0f} pasos/s")
+
+    entrenador.entrenar(args.pasos, al_progreso)
+    duracion = time.perf_counter() - inicio
+    politica = entrenador.exportar_politica()
+
+    tasa_politica = evaluar_politica(politica, Config, args.rival, args.evaluacion)
+    tasa_clasico = evaluar_politica(None, Config, args.rival, args.evaluacion)
+
+    politica.guardar(args.salida, {
+        'rival': args.rival,
+        'pasos': entorno.pasos,
+        'victorias_bot': round(tasa_politica, 4),
+        'victorias_bot_clasico': round(tasa_clasico, 4)
+    })
+
+    print(f"\n⏱️  {entorno.pasos} pasos en {duracion:.1f}s ({entorno.pasos / duracion:,.0f} pasos/s)")
+    print(f"📊 Victorias del bot vs '{args.rival}': política {tasa_politica:.4f}, "
+          f"clásico {tasa_clasico:.4f}")
+    print(f"💾 Política guardada en {args.salida} (BOT_POLITICA_PATH={args.salida})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,39 @@
+"""
+Configuración de gunicorn
+    gunicorn app:app            (desde servidor/, carga este fichero)
+    kill -HUP <pid del master>  (reload: los workers nuevos adoptan las
+                                 partidas de los viejos, ver instantanea.py)
+Sin preload_app: cada worker importa app.py después del fork, así los
+hilos del almacén de sesiones, el segador y las instantáneas son suyos.
+Las partidas en curso viven en la memoria del worker que las creó: por
+defecto un solo worker, que escala con `threads`. Con GUNICORN_WORKERS > 1
+hace falta enrutado pegajoso por session_id delante (si no, las peticiones
+que caen en otro worker reciben "Sesión inválida").
+"""
+import os
+import sys
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('GUNICORN_WORKERS', '1'))
+# Hilos por worker (gthread): el pool de PostgreSQL es ThreadedConnectionPool y
+# DB_POOL_MAX debe cubrir estos hilos más los de fondo del worker
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+# Tiempo para terminar las peticiones en curso y escribir la instantánea
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+
+
+def on_starting(server):
+    """Avisar si hay varios workers: las partidas no se comparten entre ellos"""
+    if server.cfg.workers > 1:
+        server.log.warning(
+            "⚠️ %d workers: cada partida vive en el worker que la creó; hace falta "
+            "enrutado pegajoso por session_id o usar GUNICORN_WORKERS=1 y más GUNICORN_THREADS",
+            server.cfg.workers)
+
+
+def worker_exit(server, worker):
+    """Instantánea de las partidas de este worker antes de salir"""
+    modulo = sys.modules.get('app')
+    instantaneas = getattr(modulo, 'instantaneas', None)
+    if instantaneas is not None:
+        instantaneas.cerrar()
@@ -31,12 +31,13 @@ def main():
         
         print("\n✅ Base de datos inicializada correctamente")
         print("\n📊 Tablas creadas:")
-        print("   - puntuaciones (id, nombre, puntos, fecha, session_id)")
-        print("   - sesiones_juego (id, session_id, nombre_jugador, fecha_inicio, fecha_fin, puntos_finales, balas_disparadas)")
+        print("   - puntuaciones (id, nombre, puntos, fecha, session_id, verificada)")
+        print("   - sesiones_juego (id, session_id, nombre_jugador, fecha_inicio, fecha_fin, puntos_finales, balas_disparadas, semilla, abandonada)")
         
         print("\n🎯 Índices creados:")
         print("   - idx_puntuaciones_puntos (para ranking)")
         print("   - idx_puntuaciones_fecha (para filtros por fecha)")
+        print("   - uq_puntuaciones_session (una puntuación por session_id)")
         
         # Verificar que se puede hacer una consulta
         print("\n🧪 Probando consulta...")
@@ -0,0 +1,201 @@
+"""
+Instantáneas de las partidas en memoria (reinicio en caliente)
+- Cada worker escribe sus partidas en INSTANTANEA_DIR/sesiones-<pid>.bin
+  cada INSTANTANEA_INTERVALO segundos y al salir (worker_exit de
+  gunicorn, SIGTERM o atexit).
+- Los ficheros de procesos que ya no existen los adopta el primer worker
+  que los reclama (rename atómico): así, en un reload de gunicorn, las
+  partidas pasan de los workers viejos a los nuevos.
+Formato: MAGIA, nº de partidas, registros (session_id, EstadoSesion
+empaquetado, caché de idempotencia en JSON, segundos sin acceso) y
+CRC32 al final. La carga lee el fichero con mmap.
+Las partidas hibernadas no van en la instantánea: ya están en disco.
+"""
+import gc
+import glob
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from metricas import metricas, proceso_vivo
+from models import EstadoSesion
+
+logger = logging.getLogger(__name__)
+
+MAGIA = b'BKSN\x02'
+CABECERA = struct.Struct('<I')
+# largo del session_id, largo de la partida, largo de las respuestas, segundos sin acceso
+REGISTRO = struct.Struct('<BIIf')
+# Versión 1 (largo de la partida en 16 bits): se sigue leyendo
+REGISTROS = {MAGIA: REGISTRO, b'BKSN\x01': struct.Struct('<BHIf')}
+CRC = struct.Struct('<I')
+
+
+def escribir(ruta, partidas):
+    """
+    Escribir [(session_id, EstadoSesion), ...] en ruta (fichero temporal +
+    fsync + rename: nunca queda una instantánea a medias)
+    Returns: partidas escritas
+    """
+    ahora = time.monotonic()
+    trozos = [MAGIA, CABECERA.pack(len(partidas))]
+    for session_id, sesion in partidas:
+        clave = session_id.encode()
+        datos = sesion.empaquetar()
+        respuestas = json.dumps(list(sesion.respuestas.items())).encode() if sesion.respuestas else b''
+        trozos.append(REGISTRO.pack(len(clave), len(datos), len(respuestas), ahora - sesion.ultimo_acceso))
+        trozos.append(clave)
+        trozos.append(datos)
+        trozos.append(respuestas)
+    cuerpo = b''.join(trozos)
+
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, 'wb') as f:
+        f.write(cuerpo)
+        f.write(CRC.pack(zlib.crc32(cuerpo)))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, ruta)
+    return len(partidas)
+
+
+def leer(ruta):
+    """Returns: lista de (session_id, EstadoSesion) con ultimo_acceso relativo a ahora"""
+    with open(ruta, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as datos:
+        fin = len(datos) - CRC.size
+        registro = REGISTROS.get(datos[:len(MAGIA)])
+        if fin < len(MAGIA) + CABECERA.size or registro is None:
+            raise ValueError(f"{ruta} no es una instantánea de sesiones")
+        with memoryview(datos) as vista:
+            if zlib.crc32(vista[:fin]) != CRC.unpack_from(datos, fin)[0]:
+                raise ValueError(f"{ruta}: CRC incorrecto")
+
+        (total,) = CABECERA.unpack_from(datos, len(MAGIA))
+        posicion = len(MAGIA) + CABECERA.size
+        ahora = time.monotonic()
+        partidas = []
+        # Millones de objetos sin ciclos: las pasadas del GC duplicarían el tiempo de carga
+        gc_activo = gc.isenabled()
+        gc.disable()
+        try:
+            for _ in range(total):
+                largo_clave, largo_datos, largo_respuestas, edad = registro.unpack_from(datos, posicion)
+                posicion += registro.size
+                session_id = datos[posicion:posicion + largo_clave].decode()
+                posicion += largo_clave
+                sesion = EstadoSesion.desempaquetar(datos[posicion:posicion + largo_datos])
+                posicion += largo_datos
+                if largo_respuestas:
+                    sesion.respuestas = OrderedDict(json.loads(datos[posicion:posicion + largo_respuestas]))
+                    posicion += largo_respuestas
+                sesion.ultimo_acceso = ahora - edad
+                partidas.append((session_id, sesion))
+        finally:
+            if gc_activo:
+                gc.enable()
+        return partidas
+
+
+class Instantaneas:
+    """Instantáneas periódicas del almacén de este worker y adopción de las huérfanas"""
+
+    PATRON = re.compile(r'sesiones-(\d+)\.bin$')
+
+    def __init__(self, almacen, directorio):
+        self.almacen = almacen
+        self.directorio = directorio
+        self.ruta = os.path.join(directorio, f"sesiones-{os.getpid()}.bin")
+        self._escrita = False
+        self._cerrada = False
+        self._lock = threading.Lock()
+        os.makedirs(directorio, exist_ok=True)
+
+    def guardar(self):
+        """
+        Escribir la instantánea de este worker. Las partidas se copian con el
+        lock del almacén y se empaquetan fuera: una partida a mitad de una
+        petición puede quedar a medias en un checkpoint (no en la de salida)
+        """
+        with self._lock:
+            inicio = time.perf_counter()
+            partidas = self.almacen.copiar_calientes()
+            escribir(self.ruta, partidas)
+            self._escrita = True
+            segundos = time.perf_counter() - inicio
+        metricas.observar('buckshot_instantanea_segundos', segundos)
+        logger.info("📸 Instantánea: %d partidas en %.0f ms (%s)", len(partidas), segundos * 1000, self.ruta)
+        return len(partidas)
+
+    def cerrar(self):
+        """Última instantánea al salir (una sola vez; después no se adopta nada)"""
+        with self._lock:
+            if self._cerrada:
+                return 0
+            self._cerrada = True
+        return self.guardar()
+
+    def _huerfanas(self):
+        for ruta in glob.glob(os.path.join(self.directorio, 'sesiones-*.bin')):
+            coincidencia = self.PATRON.search(ruta)
+            if not coincidencia:
+                continue
+            pid = int(coincidencia.group(1))
+            # Con nuestro pid solo es huérfana si aún no la hemos escrito (pid reutilizado)
+            if pid == os.getpid() and self._escrita:
+                continue
+            if pid != os.getpid() and proceso_vivo(pid):
+                continue
+            yield ruta
+
+    def adoptar(self):
+        """Cargar las instantáneas de procesos muertos. Returns: partidas adoptadas"""
+        total = 0
+        for ruta in self._huerfanas():
+            reclamada = f"{ruta}.{os.getpid()}.adoptando"
+            with self._lock:
+                if self._cerrada:
+                    break  # este worker está saliendo
+                try:
+                    os.rename(ruta, reclamada)
+                except FileNotFoundError:
+                    continue  # la reclamó otro worker
+                inicio = time.perf_counter()
+                try:
+                    adoptadas = self.almacen.adoptar(leer(reclamada))
+                except (OSError, ValueError, struct.error) as e:
+                    logger.error("❌ Instantánea %s descartada: %s", ruta, e)
+                    os.replace(reclamada, f"{ruta}.corrupta")
+                    continue
+                os.remove(reclamada)
+            segundos = time.perf_counter() - inicio
+            metricas.observar('buckshot_restauracion_segundos', segundos)
+            metricas.contar('buckshot_sesiones_restauradas_total', n=adoptadas)
+            logger.info("♻️ %d partidas restauradas de %s en %.0f ms", adoptadas, ruta, segundos * 1000)
+            total += adoptadas
+        return total
+
+    def arrancar(self, intervalo, sondeo=1.0):
+        """
+        Hilo daemon: adoptar huérfanas cada `sondeo` segundos (los workers
+        viejos de un reload salen después de arrancar los nuevos) y guardar
+        cada `intervalo` segundos
+        """
+        def bucle():
+            proximo_guardado = time.monotonic() + intervalo
+            while not self._cerrada:
+                try:
+                    self.adoptar()
+                    if intervalo > 0 and time.monotonic() >= proximo_guardado:
+                        self.guardar()
+                        proximo_guardado = time.monotonic() + intervalo
+                except Exception as e:
+                    logger.error("❌ Error en las instantáneas de sesiones: %s", e)
+                time.sleep(sondeo)
+        threading.Thread(target=bucle, daemon=True).start()
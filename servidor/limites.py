@@ -0,0 +1,63 @@
+"""
+Límite de peticiones por cliente (cubeta de fichas por IP)
+Cada IP tiene `rafaga` fichas que se rellenan a `por_minuto`; una petición
+sin ficha se rechaza con 429 y Retry-After. El estado es de cada worker
+(con N workers el límite efectivo es N veces el configurado) y solo se
+guardan las `max_clientes` IPs usadas más recientemente.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import jsonify, request
+
+from metricas import metricas
+
+
+class LimitadorPeticiones:
+    """Cubeta de fichas por clave (IP del cliente)"""
+
+    def __init__(self, por_minuto, rafaga=None, max_clientes=10000):
+        self.ritmo = por_minuto / 60.0
+        self.rafaga = rafaga or max(int(por_minuto), 1)
+        self.max_clientes = max_clientes
+        self._cubetas = OrderedDict()  # clave -> (fichas, instante)
+        self._lock = threading.Lock()
+
+    def consumir(self, clave, ahora=None):
+        """Returns: 0 si se permite, o segundos hasta la siguiente ficha"""
+        ahora = time.monotonic() if ahora is None else ahora
+        with self._lock:
+            fichas, instante = self._cubetas.pop(clave, (self.rafaga, ahora))
+            fichas = min(self.rafaga, fichas + (ahora - instante) * self.ritmo)
+            espera = 0.0
+            if fichas >= 1:
+                fichas -= 1
+            else:
+                espera = (1 - fichas) / self.ritmo
+            self._cubetas[clave] = (fichas, ahora)
+            while len(self._cubetas) > self.max_clientes:
+                self._cubetas.popitem(last=False)
+        return espera
+
+
+def limitado(limitador, nombre):
+    """Decorador de vista: 429 con Retry-After si la IP agotó sus peticiones"""
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            espera = limitador.consumir(request.remote_addr)
+            if espera:
+                metricas.contar('buckshot_peticiones_limitadas_total', (('limite', nombre),))
+                respuesta = jsonify({'error': True, 'mensaje': 'Demasiadas peticiones, espera un poco'})
+                respuesta.headers['Retry-After'] = str(math.ceil(espera))
+                return respuesta, 429
+            return vista(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+metricas.describir('buckshot_peticiones_limitadas_total', 'counter',
+                   'Peticiones rechazadas con 429 por límite de peticiones por IP')
@@ -0,0 +1,155 @@
+"""
+Contabilidad de memoria del servidor
+- Estimación de bytes por partida en `sesiones` (tamaño profundo de una
+  muestra de partidas) y del almacén completo.
+- Informe de tracemalloc: sitios con más memoria y diferencia con el
+  informe anterior (solo si se arrancó con MEMORIA_TRACEMALLOC > 0).
+"""
+import gc
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Inmutables compartidos que no cuentan como memoria de una partida
+_ATOMICOS = (bool, type(None), type, type(len))
+
+
+def tamano_profundo(objeto, vistos=None):
+    """Bytes de objeto y de todo lo que alcanza (dict, list, tuple, set, __slots__, __dict__)"""
+    if vistos is None:
+        vistos = set()
+    total = 0
+    pendientes = [objeto]
+    while pendientes:
+        actual = pendientes.pop()
+        if id(actual) in vistos or isinstance(actual, _ATOMICOS):
+            continue
+        if type(actual) is int and -5 <= actual <= 256:
+            continue  # enteros pequeños: caché de CPython
+        vistos.add(id(actual))
+        total += sys.getsizeof(actual)
+        if isinstance(actual, dict):
+            pendientes.extend(actual.keys())
+            pendientes.extend(actual.values())
+        elif isinstance(actual, (list, tuple, set, frozenset)):
+            pendientes.extend(actual)
+        else:
+            for slot in getattr(type(actual), '__slots__', ()):
+                if hasattr(actual, slot):
+                    pendientes.append(getattr(actual, slot))
+            if hasattr(actual, '__dict__'):
+                pendientes.append(actual.__dict__)
+    return total
+
+
+def estimar_sesiones(partidas, muestra=200, rng=random, bytes_tabla=0):
+    """
+    Bytes por partida (media de una muestra) y total estimado del almacén
+    partidas: lista de (session_id, partida) (AlmacenSesiones.copiar_calientes)
+    bytes_tabla: tamaño de la tabla hash del almacén
+    """
+    n = len(partidas)
+    if not n:
+        return {'sesiones': 0, 'bytes_por_sesion': 0, 'bytes_almacen': bytes_tabla}
+
+    medidas = []
+    for clave, sesion in rng.sample(partidas, min(muestra, n)):
+        try:
+            # Los nombres de los campos de un dict son literales compartidos por todas las partidas
+            campos = {id(campo) for campo in list(sesion)} if isinstance(sesion, dict) else set()
+            medidas.append(tamano_profundo(clave) + tamano_profundo(sesion, campos))
+        except RuntimeError:
+            continue  # la partida cambió durante la medida
+    por_sesion = sum(medidas) / len(medidas) if medidas else 0
+    return {
+        'sesiones': n,
+        'muestra': len(medidas),
+        'bytes_por_sesion': round(por_sesion),
+        'bytes_almacen': round(por_sesion * n) + bytes_tabla
+    }
+
+
+def rss_actual():
+    """RSS del proceso en bytes (/proc; en otros sistemas el máximo de getrusage)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        if resource is None:
+            return 0
+        maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maximo if sys.platform == 'darwin' else maximo * 1024
+
+
+class ContableMemoria:
+    """Estimación periódica del almacén de sesiones e informes de tracemalloc"""
+
+    def __init__(self, almacen, muestra=200):
+        """almacen: AlmacenSesiones (las partidas se copian con su lock)"""
+        self.almacen = almacen
+        self.muestra = muestra
+        self.ultima = {'sesiones': 0, 'bytes_por_sesion': 0, 'bytes_almacen': 0}
+        self._instantanea = None
+        self._lock = threading.Lock()
+
+    def actualizar(self):
+        self.ultima = estimar_sesiones(self.almacen.copiar_calientes(), self.muestra,
+                                       bytes_tabla=sys.getsizeof(self.almacen.calientes))
+        return self.ultima
+
+    def arrancar(self, intervalo):
+        """Recalcular la estimación cada intervalo segundos (hilo daemon)"""
+        def bucle():
+            while True:
+                try:
+                    self.actualizar()
+                except Exception as e:
+                    logger.error("❌ Error al estimar la memoria de las sesiones: %s", e)
+                time.sleep(intervalo)
+        threading.Thread(target=bucle, daemon=True).start()
+
+    def informe(self, limite=20, agrupar='lineno'):
+        """
+        Estimación de sesiones, RSS y, con tracemalloc activo, los sitios
+        con más memoria y la diferencia desde el informe anterior
+        """
+        datos = {
+            'rss_bytes': rss_actual(),
+            'objetos_gc': len(gc.get_objects()),
+            'sesiones': self.actualizar(),
+            'tracemalloc': tracemalloc.is_tracing()
+        }
+        if not tracemalloc.is_tracing():
+            return datos
+
+        instantanea = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        actual, pico = tracemalloc.get_traced_memory()
+        datos['trazado_bytes'] = actual
+        datos['pico_bytes'] = pico
+        datos['top'] = [
+            {'sitio': str(estadistica.traceback), 'bytes': estadistica.size, 'bloques': estadistica.count}
+            for estadistica in instantanea.statistics(agrupar)[:limite]
+        ]
+        with self._lock:
+            anterior, self._instantanea = self._instantanea, instantanea
+        if anterior is not None:
+            datos['diferencia'] = [
+                {'sitio': str(estadistica.traceback), 'bytes': estadistica.size_diff,
+                 'bloques': estadistica.count_diff}
+                for estadistica in instantanea.compare_to(anterior, agrupar)[:limite]
+            ]
+        return datos
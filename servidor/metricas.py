@@ -0,0 +1,255 @@
+"""
+Métricas del servidor en formato de texto de Prometheus
+Cada hilo escribe en sus propios contadores (sin locks en el camino de
+la petición); al pedir /metrics se suman los de todos los hilos. Con
+varios workers de gunicorn cada proceso vuelca su total a METRICAS_DIR
+y el worker que atiende /metrics agrega los ficheros de todos (el
+directorio debe vaciarse antes de arrancar el servidor).
+"""
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Límites de los buckets de latencia (segundos)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Shard:
+    """Contadores e histogramas de un hilo"""
+
+    def __init__(self, hilo):
+        self.hilo = hilo
+        self.contadores = {}
+        self.histogramas = {}
+
+
+def _sumar(destino_contadores, destino_histogramas, contadores, histogramas):
+    for clave, valor in contadores.items():
+        destino_contadores[clave] = destino_contadores.get(clave, 0) + valor
+    for clave, valores in histogramas.items():
+        acumulado = destino_histogramas.get(clave)
+        if acumulado is None:
+            destino_histogramas[clave] = list(valores)
+        else:
+            for i, valor in enumerate(valores):
+                acumulado[i] += valor
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _etiquetas(etiquetas, extra=None):
+    pares = list(etiquetas) + ([extra] if extra else [])
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{k}="{_escapar(v)}"' for k, v in pares) + '}'
+
+
+class Metricas:
+    """Registro de contadores, histogramas y gauges del proceso"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.descripciones = {}
+        self.gauges = {}
+        self._local = threading.local()
+        self._shards = []
+        # Totales de hilos ya terminados (el servidor de desarrollo usa un hilo por petición)
+        self._retirados = _Shard(None)
+        self._lock = threading.Lock()
+        self._lock_volcado = threading.Lock()
+        self.directorio = None
+
+    # ========== REGISTRO ==========
+
+    def describir(self, nombre, tipo, ayuda):
+        self.descripciones[nombre] = (tipo, ayuda)
+
+    def gauge(self, nombre, funcion, ayuda):
+        """Gauge calculado al pedir /metrics (ej. len(sesiones))"""
+        self.describir(nombre, 'gauge', ayuda)
+        self.gauges[nombre] = funcion
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard(threading.current_thread())
+            with self._lock:
+                self._shards.append(shard)
+                if len(self._shards) > 2 * threading.active_count():
+                    self._retirar_muertos()
+        return shard
+
+    def _retirar_muertos(self):
+        """Pasar a _retirados los shards de hilos terminados (con _lock)"""
+        vivos = []
+        for shard in self._shards:
+            if shard.hilo.is_alive():
+                vivos.append(shard)
+            else:
+                _sumar(self._retirados.contadores, self._retirados.histogramas,
+                       shard.contadores, shard.histogramas)
+        self._shards = vivos
+
+    # ========== ESCRITURA (camino de la petición) ==========
+
+    def contar(self, nombre, etiquetas=(), n=1):
+        contadores = self._shard().contadores
+        clave = (nombre, etiquetas)
+        contadores[clave] = contadores.get(clave, 0) + n
+
+    def observar(self, nombre, segundos, etiquetas=()):
+        histogramas = self._shard().histogramas
+        clave = (nombre, etiquetas)
+        valores = histogramas.get(clave)
+        if valores is None:
+            # un contador por bucket + el de +Inf, suma y número de observaciones
+            valores = histogramas[clave] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        valores[bisect.bisect_left(self.buckets, segundos)] += 1
+        valores[-2] += segundos
+        valores[-1] += 1
+
+    @contextmanager
+    def medir(self, nombre, etiquetas=()):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(nombre, time.perf_counter() - inicio, etiquetas)
+
+    # ========== AGREGACIÓN ==========
+
+    def totales(self):
+        """Returns: (contadores, histogramas, gauges) de este proceso"""
+        contadores, histogramas = {}, {}
+        with self._lock:
+            self._retirar_muertos()
+            shards = [self._retirados] + list(self._shards)
+        for shard in shards:
+            # copias: el hilo dueño puede estar escribiendo mientras tanto
+            _sumar(contadores, histogramas, dict(shard.contadores),
+                   {k: list(v) for k, v in list(shard.histogramas.items())})
+        gauges = {(nombre, ()): funcion() for nombre, funcion in self.gauges.items()}
+        return contadores, histogramas, gauges
+
+    def usar_directorio(self, directorio, intervalo=5.0):
+        """
+        Modo multiproceso: volcar los totales a directorio/<pid>.json cada
+        intervalo segundos (y al pedir /metrics)
+        """
+        os.makedirs(directorio, exist_ok=True)
+        self.directorio = directorio
+
+        def volcar_periodicamente():
+            while True:
+                time.sleep(intervalo)
+                self.volcar()
+        threading.Thread(target=volcar_periodicamente, daemon=True).start()
+
+    def volcar(self):
+        """Escribir los totales del proceso (reemplazo atómico)"""
+        contadores, histogramas, gauges = self.totales()
+        datos = {
+            'pid': os.getpid(),
+            'contadores': [[n, list(e), v] for (n, e), v in contadores.items()],
+            'histogramas': [[n, list(e), v] for (n, e), v in histogramas.items()],
+            'gauges': [[n, list(e), v] for (n, e), v in gauges.items()]
+        }
+        ruta = os.path.join(self.directorio, f"{os.getpid()}.json")
+        with self._lock_volcado:
+            with open(ruta + ".tmp", 'w') as f:
+                json.dump(datos, f)
+            os.replace(ruta + ".tmp", ruta)
+
+    def _totales_directorio(self):
+        """Sumar los ficheros de todos los workers; gauges solo de los vivos"""
+        self.volcar()
+        contadores, histogramas, gauges = {}, {}, {}
+        for ruta in glob.glob(os.path.join(self.directorio, "*.json")):
+            try:
+                with open(ruta) as f:
+                    datos = json.load(f)
+            except (OSError, ValueError):
+                continue
+            _sumar(contadores, histogramas, _claves(datos['contadores']), _claves(datos['histogramas']))
+            if proceso_vivo(datos['pid']):
+                for clave, valor in _claves(datos['gauges']).items():
+                    gauges[clave] = gauges.get(clave, 0) + valor
+        return contadores, histogramas, gauges
+
+    # ========== EXPOSICIÓN ==========
+
+    def exponer(self):
+        """Texto de /metrics (formato de exposición de Prometheus 0.0.4)"""
+        if self.directorio:
+            contadores, histogramas, gauges = self._totales_directorio()
+        else:
+            contadores, histogramas, gauges = self.totales()
+
+        por_nombre = {}
+        for valores in (contadores, gauges):
+            for (nombre, etiquetas), valor in valores.items():
+                por_nombre.setdefault(nombre, []).append((etiquetas, valor))
+        for (nombre, etiquetas), valores in histogramas.items():
+            por_nombre.setdefault(nombre, []).append((etiquetas, valores))
+
+        lineas = []
+        for nombre in sorted(por_nombre):
+            tipo, ayuda = self.descripciones.get(nombre, ('untyped', nombre))
+            lineas.append(f"# HELP {nombre} {ayuda}")
+            lineas.append(f"# TYPE {nombre} {tipo}")
+            for etiquetas, valor in sorted(por_nombre[nombre]):
+                if tipo != 'histogram':
+                    lineas.append(f"{nombre}{_etiquetas(etiquetas)} {valor}")
+                    continue
+                acumulado = 0
+                for limite, n in zip(self.buckets + ('+Inf',), valor):
+                    acumulado += n
+                    lineas.append(f"{nombre}_bucket{_etiquetas(etiquetas, ('le', limite))} {acumulado}")
+                lineas.append(f"{nombre}_sum{_etiquetas(etiquetas)} {valor[-2]}")
+                lineas.append(f"{nombre}_count{_etiquetas(etiquetas)} {valor[-1]}")
+        return "\n".join(lineas) + "\n"
+
+
+def _claves(filas):
+    """Filas [nombre, etiquetas, valor] del fichero -> {(nombre, etiquetas): valor}"""
+    return {(n, tuple(map(tuple, e))): v for n, e, v in filas}
+
+
+def proceso_vivo(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+# Instancia global (la usan app.py y database.py)
+metricas = Metricas()
+metricas.describir('buckshot_peticiones_total', 'counter', 'Peticiones HTTP por ruta, método y estado')
+metricas.describir('buckshot_peticion_segundos', 'histogram', 'Latencia de las peticiones HTTP por ruta')
+metricas.describir('buckshot_db_consulta_segundos', 'histogram', 'Duración de las consultas a la base de datos')
+metricas.describir('buckshot_db_espera_pool_segundos', 'histogram', 'Espera para obtener una conexión del pool')
+metricas.describir('buckshot_fin_partida_segundos', 'histogram', 'Escritura en base de datos al terminar una partida')
+metricas.describir('buckshot_sesiones_abandonadas_total', 'counter', 'Partidas cerradas por inactividad (origen memoria/disco)')
+metricas.describir('buckshot_segador_retraso_segundos', 'histogram', 'Retraso del segador respecto al vencimiento de cada partida')
+metricas.describir('buckshot_segador_tick_segundos', 'histogram', 'Duración de un tick del segador')
+metricas.describir('buckshot_segador_errores_total', 'counter', 'Lotes de abandonadas que no se pudieron marcar en la BD')
+metricas.describir('buckshot_instantanea_segundos', 'histogram', 'Escritura de la instantánea de partidas de un worker')
+metricas.describir('buckshot_restauracion_segundos', 'histogram', 'Carga de una instantánea de partidas adoptada')
+metricas.describir('buckshot_sesiones_restauradas_total', 'counter', 'Partidas adoptadas de instantáneas de otros procesos')
+metricas.describir('buckshot_diario_fsync_segundos', 'histogram', 'write + fsync de un lote del diario de resultados')
+metricas.describir('buckshot_diario_fsync_total', 'counter', 'Lotes escritos en el diario de resultados')
+metricas.describir('buckshot_diario_anotados_total', 'counter', 'Resultados confirmados en el diario')
+metricas.describir('buckshot_diario_reproducidos_total', 'counter', 'Resultados del diario pasados a la BD')
+metricas.describir('buckshot_diario_duplicados_total', 'counter', 'Resultados del diario que ya estaban en la BD')
+metricas.describir('buckshot_diario_rechazados_total', 'counter', 'Resultados del diario rechazados al validarlos (no se reintentan)')
+metricas.describir('buckshot_diario_reproduccion_segundos', 'histogram', 'Reproducción en la BD de lo pendiente del diario')
+metricas.describir('buckshot_diario_errores_bd_total', 'counter', 'Reproducciones del diario fallidas (se reintentan)')
@@ -3,6 +3,10 @@ Modelos de datos y lógica del juego
 """
 import random
 import secrets
+import hashlib
+import hmac
+import json
+import struct
 from datetime import datetime
 import logging
 
@@ -12,36 +16,264 @@ logger = logging.getLogger(__name__)
 db = None
 
 
+def derivar_semilla(semilla_base, *claves):
+    """
+    Derivar una semilla independiente y reproducible a partir de una
+    semilla base y una o más claves (ej. índice de shard o session_id)
+    """
+    material = ":".join(str(parte) for parte in (semilla_base,) + claves)
+    digest = hashlib.blake2b(material.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+class FlujoAleatorio:
+    """
+    Generador pseudoaleatorio de una sesión (SplitMix64)
+    Todo su estado es un entero de 64 bits, así que la secuencia completa
+    de cargas y decisiones del bot se puede regenerar a partir de la semilla.
+    Implementa lo que usa el juego de la API de random: random, randint,
+    randrange y shuffle.
+    """
+    
+    __slots__ = ('estado',)
+    
+    MASCARA = (1 << 64) - 1
+    
+    def __init__(self, semilla):
+        self.estado = semilla & self.MASCARA
+    
+    def _siguiente(self):
+        """Siguiente salida de 64 bits"""
+        self.estado = z = (self.estado + 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+        return z ^ (z >> 31)
+    
+    def random(self):
+        """Float uniforme en [0, 1) con 53 bits de precisión"""
+        return (self._siguiente() >> 11) * (1.0 / 9007199254740992)
+    
+    def randrange(self, n):
+        """Entero uniforme en [0, n) sin sesgo de módulo (rechazo)"""
+        limite = (1 << 64) - (1 << 64) % n
+        while True:
+            r = self._siguiente()
+            if r < limite:
+                return r % n
+    
+    def randint(self, a, b):
+        """Entero uniforme en [a, b]"""
+        return a + self.randrange(b - a + 1)
+    
+    def shuffle(self, lista):
+        """Fisher-Yates in situ"""
+        for i in range(len(lista) - 1, 0, -1):
+            j = self.randrange(i + 1)
+            lista[i], lista[j] = lista[j], lista[i]
+
+
+class EstadoSesion:
+    """
+    Estado de una partida en memoria (una entrada de `sesiones`)
+    Atributos con __slots__ en lugar de un dict por partida, y la escopeta
+    como bytearray (1 = real, 0 = fogueo). empaquetar/desempaquetar dan
+    una representación binaria compacta para guardarla fuera de memoria.
+    """
+    
+    __slots__ = ('nombre', 'vidas_jugador', 'vidas_bot', 'puntos', 'escopeta',
+                 'turno_jugador', 'balas_disparadas', 'semilla', 'rng', 'auto_bot',
+                 'respuestas', 'ultimo_acceso')
+    
+    # versión, vidas jugador/bot, puntos, balas disparadas, turno, auto_bot,
+    # semilla, estado del rng, nº de balas, longitud del nombre
+    CABECERA = struct.Struct('<BbbIH??QQBI')
+    VERSION = 1
+    
+    def __init__(self, nombre, vidas, escopeta, semilla, rng, auto_bot=False):
+        self.nombre = nombre
+        self.vidas_jugador = vidas
+        self.vidas_bot = vidas
+        self.puntos = 0
+        self.escopeta = bytearray(escopeta)
+        self.turno_jugador = True
+        self.balas_disparadas = 0
+        self.semilla = semilla
+        self.rng = rng
+        self.auto_bot = auto_bot
+        # Caché de idempotencia (OrderedDict), solo si el cliente manda claves
+        self.respuestas = None
+        # time.monotonic() del último acceso (lo mantiene AlmacenSesiones)
+        self.ultimo_acceso = 0.0
+    
+    def empaquetar(self):
+        """Bytes de la partida (sin la caché de idempotencia ni el último acceso)"""
+        nombre = self.nombre.encode('utf-8')
+        return self.CABECERA.pack(
+            self.VERSION, self.vidas_jugador, self.vidas_bot, self.puntos,
+            self.balas_disparadas, self.turno_jugador, self.auto_bot,
+            self.semilla, self.rng.estado, len(self.escopeta), len(nombre)
+        ) + bytes(self.escopeta) + nombre
+    
+    @classmethod
+    def desempaquetar(cls, datos):
+        """Inverso de empaquetar"""
+        (version, vidas_jugador, vidas_bot, puntos, balas_disparadas, turno_jugador,
+         auto_bot, semilla, estado_rng, num_balas, largo_nombre) = cls.CABECERA.unpack_from(datos)
+        if version != cls.VERSION:
+            raise ValueError(f"Versión de EstadoSesion desconocida: {version}")
+        inicio = cls.CABECERA.size
+        rng = FlujoAleatorio(0)
+        rng.estado = estado_rng
+        sesion = cls(datos[inicio + num_balas:inicio + num_balas + largo_nombre].decode('utf-8'),
+                     vidas_jugador, datos[inicio:inicio + num_balas], semilla, rng, auto_bot)
+        sesion.vidas_bot = vidas_bot
+        sesion.puntos = puntos
+        sesion.turno_jugador = turno_jugador
+        sesion.balas_disparadas = balas_disparadas
+        return sesion
+
+
+class PoliticaBot:
+    """
+    Tabla de decisiones del bot aprendida por self-play
+    Estado: (vidas_bot, vidas_jugador, reales_restantes, fogueo_restantes)
+    Acciones: '0' = disparar al jugador, '1' = dispararse, '-' = sin datos
+    """
+    
+    DISPARAR_JUGADOR = '0'
+    DISPARARSE = '1'
+    SIN_DATOS = '-'
+    
+    def __init__(self, dimensiones, acciones):
+        self.dimensiones = tuple(dimensiones)
+        self.acciones = acciones
+    
+    @staticmethod
+    def dimensiones_para(config):
+        """Tamaño de cada eje del estado para una configuración"""
+        return (
+            config.MAX_VIDAS + 1,
+            config.MAX_VIDAS + 1,
+            config.MAX_BALAS_REALES + 1,
+            config.MAX_BALAS_FOGUEO + 1
+        )
+    
+    @staticmethod
+    def indice(dimensiones, vidas_bot, vidas_jugador, reales, fogueo):
+        """Índice plano del estado en la tabla"""
+        _, dim_vj, dim_r, dim_f = dimensiones
+        return ((vidas_bot * dim_vj + vidas_jugador) * dim_r + reales) * dim_f + fogueo
+    
+    def decidir(self, vidas_bot, vidas_jugador, reales, fogueo):
+        """Returns: 'jugador', 'bot' o None si el estado no está en la tabla"""
+        estado = (vidas_bot, vidas_jugador, reales, fogueo)
+        if any(v < 0 or v >= d for v, d in zip(estado, self.dimensiones)):
+            return None
+        accion = self.acciones[self.indice(self.dimensiones, *estado)]
+        if accion == self.DISPARAR_JUGADOR:
+            return 'jugador'
+        if accion == self.DISPARARSE:
+            return 'bot'
+        return None
+    
+    def guardar(self, ruta, metadatos=None):
+        """Exportar tabla a JSON"""
+        with open(ruta, 'w') as f:
+            json.dump({
+                'version': 1,
+                'dimensiones': list(self.dimensiones),
+                'acciones': self.acciones,
+                'metadatos': metadatos or {}
+            }, f)
+    
+    @classmethod
+    def cargar(cls, ruta):
+        """Cargar tabla exportada por guardar()"""
+        with open(ruta) as f:
+            datos = json.load(f)
+        dimensiones = datos['dimensiones']
+        acciones = datos['acciones']
+        total = 1
+        for d in dimensiones:
+            total *= d
+        if len(acciones) != total:
+            raise ValueError(f"Política corrupta: {len(acciones)} acciones para {total} estados")
+        return cls(dimensiones, acciones)
+
+
 class BuckshotGame:
     """Lógica principal del juego Buckshot Roulette"""
     
     def __init__(self, config):
         self.config = config
+        self.politica_bot = None
+        
+        self.semilla_servidor = getattr(config, 'SEMILLA_SERVIDOR', None)
+        if not self.semilla_servidor:
+            # Cada sesión guarda su propia semilla, así que las partidas siguen
+            # siendo reproducibles aunque esta semilla no se conserve
+            self.semilla_servidor = secrets.token_hex(16)
+        
+        ruta_politica = getattr(config, 'BOT_POLITICA_PATH', None)
+        if ruta_politica:
+            try:
+                self.politica_bot = PoliticaBot.cargar(ruta_politica)
+                logger.info("🤖 Política del bot cargada: %s", ruta_politica)
+            except (OSError, ValueError, KeyError) as e:
+                logger.error("❌ No se pudo cargar la política del bot (%s), usando bot clásico", e)
     
-    def cargar_escopeta(self):
+    def cargar_escopeta(self, rng=None):
         """
         Cargar escopeta con balas aleatorias
+        rng: generador a usar (por defecto el módulo random global)
         Returns: (escopeta, num_reales, num_fogueo)
         """
-        num_reales = random.randint(
+        rng = rng or random
+        num_reales = rng.randint(
             self.config.MIN_BALAS_REALES,
             self.config.MAX_BALAS_REALES
         )
-        num_fogueo = random.randint(
+        num_fogueo = rng.randint(
             self.config.MIN_BALAS_FOGUEO,
             self.config.MAX_BALAS_FOGUEO
         )
         
         # 1 = real, 0 = fogueo
         escopeta = [1] * num_reales + [0] * num_fogueo
-        random.shuffle(escopeta)
+        rng.shuffle(escopeta)
         
         return escopeta, num_reales, num_fogueo
     
+    def decidir_objetivo_bot(self, rng=None, estado=None):
+        """
+        Decisión del bot. Con política cargada y estado conocido
+        (vidas_bot, vidas_jugador, reales, fogueo) se consulta la tabla;
+        si no, bot clásico: dispara al jugador con probabilidad
+        BOT_PROB_DISPARAR_JUGADOR y si no se dispara a sí mismo
+        Returns: 'jugador' o 'bot'
+        """
+        if self.politica_bot is not None and estado is not None:
+            objetivo = self.politica_bot.decidir(*estado)
+            if objetivo is not None:
+                return objetivo
+        
+        rng = rng or random
+        if rng.random() < self.config.BOT_PROB_DISPARAR_JUGADOR:
+            return 'jugador'
+        return 'bot'
+    
     def generar_session_id(self):
         """Generar ID único de sesión"""
         return secrets.token_urlsafe(32)
     
+    def semilla_sesion(self, session_id):
+        """Semilla del flujo aleatorio de una sesión (servidor + session_id)"""
+        return derivar_semilla(self.semilla_servidor, session_id)
+    
+    def crear_flujo(self, semilla):
+        """Generador propio de una sesión a partir de su semilla"""
+        return FlujoAleatorio(semilla)
+    
     def procesar_disparo(self, bala, objetivo, turno_jugador):
         """
         Procesar resultado de disparo
@@ -76,11 +308,8 @@ class BuckshotGame:
                     resultado['cambiar_turno'] = False
         
         else:  # turno del bot
-            # Bot decide: 70% disparar al jugador, 30% a sí mismo
-            if random.random() < 0.7:
-                objetivo = 'jugador'
-            else:
-                objetivo = 'bot'
+            # Bot decide según BOT_PROB_DISPARAR_JUGADOR
+            objetivo = self.decidir_objetivo_bot()
             
             if objetivo == 'jugador':
                 if bala == 1:
@@ -100,9 +329,212 @@ class BuckshotGame:
         return resultado
 
 
+def firma_partida(registro, clave):
+    """HMAC-SHA256 del registro de una partida local (JSON canónico, sin 'firma')"""
+    contenido = {k: v for k, v in registro.items() if k != 'firma'}
+    canonico = json.dumps(contenido, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hmac.new(clave.encode(), canonico.encode(), hashlib.sha256).hexdigest()
+
+
+def clave_instalacion(clave_maestra, instalacion):
+    """
+    Clave de firma de una instalación del cliente, derivada de la clave
+    maestra del servidor (no hace falta guardarla: se recalcula al verificar)
+    """
+    return hmac.new(clave_maestra.encode(), f"instalacion:{instalacion}".encode(),
+                    hashlib.sha256).hexdigest()
+
+
+# Límite de jugadas de una partida local subida (una partida real tiene decenas)
+MAX_JUGADAS_LOCALES = 200
+
+
+def reproducir_partida_local(semilla, jugadas, config):
+    """
+    Rejugar una partida del motor local del cliente (cliente/motor_local.py):
+    random.Random(semilla), reglas de config y bot clásico. Las recargas no
+    van en jugadas: ocurren al actuar con la escopeta vacía.
+    jugadas: [[actor, objetivo, bala], ...] en orden
+    Returns: (puntos, balas_disparadas); ValueError si las jugadas no son
+    una partida terminada posible con esa semilla
+    """
+    if not isinstance(semilla, int) or isinstance(semilla, bool) or not 0 <= semilla < 2**64:
+        raise ValueError('Semilla inválida')
+    if not isinstance(jugadas, list) or not jugadas or len(jugadas) > MAX_JUGADAS_LOCALES:
+        raise ValueError('Jugadas inválidas')
+    
+    rng = random.Random(semilla)
+    escopeta = []
+    vidas_jugador = vidas_bot = config.MAX_VIDAS
+    puntos = 0
+    turno_jugador = True
+    
+    def cargar():
+        num_reales = rng.randint(config.MIN_BALAS_REALES, config.MAX_BALAS_REALES)
+        num_fogueo = rng.randint(config.MIN_BALAS_FOGUEO, config.MAX_BALAS_FOGUEO)
+        escopeta[:] = [1] * num_reales + [0] * num_fogueo
+        rng.shuffle(escopeta)
+    
+    cargar()
+    for jugada in jugadas:
+        if vidas_jugador <= 0 or vidas_bot <= 0:
+            raise ValueError('Jugadas después del final de la partida')
+        if not isinstance(jugada, list) or len(jugada) != 3:
+            raise ValueError('Jugada inválida')
+        actor, objetivo, bala = jugada
+        if actor != ('jugador' if turno_jugador else 'bot') or objetivo not in ('jugador', 'bot'):
+            raise ValueError('Jugada fuera de turno')
+        if not escopeta:
+            cargar()
+        if actor == 'bot':
+            decision = 'jugador' if rng.random() < config.BOT_PROB_DISPARAR_JUGADOR else 'bot'
+            if objetivo != decision:
+                raise ValueError('Decisión del bot distinta de la de la semilla')
+        if bala != escopeta.pop(0):
+            raise ValueError('Bala distinta de la cargada')
+        
+        if actor == 'jugador':
+            if objetivo == 'bot':
+                vidas_bot -= bala
+                puntos += config.PUNTOS_BALA_REAL * bala
+                turno_jugador = False
+            elif bala:
+                vidas_jugador -= 1
+                turno_jugador = False
+            else:
+                puntos += config.PUNTOS_FOGUEO_SELF
+        elif objetivo == 'jugador':
+            vidas_jugador -= bala
+            turno_jugador = True
+        else:
+            vidas_bot -= bala
+    
+    if vidas_jugador > 0 and vidas_bot > 0:
+        raise ValueError('Partida sin terminar')
+    return puntos, len(jugadas)
+
+
 class Puntuacion:
     """Modelo para manejar puntuaciones"""
     
+    @staticmethod
+    def validar_entrada(entrada):
+        """
+        Validar una puntuación (formato de los campos)
+        Returns: (fila, None) o (None, motivo)
+        """
+        if not isinstance(entrada, dict):
+            return None, 'Entrada no es un objeto'
+        
+        nombre = entrada.get('nombre')
+        puntos = entrada.get('puntos')
+        session_id = entrada.get('session_id')
+        if not isinstance(nombre, str) or not nombre.strip() or len(nombre) > 100:
+            return None, 'Nombre inválido'
+        if not isinstance(puntos, int) or isinstance(puntos, bool) or puntos < 0:
+            return None, 'Puntos inválidos'
+        if not isinstance(session_id, str) or not session_id or len(session_id) > 100:
+            return None, 'session_id inválido'
+        
+        try:
+            fecha = datetime.strptime(entrada['fecha'], '%Y-%m-%d %H:%M:%S') if entrada.get('fecha') else datetime.now()
+        except (TypeError, ValueError):
+            return None, 'Fecha inválida'
+        
+        return (nombre.strip(), puntos, session_id, fecha), None
+    
+    @staticmethod
+    def verificar_partida_local(entrada, clave_maestra, config):
+        """
+        Validar una partida local subida por un cliente: firma con la clave
+        de su instalación y rejugada desde semilla/jugadas. Los puntos
+        guardados son los de la rejugada, no los que manda el cliente.
+        Solo prueba que la partida es posible: quien elige la semilla conoce
+        todas las balas de antemano. Por eso se guardan como no verificadas
+        Returns: (fila, None) o (None, motivo)
+        """
+        fila, motivo = Puntuacion.validar_entrada(entrada)
+        if fila is None:
+            return None, motivo
+        nombre, puntos, session_id, fecha = fila
+        
+        # Los session_id del servidor no: una subida no puede ocupar el de una partida real
+        if not session_id.startswith('local-'):
+            return None, 'session_id inválido'
+        instalacion = entrada.get('instalacion')
+        firma = entrada.get('firma')
+        if not isinstance(instalacion, str) or not instalacion or len(instalacion) > 64:
+            return None, 'Sin instalación'
+        if not isinstance(firma, str):
+            return None, 'Sin firma'
+        if not hmac.compare_digest(firma, firma_partida(entrada, clave_instalacion(clave_maestra, instalacion))):
+            return None, 'Firma inválida'
+        
+        try:
+            puntos_rejugada, _ = reproducir_partida_local(entrada.get('semilla'), entrada.get('jugadas'), config)
+        except ValueError as e:
+            return None, f'Partida no reproducible: {e}'
+        if puntos_rejugada != puntos:
+            return None, 'Puntos distintos de los de la partida'
+        
+        return (nombre, puntos_rejugada, session_id, fecha), None
+    
+    @staticmethod
+    def guardar_lote(entradas, validar=None, verificadas=True):
+        """
+        Guardar un lote de puntuaciones en una sola sentencia (una transacción)
+        Las que ya existen (mismo session_id) se marcan como duplicadas, así
+        el cliente puede reenviar un lote sin duplicar puntuaciones.
+        validar: función entrada -> (fila, motivo); por defecto validar_entrada
+        (resultados del propio servidor). Las subidas de clientes pasan
+        verificar_partida_local y van con verificadas=False: no entran en el
+        ranking ni en las estadísticas.
+        Returns: lista de {'session_id', 'estado'[, 'mensaje']} en el orden recibido
+        """
+        validar = validar or Puntuacion.validar_entrada
+        resultados = []
+        filas = {}
+        for entrada in entradas:
+            fila, motivo = validar(entrada)
+            if fila is None:
+                session_id = entrada.get('session_id') if isinstance(entrada, dict) else None
+                resultados.append({'session_id': session_id, 'estado': 'invalida', 'mensaje': motivo})
+            else:
+                resultados.append({'session_id': fila[2], 'estado': None})
+                filas.setdefault(fila[2], fila)  # repetidas dentro del lote: la primera
+        
+        guardadas = set()
+        if filas:
+            try:
+                # Índice único uq_puntuaciones_session: dos lotes (o un lote y un
+                # diario) con el mismo session_id no pueden insertar los dos
+                query = """
+                    INSERT INTO puntuaciones (nombre, puntos, session_id, fecha, verificada)
+                    VALUES %s
+                    ON CONFLICT (session_id) WHERE session_id IS NOT NULL DO NOTHING
+                    RETURNING session_id
+                """
+                insertadas = db.execute_values(
+                    query, [fila + (verificadas,) for fila in filas.values()],
+                    template="(%s, %s::integer, %s, %s::timestamp, %s)", fetch=True
+                )
+                guardadas = {row[0] for row in insertadas}
+            except Exception as e:
+                logger.error("❌ Error al guardar lote de puntuaciones: %s", e)
+                raise
+        
+        for resultado in resultados:
+            if resultado['estado'] is None:
+                if resultado['session_id'] in guardadas:
+                    resultado['estado'] = 'guardada'
+                    guardadas.discard(resultado['session_id'])
+                else:
+                    resultado['estado'] = 'duplicada'
+        
+        logger.info("💾 Lote de puntuaciones: %d recibidas, %d guardadas", len(entradas),
+                    sum(r['estado'] == 'guardada' for r in resultados))
+        return resultados
+    
     @staticmethod
     def guardar(nombre, puntos, session_id=None):
         """
@@ -112,6 +544,7 @@ class Puntuacion:
             query = """
                 INSERT INTO puntuaciones (nombre, puntos, session_id, fecha)
                 VALUES (%s, %s, %s, %s)
+                ON CONFLICT (session_id) WHERE session_id IS NOT NULL DO NOTHING
                 RETURNING id
             """
             params = (nombre, puntos, session_id, datetime.now())
@@ -119,13 +552,13 @@ class Puntuacion:
             result = db.execute_one(query, params)
             
             if result:
-                logger.info(f"💾 Puntuación guardada: {nombre} - {puntos} pts")
+                logger.info("💾 Puntuación guardada: %s - %s pts", nombre, puntos)
                 return result[0]
             
             return None
         
         except Exception as e:
-            logger.error(f"❌ Error al guardar puntuación: {e}")
+            logger.error("❌ Error al guardar puntuación: %s", e)
             raise
     
     @staticmethod
@@ -137,6 +570,7 @@ class Puntuacion:
             query = """
                 SELECT nombre, puntos, fecha
                 FROM puntuaciones
+                WHERE verificada
                 ORDER BY puntos DESC, fecha DESC
                 LIMIT %s
             """
@@ -156,7 +590,7 @@ class Puntuacion:
             return ranking
         
         except Exception as e:
-            logger.error(f"❌ Error al obtener ranking: {e}")
+            logger.error("❌ Error al obtener ranking: %s", e)
             raise
     
     @staticmethod
@@ -169,7 +603,7 @@ class Puntuacion:
                 query = """
                     SELECT nombre, puntos, fecha
                     FROM puntuaciones
-                    WHERE fecha >= %s
+                    WHERE verificada AND fecha >= %s
                     ORDER BY puntos DESC, fecha DESC
                     LIMIT %s
                 """
@@ -178,6 +612,7 @@ class Puntuacion:
                 query = """
                     SELECT nombre, puntos, fecha
                     FROM puntuaciones
+                    WHERE verificada
                     ORDER BY puntos DESC, fecha DESC
                     LIMIT %s
                 """
@@ -197,7 +632,7 @@ class Puntuacion:
             return ranking
         
         except Exception as e:
-            logger.error(f"❌ Error al obtener ranking por fecha: {e}")
+            logger.error("❌ Error al obtener ranking por fecha: %s", e)
             raise
     
     @staticmethod
@@ -213,6 +648,7 @@ class Puntuacion:
                     MAX(puntos) as max_puntos,
                     MIN(puntos) as min_puntos
                 FROM puntuaciones
+                WHERE verificada
             """
             
             resultado = db.execute_one(query)
@@ -228,7 +664,7 @@ class Puntuacion:
             return None
         
         except Exception as e:
-            logger.error(f"❌ Error al obtener estadísticas: {e}")
+            logger.error("❌ Error al obtener estadísticas: %s", e)
             raise
 
 
@@ -236,20 +672,20 @@ class SesionJuego:
     """Modelo para manejar sesiones de juego"""
     
     @staticmethod
-    def crear(session_id, nombre_jugador):
-        """Crear nueva sesión"""
+    def crear(session_id, nombre_jugador, semilla=None):
+        """Crear nueva sesión (semilla: para poder regenerar la partida)"""
         try:
             query = """
-                INSERT INTO sesiones_juego (session_id, nombre_jugador)
-                VALUES (%s, %s)
+                INSERT INTO sesiones_juego (session_id, nombre_jugador, semilla)
+                VALUES (%s, %s, %s)
                 RETURNING id
             """
             
-            result = db.execute_one(query, (session_id, nombre_jugador))
+            result = db.execute_one(query, (session_id, nombre_jugador, semilla))
             return result[0] if result else None
         
         except Exception as e:
-            logger.error(f"❌ Error al crear sesión: {e}")
+            logger.error("❌ Error al crear sesión: %s", e)
             raise
     
     @staticmethod
@@ -268,5 +704,45 @@ class SesionJuego:
             )
         
         except Exception as e:
-            logger.error(f"❌ Error al finalizar sesión: {e}")
+            logger.error("❌ Error al finalizar sesión: %s", e)
+            raise
+    
+    @staticmethod
+    def finalizar_lote(filas, abandonada=False):
+        """
+        Finalizar varias sesiones en un solo UPDATE
+        filas: [(session_id, puntos, balas_disparadas, fecha_fin), ...]
+        Returns: número de sesiones finalizadas (las ya terminadas no se tocan,
+        así repetir un lote no cambia nada)
+        """
+        if not filas:
+            return 0
+        try:
+            query = """
+                UPDATE sesiones_juego AS s
+                SET fecha_fin = v.fecha, puntos_finales = v.puntos,
+                    balas_disparadas = v.balas, abandonada = %s
+                FROM (VALUES %%s) AS v(session_id, puntos, balas, fecha)
+                WHERE s.session_id = v.session_id AND s.fecha_fin IS NULL
+                RETURNING s.session_id
+            """ % ('TRUE' if abandonada else 'FALSE')
+            finalizadas = db.execute_values(
+                query, filas,
+                template="(%s, %s::integer, %s::integer, %s::timestamp)", fetch=True
+            )
+            return len(finalizadas)
+        
+        except Exception as e:
+            logger.error("❌ Error al finalizar lote de sesiones: %s", e)
             raise
+    
+    @staticmethod
+    def abandonar_lote(filas):
+        """
+        Marcar como abandonadas varias partidas en un solo UPDATE
+        filas: [(session_id, puntos, balas_disparadas), ...]
+        Returns: número de partidas marcadas
+        """
+        ahora = datetime.now()
+        return SesionJuego.finalizar_lote(
+            [(session_id, puntos, balas, ahora) for session_id, puntos, balas in filas], abandonada=True)
@@ -0,0 +1,176 @@
+"""
+Perfilado bajo demanda del servidor
+- Muestreo: cada 1/hz segundos se leen las pilas de todos los hilos del
+  worker (sys._current_frames) y se cuentan; salida en formato "collapsed"
+  (flamegraph.pl, speedscope) o JSON de speedscope. Muestreos lo ejecuta
+  en su propio hilo: la petición que lo pide no espera. Solo ve el worker
+  que lo ejecuta (con varios workers, un perfil por pid).
+- cProfile por petición: con la cabecera X-Perfil (y el token de admin)
+  la petición se ejecuta bajo cProfile y el .prof se guarda en PERFIL_DIR.
+Solo se registra si PERFILADO está activo: desactivado no añade nada al
+camino de las peticiones.
+"""
+import cProfile
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+
+
+def _marco(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def muestrear(segundos, hz=100, excluir=None):
+    """
+    Pilas de todos los hilos (salvo excluir) durante segundos
+    Returns: (Counter {pila: muestras}, nº de lecturas)
+    """
+    pilas = Counter()
+    intervalo = 1 / hz
+    lecturas = 0
+    fin = time.monotonic() + segundos
+    while time.monotonic() < fin:
+        for ident, frame in sys._current_frames().items():
+            if ident == excluir:
+                continue
+            marcos = []
+            while frame is not None:
+                marcos.append(_marco(frame.f_code))
+                frame = frame.f_back
+            pilas[tuple(reversed(marcos))] += 1
+        lecturas += 1
+        time.sleep(intervalo)
+    return pilas, lecturas
+
+
+class Muestreos:
+    """Muestreos en segundo plano de este worker (uno a la vez) y sus resultados"""
+
+    MAX_GUARDADOS = 8
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._perfiles = OrderedDict()
+        self._contador = 0
+
+    def iniciar(self, segundos, hz):
+        """
+        Empezar un muestreo en otro hilo
+        Returns: dict del perfil (id, pid, estado...) o None si ya hay uno en curso
+        """
+        with self._lock:
+            if any(perfil['estado'] == 'en_curso' for perfil in self._perfiles.values()):
+                return None
+            self._contador += 1
+            perfil = {
+                'id': f"{os.getpid()}-{self._contador}",
+                'pid': os.getpid(),
+                'segundos': segundos,
+                'hz': hz,
+                'estado': 'en_curso',
+                'inicio': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'pilas': None,
+                'lecturas': 0
+            }
+            self._perfiles[perfil['id']] = perfil
+            while len(self._perfiles) > self.MAX_GUARDADOS:
+                self._perfiles.popitem(last=False)
+
+        def ejecutar():
+            estado = 'error'
+            pilas, lecturas = Counter(), 0
+            try:
+                pilas, lecturas = muestrear(segundos, hz, excluir=threading.get_ident())
+                estado = 'terminado'
+            finally:
+                with self._lock:
+                    perfil.update(estado=estado, pilas=pilas, lecturas=lecturas)
+
+        threading.Thread(target=ejecutar, daemon=True).start()
+        return perfil
+
+    def obtener(self, id_perfil):
+        with self._lock:
+            return self._perfiles.get(id_perfil)
+
+
+def a_collapsed(pilas):
+    """Una línea por pila: 'raiz;...;hoja muestras'"""
+    return "".join(f"{';'.join(pila)} {n}\n" for pila, n in pilas.most_common())
+
+
+def a_speedscope(pilas, hz, nombre="buckshot"):
+    """Perfil 'sampled' de speedscope (peso de cada muestra en segundos)"""
+    indices = {}
+    marcos = []
+    muestras = []
+    pesos = []
+    for pila, n in pilas.most_common():
+        fila = []
+        for marco in pila:
+            if marco not in indices:
+                indices[marco] = len(marcos)
+                marcos.append({'name': marco})
+            fila.append(indices[marco])
+        muestras.append(fila)
+        pesos.append(n / hz)
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'shared': {'frames': marcos},
+        'profiles': [{
+            'type': 'sampled',
+            'name': nombre,
+            'unit': 'seconds',
+            'startValue': 0,
+            'endValue': sum(pesos),
+            'samples': muestras,
+            'weights': pesos
+        }],
+        'name': nombre,
+        'exporter': 'buckshot-perfilador'
+    }
+
+
+class PerfilPorPeticion:
+    """
+    Middleware WSGI: peticiones con X-Perfil y X-Admin-Token válido se
+    ejecutan bajo cProfile; el fichero va en la cabecera X-Perfil-Archivo
+    """
+
+    def __init__(self, wsgi_app, token, directorio):
+        self.wsgi_app = wsgi_app
+        self.token = token.encode()
+        self.directorio = directorio
+        os.makedirs(directorio, exist_ok=True)
+
+    def __call__(self, environ, start_response):
+        if 'HTTP_X_PERFIL' not in environ:
+            return self.wsgi_app(environ, start_response)
+        token = environ.get('HTTP_X_ADMIN_TOKEN', '').encode()
+        if not hmac.compare_digest(token, self.token):
+            return self.wsgi_app(environ, start_response)
+
+        ruta = environ.get('PATH_INFO', '').strip('/').replace('/', '_') or 'raiz'
+        archivo = os.path.join(self.directorio, f"{ruta}-{time.strftime('%Y%m%d-%H%M%S')}-"
+                                                f"{threading.get_ident()}.prof")
+
+        def start_response_con_perfil(status, cabeceras, exc_info=None):
+            return start_response(status, cabeceras + [('X-Perfil-Archivo', archivo)], exc_info)
+
+        perfil = cProfile.Profile()
+        perfil.enable()
+        try:
+            # La respuesta se materializa dentro del perfil (incluye la serialización)
+            respuesta = self.wsgi_app(environ, start_response_con_perfil)
+            try:
+                cuerpo = list(respuesta)
+            finally:
+                if hasattr(respuesta, 'close'):
+                    respuesta.close()
+        finally:
+            perfil.disable()
+            perfil.dump_stats(archivo)
+        return cuerpo
@@ -0,0 +1,120 @@
+"""
+Logging del servidor - cola en memoria y un hilo escritor
+Los hilos de petición solo encolan el registro (sin formatear ni escribir);
+el QueueListener lo formatea y lo escribe fuera del camino de la petición.
+Los registros van en JSON (una línea por registro) con la ruta de Flask,
+y las rutas calientes pueden muestrearse por debajo de WARNING.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+from datetime import datetime, timezone
+
+from flask import has_request_context, request
+
+# Atributos estándar de LogRecord (el resto son campos extra del registro)
+_ATRIBUTOS_RECORD = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class FormatoJSON(logging.Formatter):
+    """Una línea JSON por registro, con los campos extra"""
+
+    def format(self, record):
+        datos = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensaje': record.getMessage()
+        }
+        for clave, valor in vars(record).items():
+            if clave not in _ATRIBUTOS_RECORD:
+                datos[clave] = valor
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            datos['excepcion'] = record.exc_text
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+class FiltroRuta(logging.Filter):
+    """
+    Etiqueta cada registro con la ruta de la petición y descarta, según
+    la tasa de muestreo de esa ruta, los registros por debajo de WARNING
+    """
+
+    def __init__(self, muestreo=None, rng=None):
+        super().__init__()
+        self.muestreo = muestreo or {}
+        self.rng = rng or random.Random()
+
+    def filter(self, record):
+        if not hasattr(record, 'ruta') and has_request_context():
+            record.ruta = request.endpoint
+        tasa = self.muestreo.get(getattr(record, 'ruta', None))
+        if tasa is not None and record.levelno < logging.WARNING:
+            return self.rng.random() < tasa
+        return True
+
+
+class ManejadorCola(logging.handlers.QueueHandler):
+    """
+    QueueHandler que no formatea en el hilo de la petición (el mensaje se
+    construye con sus args en el listener) y que descarta registros si la
+    cola está llena en lugar de bloquear
+    """
+
+    def __init__(self, cola):
+        super().__init__(cola)
+        self.descartados = 0
+
+    def prepare(self, record):
+        # El traceback sí se captura aquí: el frame no sobrevive a la petición
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+
+def leer_muestreo(texto):
+    """'disparar=0.01,turno_bot=0.1' -> {'disparar': 0.01, 'turno_bot': 0.1}"""
+    muestreo = {}
+    for parte in (texto or '').split(','):
+        if '=' in parte:
+            ruta, tasa = parte.split('=', 1)
+            muestreo[ruta.strip()] = float(tasa)
+    return muestreo
+
+
+def configurar_logging(config):
+    """
+    Instalar la cola en el logger raíz y arrancar el hilo escritor
+    Returns: (manejador de la cola, listener)
+    """
+    salida = logging.StreamHandler()
+    if config.LOG_FORMATO == 'json':
+        salida.setFormatter(FormatoJSON())
+    else:
+        salida.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+    manejador = ManejadorCola(queue.Queue(config.LOG_COLA_MAX))
+    manejador.addFilter(FiltroRuta(leer_muestreo(config.LOG_MUESTREO)))
+
+    raiz = logging.getLogger()
+    for anterior in list(raiz.handlers):
+        raiz.removeHandler(anterior)
+    raiz.addHandler(manejador)
+    raiz.setLevel(config.LOG_NIVEL)
+
+    listener = logging.handlers.QueueListener(manejador.queue, salida, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return manejador, listener
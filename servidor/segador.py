@@ -0,0 +1,175 @@
+"""
+Segador de partidas abandonadas
+- RuedaTemporizadores: rueda de temporizadores jerárquica; programar y
+  vencer son O(1) por temporizador sin importar cuántos haya.
+- Segador: hilo que cada tick vence las partidas inactivas (en memoria y
+  hibernadas), las saca del almacén y las marca como abandonadas en
+  sesiones_juego con un solo UPDATE por tick.
+Los accesos no reprograman nada: al vencer un temporizador se mira el
+último acceso real y, si la partida se tocó después, se vuelve a programar.
+"""
+import logging
+import math
+import threading
+import time
+
+from metricas import metricas
+from models import Puntuacion, SesionJuego
+
+logger = logging.getLogger(__name__)
+
+
+class RuedaTemporizadores:
+    """
+    Niveles de `ranuras` ranuras; una ranura del nivel n abarca ranuras**n
+    ticks. Al entrar en el bloque de una ranura superior sus temporizadores
+    bajan de nivel; los del nivel 0 vencen en su tick.
+    """
+
+    def __init__(self, resolucion=1.0, ranuras=64, niveles=4, inicio=0.0):
+        self.resolucion = resolucion
+        self.ranuras = ranuras
+        self.niveles = niveles
+        self.tick = int(inicio / resolucion)
+        self.pendientes = 0
+        self._ruedas = [[[] for _ in range(ranuras)] for _ in range(niveles)]
+        # Más allá del último nivel: se recolocan al empezar cada vuelta completa
+        self._desbordados = []
+
+    def programar(self, clave, vencimiento):
+        """Vencer clave en el instante vencimiento (misma escala que inicio)"""
+        t = max(math.ceil(vencimiento / self.resolucion), self.tick + 1)
+        self._colocar(clave, t, self.tick + 1)
+        self.pendientes += 1
+
+    def _colocar(self, clave, t, base):
+        amplitud = 1
+        for nivel in range(self.niveles):
+            # Primer nivel cuyo bloque superior comparten t y base
+            if t // (amplitud * self.ranuras) == base // (amplitud * self.ranuras):
+                self._ruedas[nivel][(t // amplitud) % self.ranuras].append((t, clave))
+                return
+            amplitud *= self.ranuras
+        self._desbordados.append((t, clave))
+
+    def avanzar(self, ahora):
+        """Returns: lista de (tick de vencimiento, clave) vencidos hasta ahora"""
+        objetivo = int(ahora / self.resolucion)
+        vencidos = []
+        while self.tick < objetivo:
+            base = self.tick + 1
+            if base % self.ranuras ** self.niveles == 0 and self._desbordados:
+                desbordados, self._desbordados = self._desbordados, []
+                for t, clave in desbordados:
+                    self._colocar(clave, t, base)
+            for nivel in range(self.niveles - 1, 0, -1):
+                amplitud = self.ranuras ** nivel
+                if base % amplitud == 0:
+                    ranura = (base // amplitud) % self.ranuras
+                    bajan, self._ruedas[nivel][ranura] = self._ruedas[nivel][ranura], []
+                    for t, clave in bajan:
+                        self._colocar(clave, t, base)
+            ranura = base % self.ranuras
+            vencidos.extend(self._ruedas[0][ranura])
+            self._ruedas[0][ranura] = []
+            self.tick = base
+        self.pendientes -= len(vencidos)
+        return vencidos
+
+
+class Segador:
+    """Vence partidas sin acceso en `inactividad` segundos y las da por abandonadas"""
+
+    def __init__(self, almacen, inactividad, guardar_puntos=False, resolucion=1.0, lote_disco=1000):
+        self.almacen = almacen
+        self.inactividad = inactividad
+        self.guardar_puntos = guardar_puntos
+        self.resolucion = resolucion
+        self.lote_disco = lote_disco
+        self.rueda = RuedaTemporizadores(resolucion, inicio=time.monotonic())
+        self.ultimo_lote = 0
+        self._activadas = almacen.seguir_activaciones()
+        # Abandonadas aún sin marcar en la BD: (session_id, nombre, puntos, balas)
+        self.pendientes_bd = []
+        self._espera_bd = resolucion
+        self._proximo_intento_bd = 0.0
+
+    def tick(self):
+        """Una pasada. Returns: partidas abandonadas"""
+        ahora = time.monotonic()
+
+        # Partidas nuevas o rehidratadas desde el último tick
+        while self._activadas:
+            session_id = self._activadas.popleft()
+            sesion = self.almacen.calientes.get(session_id)
+            if sesion is not None:
+                self.rueda.programar(session_id, sesion.ultimo_acceso + self.inactividad)
+
+        candidatas = []
+        for _, session_id in self.rueda.avanzar(ahora):
+            sesion = self.almacen.calientes.get(session_id)
+            if sesion is None:
+                continue  # terminó o está hibernada (la recoge retirar_frias)
+            if sesion.ultimo_acceso + self.inactividad > ahora:
+                self.rueda.programar(session_id, sesion.ultimo_acceso + self.inactividad)
+            else:
+                candidatas.append(session_id)
+
+        abandonadas = self.almacen.retirar_inactivas(candidatas, ahora - self.inactividad)
+        for _, sesion in abandonadas:
+            metricas.observar('buckshot_segador_retraso_segundos',
+                              ahora - sesion.ultimo_acceso - self.inactividad)
+        en_memoria = len(abandonadas)
+        abandonadas += self.almacen.retirar_frias(time.time() - self.inactividad, self.lote_disco)
+
+        self.ultimo_lote = len(abandonadas)
+        if abandonadas:
+            metricas.contar('buckshot_sesiones_abandonadas_total', (('origen', 'memoria'),), en_memoria)
+            metricas.contar('buckshot_sesiones_abandonadas_total', (('origen', 'disco'),),
+                            len(abandonadas) - en_memoria)
+            # Ya fuera del almacén: desde aquí solo existen en pendientes_bd hasta llegar a la BD
+            self.pendientes_bd += [(session_id, sesion.nombre, sesion.puntos, sesion.balas_disparadas)
+                                   for session_id, sesion in abandonadas]
+        if self.pendientes_bd and ahora >= self._proximo_intento_bd:
+            self._finalizar(ahora)
+        return len(abandonadas)
+
+    def _finalizar(self, ahora):
+        """
+        Un UPDATE para todo pendientes_bd (y un INSERT de puntuaciones si se
+        guardan). Si la BD falla se reintenta todo, con espera creciente:
+        ambas sentencias se pueden repetir sin duplicar nada
+        """
+        filas = self.pendientes_bd
+        fecha = time.strftime('%Y-%m-%d %H:%M:%S')
+        try:
+            marcadas = SesionJuego.abandonar_lote([(session_id, puntos, balas)
+                                                   for session_id, _, puntos, balas in filas])
+            parciales = [
+                {'session_id': session_id, 'nombre': nombre, 'puntos': puntos, 'fecha': fecha}
+                for session_id, nombre, puntos, _ in filas if puntos > 0
+            ]
+            if self.guardar_puntos and parciales:
+                Puntuacion.guardar_lote(parciales)
+        except Exception as e:
+            metricas.contar('buckshot_segador_errores_total')
+            logger.error("❌ Error al marcar %d partidas abandonadas (reintento en %.0fs): %s",
+                         len(filas), self._espera_bd, e)
+            self._proximo_intento_bd = ahora + self._espera_bd
+            self._espera_bd = min(self._espera_bd * 2, 60.0)
+            return
+        self.pendientes_bd = []
+        self._espera_bd = self.resolucion
+        logger.info("🪦 %d partidas abandonadas (%d marcadas en sesiones_juego)", len(filas), marcadas)
+
+    def arrancar(self):
+        """Un tick cada resolucion segundos (hilo daemon)"""
+        def bucle():
+            while True:
+                time.sleep(self.resolucion)
+                try:
+                    with metricas.medir('buckshot_segador_tick_segundos'):
+                        self.tick()
+                except Exception as e:
+                    logger.error("❌ Error en el segador: %s", e)
+        threading.Thread(target=bucle, daemon=True).start()
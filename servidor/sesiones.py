@@ -0,0 +1,324 @@
+"""
+Almacén de partidas en curso con hibernación a disco
+- En memoria (calientes): OrderedDict session_id -> EstadoSesion en orden
+  de último acceso.
+- Hibernadas (frías): las que llevan más de `inactividad` segundos sin
+  tocarse se empaquetan (EstadoSesion.empaquetar) en una tabla SQLite y
+  salen de memoria. El siguiente acceso las rehidrata sin que la vista
+  lo note.
+Sin ruta no hay hibernación y se comporta como el dict de antes.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+
+from metricas import metricas
+from models import EstadoSesion
+
+logger = logging.getLogger(__name__)
+
+
+class AlmacenSesiones:
+    """Interfaz de dict (get, [], in, del, len) sobre partidas calientes y frías"""
+
+    def __init__(self, ruta=None, inactividad=300.0, lote=1000):
+        self.inactividad = inactividad
+        self.lote = lote
+        self.frias = 0
+        self._calientes = OrderedDict()
+        # Empaquetadas pero aún no escritas: session_id -> (datos, respuestas)
+        self._pendientes = {}
+        self._lock = threading.Lock()
+        self._lock_disco = threading.Lock()
+        self._conexion = None
+        # session_id de partidas que entran en memoria (solo si alguien las sigue)
+        self._activadas = None
+        if ruta:
+            self._abrir(ruta)
+
+    def _abrir(self, ruta):
+        # Varios workers pueden compartir el fichero: el que rehidrata se queda la partida
+        self._conexion = sqlite3.connect(ruta, timeout=5.0, check_same_thread=False)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        self._conexion.execute("""
+            CREATE TABLE IF NOT EXISTS sesiones_hibernadas (
+                session_id TEXT PRIMARY KEY,
+                datos BLOB NOT NULL,
+                respuestas TEXT,
+                hibernada_en REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+        self._conexion.execute(
+            "CREATE INDEX IF NOT EXISTS idx_hibernadas_fecha ON sesiones_hibernadas(hibernada_en)")
+        self._conexion.commit()
+        self._contar_frias()
+        logger.info("💤 Hibernación de partidas en %s (%d hibernadas)", ruta, self.frias)
+
+    @property
+    def calientes(self):
+        """Partidas en memoria (sin tocar su orden de acceso)"""
+        return self._calientes
+
+    def __len__(self):
+        return len(self._calientes)
+
+    def __iter__(self):
+        return iter(list(self._calientes))
+
+    def seguir_activaciones(self):
+        """
+        Cola (deque) donde se apunta cada session_id que entra en memoria,
+        nueva o rehidratada; empieza con las que ya están
+        """
+        with self._lock:
+            if self._activadas is None:
+                self._activadas = deque(self._calientes)
+            return self._activadas
+
+    def __setitem__(self, session_id, sesion):
+        sesion.ultimo_acceso = time.monotonic()
+        with self._lock:
+            self._calientes[session_id] = sesion
+            self._calientes.move_to_end(session_id)
+            if self._activadas is not None:
+                self._activadas.append(session_id)
+
+    def __getitem__(self, session_id):
+        sesion = self.get(session_id)
+        if sesion is None:
+            raise KeyError(session_id)
+        return sesion
+
+    def __contains__(self, session_id):
+        # Rehidrata: a un `in` siempre le sigue el acceso a la partida
+        return self.get(session_id) is not None
+
+    def __delitem__(self, session_id):
+        with self._lock:
+            if self._calientes.pop(session_id, None) is not None:
+                return
+            if self._pendientes.pop(session_id, None) is not None:
+                return
+        if self._conexion is None or not self._borrar_frias([session_id]):
+            raise KeyError(session_id)
+
+    def get(self, session_id, default=None):
+        """
+        Partida por session_id; si está hibernada se rehidrata (la lectura
+        del disco va sin el lock del almacén: no frena a las demás partidas)
+        """
+        with self._lock:
+            sesion = self._calientes.get(session_id)
+            if sesion is not None:
+                sesion.ultimo_acceso = time.monotonic()
+                self._calientes.move_to_end(session_id)
+                return sesion
+            if self._conexion is None or session_id is None:
+                return default
+
+            inicio = time.perf_counter()
+            fila = self._pendientes.pop(session_id, None)
+
+        if fila is None:
+            fila = self._reclamar(session_id)
+            if fila is None:
+                # Puede que otro hilo la haya rehidratado mientras tanto
+                with self._lock:
+                    return self._calientes.get(session_id, default)
+        sesion = self._despertar(*fila)
+
+        with self._lock:
+            actual = self._calientes.get(session_id)
+            if actual is not None:
+                return actual  # otro hilo la rehidrató antes: vale la suya
+            self._calientes[session_id] = sesion
+            if self._activadas is not None:
+                self._activadas.append(session_id)
+
+        metricas.observar('buckshot_rehidratacion_segundos', time.perf_counter() - inicio)
+        metricas.contar('buckshot_sesiones_rehidratadas_total')
+        return sesion
+
+    def _reclamar(self, session_id):
+        """Leer y borrar la fila de una partida hibernada. Returns: (datos, respuestas) o None"""
+        with self._lock_disco:
+            fila = self._conexion.execute(
+                "SELECT datos, respuestas FROM sesiones_hibernadas WHERE session_id = ?",
+                (session_id,)
+            ).fetchone()
+            if fila is None:
+                return None
+            cursor = self._conexion.execute(
+                "DELETE FROM sesiones_hibernadas WHERE session_id = ?", (session_id,))
+            self._conexion.commit()
+        if cursor.rowcount == 0:
+            return None  # otro worker la rehidrató antes
+        self.frias = max(self.frias - 1, 0)
+        return fila
+
+    @staticmethod
+    def _despertar(datos, respuestas):
+        sesion = EstadoSesion.desempaquetar(datos)
+        if respuestas:
+            sesion.respuestas = OrderedDict(json.loads(respuestas))
+        sesion.ultimo_acceso = time.monotonic()
+        return sesion
+
+    def _borrar_frias(self, session_ids):
+        with self._lock_disco:
+            cursor = self._conexion.executemany(
+                "DELETE FROM sesiones_hibernadas WHERE session_id = ?",
+                [(session_id,) for session_id in session_ids]
+            )
+            self._conexion.commit()
+        return cursor.rowcount
+
+    def _contar_frias(self):
+        with self._lock_disco:
+            self.frias = self._conexion.execute("SELECT COUNT(*) FROM sesiones_hibernadas").fetchone()[0]
+
+    def copiar_calientes(self):
+        """Lista de (session_id, EstadoSesion) en memoria, de la más antigua a la más reciente"""
+        with self._lock:
+            return list(self._calientes.items())
+
+    def adoptar(self, partidas):
+        """
+        Meter en memoria partidas de otro proceso (instantáneas); las que ya
+        están aquí se quedan. Van delante: llevan más tiempo sin acceso que
+        las de este worker
+        Returns: partidas adoptadas
+        """
+        adoptadas = 0
+        with self._lock:
+            for session_id, sesion in reversed(partidas):
+                if session_id in self._calientes:
+                    continue
+                self._calientes[session_id] = sesion
+                self._calientes.move_to_end(session_id, last=False)
+                if self._activadas is not None:
+                    self._activadas.append(session_id)
+                adoptadas += 1
+        return adoptadas
+
+    def retirar_inactivas(self, session_ids, limite):
+        """
+        Sacar de memoria las partidas de session_ids sin acceso desde limite
+        (time.monotonic); las que se tocaron entretanto se quedan
+        Returns: lista de (session_id, EstadoSesion) retiradas
+        """
+        retiradas = []
+        with self._lock:
+            for session_id in session_ids:
+                sesion = self._calientes.get(session_id)
+                if sesion is not None and sesion.ultimo_acceso <= limite:
+                    del self._calientes[session_id]
+                    retiradas.append((session_id, sesion))
+        return retiradas
+
+    def retirar_frias(self, limite, lote=1000):
+        """
+        Borrar del disco hasta `lote` partidas hibernadas sin acceso desde
+        limite (time.time()). Se hiberna como pronto `inactividad` segundos
+        tras el último acceso: último acceso <= hibernada_en - inactividad
+        Returns: lista de (session_id, EstadoSesion) retiradas
+        """
+        if self._conexion is None:
+            return []
+        with self._lock_disco:
+            # BEGIN IMMEDIATE: ningún otro worker la rehidrata entre el SELECT y el DELETE
+            self._conexion.execute("BEGIN IMMEDIATE")
+            try:
+                filas = self._conexion.execute(
+                    "SELECT session_id, datos FROM sesiones_hibernadas WHERE hibernada_en < ? "
+                    "ORDER BY hibernada_en LIMIT ?",
+                    (limite + self.inactividad, lote)
+                ).fetchall()
+                self._conexion.executemany(
+                    "DELETE FROM sesiones_hibernadas WHERE session_id = ?",
+                    [(session_id,) for session_id, _ in filas]
+                )
+                self._conexion.commit()
+            except Exception:
+                self._conexion.rollback()
+                raise
+        self.frias = max(self.frias - len(filas), 0)
+        return [(session_id, EstadoSesion.desempaquetar(datos)) for session_id, datos in filas]
+
+    def hibernar(self):
+        """
+        Pasar a disco las partidas inactivas (por lotes: el lock solo se
+        tiene mientras se empaqueta, no durante la escritura)
+        Returns: partidas hibernadas
+        """
+        if self._conexion is None:
+            return 0
+        total = 0
+        while True:
+            limite = time.monotonic() - self.inactividad
+            lote = []
+            with self._lock:
+                while self._calientes and len(lote) < self.lote:
+                    session_id, sesion = next(iter(self._calientes.items()))
+                    if sesion.ultimo_acceso > limite:
+                        break
+                    del self._calientes[session_id]
+                    respuestas = json.dumps(list(sesion.respuestas.items())) if sesion.respuestas else None
+                    fila = self._pendientes[session_id] = (sesion.empaquetar(), respuestas)
+                    lote.append((session_id, *fila))
+            if not lote:
+                break
+
+            ahora = time.time()
+            with self._lock_disco:
+                self._conexion.executemany(
+                    "INSERT OR REPLACE INTO sesiones_hibernadas (session_id, datos, respuestas, hibernada_en) "
+                    "VALUES (?, ?, ?, ?)",
+                    [(session_id, datos, respuestas, ahora) for session_id, datos, respuestas in lote]
+                )
+                self._conexion.commit()
+            with self._lock:
+                # Las que se rehidrataron desde _pendientes mientras se escribía ya no van en disco
+                despiertas = [session_id for session_id, *_ in lote
+                              if self._pendientes.pop(session_id, None) is None]
+            if despiertas:
+                self._borrar_frias(despiertas)
+
+            total += len(lote)
+            self.frias += len(lote) - len(despiertas)
+            metricas.contar('buckshot_sesiones_hibernadas_total', n=len(lote))
+            if len(lote) < self.lote:
+                break
+        return total
+
+    def arrancar(self, intervalo):
+        """Hibernar cada intervalo segundos (hilo daemon)"""
+        if self._conexion is None:
+            return
+
+        def bucle():
+            while True:
+                time.sleep(intervalo)
+                try:
+                    inicio = time.perf_counter()
+                    hibernadas = self.hibernar()
+                    self._contar_frias()
+                    if hibernadas:
+                        logger.info("💤 %d partidas hibernadas en %.1f ms (%d en memoria, %d en disco)",
+                                    hibernadas, (time.perf_counter() - inicio) * 1000,
+                                    len(self._calientes), self.frias)
+                except Exception as e:
+                    logger.error("❌ Error al hibernar partidas: %s", e)
+        threading.Thread(target=bucle, daemon=True).start()
+
+    def estadisticas(self):
+        return {
+            'calientes': len(self._calientes),
+            'frias': self.frias,
+            'hibernacion': self._conexion is not None,
+            'inactividad_segundos': self.inactividad
+        }
@@ -0,0 +1,205 @@
+"""
+Simulación headless de partidas - mismas reglas que app.disparar / app.turno_bot
+Usado por el torneo de estrategias y las herramientas de balance
+"""
+import random
+from functools import lru_cache
+
+from models import BuckshotGame, PoliticaBot
+
+
+# Registro de estrategias: nombre -> fábrica(config) -> decidir(...)
+#
+# decidir(rng, reales, fogueo, vidas_propias, vidas_rival) devuelve True si
+# dispara al rival y False si se dispara a sí mismo. reales/fogueo son las
+# balas que quedan en la escopeta (el juego anuncia la carga en cada ronda,
+# así que contar balas es información legítima para ambos lados).
+ESTRATEGIAS = {}
+
+
+def registrar_estrategia(nombre):
+    """Decorador para registrar una fábrica de estrategia"""
+    def decorador(fabrica):
+        ESTRATEGIAS[nombre] = fabrica
+        return fabrica
+    return decorador
+
+
+def crear_estrategia(nombre, config):
+    """Instanciar estrategia registrada para una configuración"""
+    if nombre not in ESTRATEGIAS:
+        disponibles = ", ".join(sorted(ESTRATEGIAS))
+        raise ValueError(f"Estrategia desconocida: {nombre} (disponibles: {disponibles})")
+    return ESTRATEGIAS[nombre](config)
+
+
+def comprobar_estrategias(nombres, config):
+    """
+    Validar estrategias antes de repartir shards (un error dentro de un
+    worker del pool llega como traza de imap_unordered)
+    Raises: ValueError con el motivo
+    """
+    for nombre in nombres:
+        if nombre not in ESTRATEGIAS:
+            disponibles = ", ".join(sorted(ESTRATEGIAS))
+            raise ValueError(f"Estrategia desconocida: {nombre} (disponibles: {disponibles})")
+        if nombre == 'politica':
+            if not config.BOT_POLITICA_PATH:
+                raise ValueError("La estrategia 'politica' necesita BOT_POLITICA_PATH "
+                                 "(tabla de entrenamiento_bot.py)")
+            try:
+                cargar_politica(config.BOT_POLITICA_PATH)
+            except (OSError, ValueError, KeyError) as e:
+                raise ValueError(f"No se pudo cargar {config.BOT_POLITICA_PATH}: {e}") from e
+
+
+@lru_cache(maxsize=None)
+def cargar_politica(ruta):
+    """Tabla de la política, una vez por proceso (la comparten todos sus shards)"""
+    return PoliticaBot.cargar(ruta)
+
+
+@registrar_estrategia('clasico')
+def estrategia_clasica(config):
+    """Bot actual del servidor: dispara al rival con BOT_PROB_DISPARAR_JUGADOR"""
+    prob = config.BOT_PROB_DISPARAR_JUGADOR
+
+    def decidir(rng, reales, fogueo, vidas_propias, vidas_rival):
+        return rng.random() < prob
+    return decidir
+
+
+@registrar_estrategia('aleatorio')
+def estrategia_aleatoria(config):
+    """Moneda al aire"""
+    def decidir(rng, reales, fogueo, vidas_propias, vidas_rival):
+        return rng.random() < 0.5
+    return decidir
+
+
+@registrar_estrategia('siempre_rival')
+def estrategia_siempre_rival(config):
+    """Nunca se arriesga: siempre dispara al rival"""
+    def decidir(rng, reales, fogueo, vidas_propias, vidas_rival):
+        return True
+    return decidir
+
+
+@registrar_estrategia('contador')
+def estrategia_contador(config):
+    """Cuenta balas: dispara al rival si quedan al menos tantas reales como fogueo"""
+    def decidir(rng, reales, fogueo, vidas_propias, vidas_rival):
+        return reales >= fogueo
+    return decidir
+
+
+@registrar_estrategia('politica')
+def estrategia_politica(config):
+    """Política aprendida en BOT_POLITICA_PATH (clásico en estados sin datos)"""
+    politica = cargar_politica(config.BOT_POLITICA_PATH)
+    respaldo = estrategia_clasica(config)
+
+    def decidir(rng, reales, fogueo, vidas_propias, vidas_rival):
+        objetivo = politica.decidir(vidas_propias, vidas_rival, reales, fogueo)
+        if objetivo is None:
+            return respaldo(rng, reales, fogueo, vidas_propias, vidas_rival)
+        return objetivo == 'jugador'
+    return decidir
+
+
+def jugar_partida(game, decidir_jugador, decidir_bot, rng):
+    """
+    Simular una partida completa
+    Returns: (gana_jugador, puntos, balas_disparadas)
+    """
+    config = game.config
+    puntos_bala_real = config.PUNTOS_BALA_REAL
+    puntos_fogueo_self = config.PUNTOS_FOGUEO_SELF
+
+    vidas_jugador = config.MAX_VIDAS
+    vidas_bot = config.MAX_VIDAS
+    puntos = 0
+    balas_disparadas = 0
+    turno_jugador = True
+    escopeta, reales, fogueo = game.cargar_escopeta(rng)
+
+    while True:
+        # Recarga (en el servidor es una petición sin disparo que no cambia turno)
+        if not escopeta:
+            escopeta, reales, fogueo = game.cargar_escopeta(rng)
+
+        bala = escopeta.pop(0)
+        balas_disparadas += 1
+
+        if turno_jugador:
+            al_rival = decidir_jugador(rng, reales, fogueo, vidas_jugador, vidas_bot)
+            if al_rival:
+                if bala == 1:
+                    vidas_bot -= 1
+                    puntos += puntos_bala_real
+                turno_jugador = False
+            elif bala == 1:
+                vidas_jugador -= 1
+                turno_jugador = False
+            else:
+                puntos += puntos_fogueo_self
+        else:
+            al_rival = decidir_bot(rng, reales, fogueo, vidas_bot, vidas_jugador)
+            if al_rival:
+                if bala == 1:
+                    vidas_jugador -= 1
+                turno_jugador = True
+            elif bala == 1:
+                # El bot se dispara con bala real y sigue teniendo el turno
+                vidas_bot -= 1
+
+        if bala == 1:
+            reales -= 1
+        else:
+            fogueo -= 1
+
+        if vidas_jugador <= 0 or vidas_bot <= 0:
+            return vidas_bot <= 0, puntos, balas_disparadas
+
+
+def configurar(base, **ajustes):
+    """Crear una subclase de configuración con valores sobrescritos"""
+    return type(f"{base.__name__}Ajustada", (base,), ajustes)
+
+
+def jugar_lote(config, estrategia_jugador, estrategia_bot, semilla, partidas,
+               histograma=False):
+    """
+    Simular un lote de partidas con un generador propio
+    histograma: si True, añade 'histograma_puntos' {puntos: partidas}
+    Returns: dict con sumas acumulables entre lotes
+    """
+    # Solo se usa cargar_escopeta: sin BOT_POLITICA_PATH no relee la tabla en cada shard
+    game = BuckshotGame(configurar(config, BOT_POLITICA_PATH=None))
+    rng = random.Random(semilla)
+    decidir_jugador = crear_estrategia(estrategia_jugador, config)
+    decidir_bot = crear_estrategia(estrategia_bot, config)
+    conteo_puntos = {} if histograma else None
+
+    victorias = suma_puntos = suma_puntos2 = suma_balas = suma_balas2 = 0
+    for _ in range(partidas):
+        gana, puntos, balas = jugar_partida(game, decidir_jugador, decidir_bot, rng)
+        victorias += gana
+        suma_puntos += puntos
+        suma_puntos2 += puntos * puntos
+        suma_balas += balas
+        suma_balas2 += balas * balas
+        if histograma:
+            conteo_puntos[puntos] = conteo_puntos.get(puntos, 0) + 1
+
+    resultado = {
+        'partidas': partidas,
+        'victorias_jugador': victorias,
+        'suma_puntos': suma_puntos,
+        'suma_puntos2': suma_puntos2,
+        'suma_balas': suma_balas,
+        'suma_balas2': suma_balas2
+    }
+    if histograma:
+        resultado['histograma_puntos'] = conteo_puntos
+    return resultado
@@ -0,0 +1,48 @@
+"""
+EstadoSesion.empaquetar/desempaquetar: hibernación e instantáneas guardan
+las partidas así y deben volver idénticas
+"""
+import pytest
+
+from models import EstadoSesion, FlujoAleatorio
+
+CAMPOS = ('nombre', 'vidas_jugador', 'vidas_bot', 'puntos', 'escopeta', 'turno_jugador',
+          'balas_disparadas', 'semilla', 'auto_bot')
+
+
+def partida(nombre='Ana', escopeta=(1, 0, 0, 1, 1), semilla=123456789, auto_bot=True):
+    rng = FlujoAleatorio(semilla)
+    rng.random()  # el estado del rng ya no es la semilla
+    sesion = EstadoSesion(nombre, 3, escopeta, semilla, rng, auto_bot)
+    sesion.vidas_bot = 1
+    sesion.puntos = 40
+    sesion.turno_jugador = False
+    sesion.balas_disparadas = 7
+    return sesion
+
+
+@pytest.mark.parametrize('sesion', [
+    partida(),
+    partida(nombre='Ñandú 🎯', escopeta=(), auto_bot=False),
+    partida(nombre='x' * 100, semilla=2**64 - 1),
+], ids=['normal', 'unicode-sin-balas', 'limites'])
+def test_empaquetar_y_desempaquetar(sesion):
+    copia = EstadoSesion.desempaquetar(sesion.empaquetar())
+    for campo in CAMPOS:
+        assert getattr(copia, campo) == getattr(sesion, campo), campo
+    assert isinstance(copia.escopeta, bytearray)
+    # El rng sigue la misma secuencia desde donde estaba
+    assert [copia.rng.random() for _ in range(5)] == [sesion.rng.random() for _ in range(5)]
+
+
+def test_no_guarda_cache_de_idempotencia():
+    sesion = partida()
+    sesion.respuestas = {'clave': {'puntos': 40}}
+    assert EstadoSesion.desempaquetar(sesion.empaquetar()).respuestas is None
+
+
+def test_version_desconocida():
+    datos = bytearray(partida().empaquetar())
+    datos[0] = EstadoSesion.VERSION + 1
+    with pytest.raises(ValueError):
+        EstadoSesion.desempaquetar(bytes(datos))
@@ -0,0 +1,80 @@
+"""
+instantanea.escribir/leer: las partidas vuelven iguales, también con
+nombres largos, desde ficheros de la versión 1 y nunca desde uno dañado
+"""
+import json
+import struct
+import time
+import zlib
+from collections import OrderedDict
+
+import pytest
+
+import instantanea
+from models import EstadoSesion, FlujoAleatorio
+
+
+def partida(nombre='Ana', semilla=42):
+    sesion = EstadoSesion(nombre, 3, [1, 0, 1], semilla, FlujoAleatorio(semilla))
+    sesion.puntos = 20
+    sesion.ultimo_acceso = time.monotonic() - 30
+    return sesion
+
+
+def test_escribir_y_leer(tmp_path):
+    ruta = tmp_path / 'sesiones-1.bin'
+    con_respuestas = partida('Bea')
+    con_respuestas.respuestas = OrderedDict([('k1', {'puntos': 20}), ('k2', {'game_over': False})])
+    partidas = [('s1', partida()), ('s2', con_respuestas)]
+
+    assert instantanea.escribir(str(ruta), partidas) == 2
+    leidas = instantanea.leer(str(ruta))
+
+    assert [session_id for session_id, _ in leidas] == ['s1', 's2']
+    for (_, original), (_, copia) in zip(partidas, leidas):
+        assert copia.empaquetar() == original.empaquetar()
+        assert copia.respuestas == original.respuestas
+        # Se guarda el tiempo sin acceso, no el instante
+        assert copia.ultimo_acceso == pytest.approx(original.ultimo_acceso, abs=1.0)
+
+
+def test_partida_de_mas_de_64_kib(tmp_path):
+    # La versión 1 guardaba el largo de la partida en 16 bits
+    ruta = tmp_path / 'sesiones-1.bin'
+    sesion = partida('x' * 70000)
+    instantanea.escribir(str(ruta), [('s1', sesion)])
+    [(_, copia)] = instantanea.leer(str(ruta))
+    assert copia.nombre == sesion.nombre
+
+
+def test_lee_version_1(tmp_path):
+    ruta = tmp_path / 'sesiones-1.bin'
+    sesion = partida()
+    datos = sesion.empaquetar()
+    respuestas = json.dumps([['k1', {'puntos': 20}]]).encode()
+    cuerpo = (b'BKSN\x01' + struct.pack('<I', 1)
+              + struct.pack('<BHIf', 2, len(datos), len(respuestas), 5.0)
+              + b's1' + datos + respuestas)
+    ruta.write_bytes(cuerpo + struct.pack('<I', zlib.crc32(cuerpo)))
+
+    [(session_id, copia)] = instantanea.leer(str(ruta))
+    assert session_id == 's1'
+    assert copia.empaquetar() == datos
+    assert copia.respuestas == OrderedDict([('k1', {'puntos': 20})])
+
+
+def test_crc_incorrecto(tmp_path):
+    ruta = tmp_path / 'sesiones-1.bin'
+    instantanea.escribir(str(ruta), [('s1', partida())])
+    datos = bytearray(ruta.read_bytes())
+    datos[len(instantanea.MAGIA) + 8] ^= 0xFF
+    ruta.write_bytes(bytes(datos))
+    with pytest.raises(ValueError, match='CRC'):
+        instantanea.leer(str(ruta))
+
+
+def test_no_es_una_instantanea(tmp_path):
+    ruta = tmp_path / 'sesiones-1.bin'
+    ruta.write_bytes(b'BKSN\x09' + bytes(16))
+    with pytest.raises(ValueError):
+        instantanea.leer(str(ruta))
@@ -0,0 +1,27 @@
+"""
+LimitadorPeticiones: ráfaga inicial, relleno al ritmo configurado y
+cubetas independientes por cliente
+"""
+import pytest
+
+from limites import LimitadorPeticiones
+
+
+def test_rafaga_y_relleno():
+    limitador = LimitadorPeticiones(por_minuto=6, rafaga=2)
+    assert limitador.consumir('a', ahora=0.0) == 0
+    assert limitador.consumir('a', ahora=0.0) == 0
+    assert limitador.consumir('a', ahora=0.0) == pytest.approx(10.0)
+    # Una ficha cada 10 s; la petición rechazada no consume
+    assert limitador.consumir('a', ahora=5.0) == pytest.approx(5.0)
+    assert limitador.consumir('a', ahora=10.0) == 0
+    assert limitador.consumir('a', ahora=10.0) > 0
+
+
+def test_clientes_independientes_y_acotados():
+    limitador = LimitadorPeticiones(por_minuto=1, max_clientes=2)
+    assert limitador.consumir('a', ahora=0.0) == 0
+    assert limitador.consumir('b', ahora=0.0) == 0
+    assert limitador.consumir('a', ahora=0.0) > 0
+    limitador.consumir('c', ahora=0.0)
+    assert len(limitador._cubetas) == 2
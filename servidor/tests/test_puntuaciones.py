@@ -0,0 +1,100 @@
+"""
+Puntuacion.guardar_lote: reenvíos y repetidas no duplican puntuaciones,
+las inválidas no llegan a la BD. La BD es un doble que se comporta como
+el índice único uq_puntuaciones_session con ON CONFLICT DO NOTHING
+"""
+from functools import partial
+
+import pytest
+
+import models
+from config import Config
+from models import Puntuacion, clave_instalacion, firma_partida
+
+
+class BDFalsa:
+    def __init__(self):
+        self.puntuaciones = {}  # session_id -> fila
+        self.sentencias = 0
+
+    def execute_values(self, query, filas, template=None, fetch=False):
+        assert 'ON CONFLICT' in query and fetch
+        self.sentencias += 1
+        insertadas = []
+        for fila in filas:
+            if fila[2] not in self.puntuaciones:
+                self.puntuaciones[fila[2]] = fila
+                insertadas.append((fila[2],))
+        return insertadas
+
+
+@pytest.fixture
+def bd(monkeypatch):
+    falsa = BDFalsa()
+    monkeypatch.setattr(models, 'db', falsa)
+    return falsa
+
+
+def entrada(session_id, puntos=10, nombre='Ana'):
+    return {'session_id': session_id, 'nombre': nombre, 'puntos': puntos,
+            'fecha': '2026-01-02 03:04:05'}
+
+
+def estados(resultados):
+    return [(r['session_id'], r['estado']) for r in resultados]
+
+
+def test_guarda_y_marca_duplicadas(bd):
+    bd.puntuaciones['s0'] = ('Previa', 5, 's0', None)
+    resultados = Puntuacion.guardar_lote([entrada('s0'), entrada('s1'), entrada('s1', 99), entrada('s2')])
+
+    assert estados(resultados) == [('s0', 'duplicada'), ('s1', 'guardada'),
+                                   ('s1', 'duplicada'), ('s2', 'guardada')]
+    # La primera de las repetidas dentro del lote; la previa no se toca
+    assert bd.puntuaciones['s1'][1] == 10
+    assert bd.puntuaciones['s1'][4] is True
+    assert bd.puntuaciones['s0'][0] == 'Previa'
+    assert bd.sentencias == 1
+
+
+def test_reenviar_el_lote_no_duplica(bd):
+    lote = [entrada(f's{i}', i) for i in range(5)]
+    Puntuacion.guardar_lote(lote)
+    resultados = Puntuacion.guardar_lote(lote)
+    assert {r['estado'] for r in resultados} == {'duplicada'}
+    assert len(bd.puntuaciones) == 5
+
+
+def test_invalidas_no_llegan_a_la_bd(bd):
+    resultados = Puntuacion.guardar_lote([
+        entrada('s1', -1), entrada('s2', True), entrada('s3', nombre='   '),
+        entrada('x' * 101), dict(entrada('s4'), fecha='ayer'), 'no-es-un-objeto'
+    ])
+    assert [r['estado'] for r in resultados] == ['invalida'] * 6
+    assert [r['mensaje'] for r in resultados] == [
+        'Puntos inválidos', 'Puntos inválidos', 'Nombre inválido', 'session_id inválido',
+        'Fecha inválida', 'Entrada no es un objeto']
+    assert bd.sentencias == 0
+
+
+def test_partidas_locales_sin_firma_valida(bd):
+    validar = partial(Puntuacion.verificar_partida_local, clave_maestra='maestra', config=Config)
+    local = dict(entrada('local-1'), instalacion='abc', semilla=1, jugadas='')
+    bien_firmada = dict(local, firma=firma_partida(local, clave_instalacion('maestra', 'abc')))
+    otra_instalacion = dict(local, firma=firma_partida(local, clave_instalacion('maestra', 'xyz')))
+    retocada = dict(bien_firmada, puntos=500)
+
+    resultados = Puntuacion.guardar_lote([
+        dict(entrada('s-servidor'), instalacion='abc', firma=''), local,
+        otra_instalacion, retocada
+    ], validar=validar)
+
+    assert [r['mensaje'] for r in resultados] == [
+        'session_id inválido', 'Sin firma', 'Firma inválida', 'Firma inválida']
+    assert bd.sentencias == 0
+
+
+def test_partidas_locales_no_verificadas(bd):
+    Puntuacion.guardar_lote([entrada('local-1')], validar=Puntuacion.validar_entrada,
+                            verificadas=False)
+    assert bd.puntuaciones['local-1'][4] is False
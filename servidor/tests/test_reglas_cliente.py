@@ -0,0 +1,44 @@
+"""
+Las reglas de cliente/motor_local.py son una copia de Config: el servidor
+rejuega con las suyas las partidas locales subidas
+"""
+import importlib.util
+import os
+
+from config import Config
+from models import reproducir_partida_local
+
+RUTA_MOTOR = os.path.join(os.path.dirname(__file__), '..', '..', 'cliente', 'motor_local.py')
+
+
+def cargar_motor_local():
+    # Por ruta: cliente/ y servidor/ tienen módulos con el mismo nombre (diario)
+    spec = importlib.util.spec_from_file_location('motor_local_cliente', RUTA_MOTOR)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def test_reglas_iguales_que_config():
+    motor = cargar_motor_local()
+    for nombre in ('MAX_VIDAS', 'PUNTOS_BALA_REAL', 'PUNTOS_FOGUEO_SELF', 'MIN_BALAS_REALES',
+                   'MAX_BALAS_REALES', 'MIN_BALAS_FOGUEO', 'MAX_BALAS_FOGUEO',
+                   'BOT_PROB_DISPARAR_JUGADOR'):
+        assert getattr(motor, nombre) == getattr(Config, nombre), nombre
+
+
+def test_partidas_locales_se_rejuegan_en_el_servidor():
+    motor = cargar_motor_local()
+    registros = []
+    local = motor.MotorLocal(al_terminar=registros.append)
+    for i in range(50):
+        respuesta = local.iniciar_juego('Ana', auto_bot=i % 2 == 0)
+        while not respuesta.get('game_over'):
+            if local.sesion['turno_jugador']:
+                respuesta = local.disparar('jugador' if i % 3 == 0 else 'bot')
+            else:
+                respuesta = local.turno_bot()
+
+    for registro in registros:
+        puntos, balas = reproducir_partida_local(registro['semilla'], registro['jugadas'], Config)
+        assert (puntos, balas) == (registro['puntos'], registro['balas_disparadas'])
@@ -0,0 +1,57 @@
+"""
+RuedaTemporizadores: cada temporizador vence en el tick correcto tras
+bajar de nivel (cascada) o desde los desbordados, comparado con una lista
+ordenada a fuerza bruta
+"""
+import math
+import random
+
+import pytest
+
+from segador import RuedaTemporizadores
+
+
+def simular(rueda, semilla, temporizadores=500, horizonte=2000):
+    """Programar y avanzar a saltos aleatorios. Returns: (vencidos, esperados) por paso"""
+    rng = random.Random(semilla)
+    pendientes = {}  # clave -> tick de vencimiento
+    pasos = []
+    ahora = 0.0
+    clave = 0
+    while ahora < horizonte:
+        for _ in range(rng.randint(0, temporizadores // 50)):
+            vencimiento = ahora + rng.uniform(0, horizonte / 2)
+            rueda.programar(clave, vencimiento)
+            pendientes[clave] = max(math.ceil(vencimiento / rueda.resolucion), rueda.tick + 1)
+            clave += 1
+        ahora += rng.choice((0.3, 1, 1, 5, 40))
+        objetivo = int(ahora / rueda.resolucion)
+        esperados = sorted((t, c) for c, t in pendientes.items() if t <= objetivo)
+        for _, c in esperados:
+            del pendientes[c]
+        pasos.append((sorted(rueda.avanzar(ahora)), esperados))
+    return pasos, pendientes
+
+
+@pytest.mark.parametrize('ranuras, niveles', [(64, 4), (4, 2), (2, 3)])
+@pytest.mark.parametrize('semilla', range(3))
+def test_vencen_igual_que_fuerza_bruta(ranuras, niveles, semilla):
+    # Con 4x2 o 2x3 ranuras casi todo baja de nivel o pasa por los desbordados
+    rueda = RuedaTemporizadores(resolucion=1.0, ranuras=ranuras, niveles=niveles)
+    pasos, pendientes = simular(rueda, semilla)
+    for vencidos, esperados in pasos:
+        assert vencidos == esperados
+    assert rueda.pendientes == len(pendientes)
+
+
+def test_resolucion_y_vencimientos_pasados():
+    rueda = RuedaTemporizadores(resolucion=0.5, ranuras=4, niveles=2, inicio=10.0)
+    rueda.programar('pasado', 3.0)    # se redondea al siguiente tick
+    rueda.programar('exacto', 12.0)
+    rueda.programar('lejos', 30.2)    # fuera de la rueda (4 ** 2 ticks)
+    assert rueda.avanzar(10.4) == []
+    assert rueda.avanzar(10.5) == [(21, 'pasado')]
+    assert rueda.avanzar(12.0) == [(24, 'exacto')]
+    assert rueda.avanzar(30.4) == []
+    assert rueda.avanzar(30.5) == [(61, 'lejos')]
+    assert rueda.pendientes == 0
@@ -0,0 +1,176 @@
+"""
+Torneo de estrategias - enfrenta estrategias de jugador y de bot en paralelo
+Uso:
+    python torneo.py --partidas 1000000 --jugadores contador,aleatorio --bots clasico,contador
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+from config import Config
+from models import derivar_semilla
+from simulacion import ESTRATEGIAS, comprobar_estrategias, jugar_lote
+
+# Tamaño de shard fijo: los resultados no dependen del número de procesos
+PARTIDAS_POR_SHARD = 50_000
+Z_95 = 1.959963984540054
+
+
+def _jugar_shard(tarea):
+    """Worker del pool: simula un shard con su propio stream de RNG"""
+    estrategia_jugador, estrategia_bot, semilla, partidas = tarea
+    resultado = jugar_lote(Config, estrategia_jugador, estrategia_bot, semilla, partidas)
+    return estrategia_jugador, estrategia_bot, resultado
+
+
+def generar_tareas(jugadores, bots, partidas, semilla, tam_shard=PARTIDAS_POR_SHARD):
+    """Dividir cada enfrentamiento en shards con semillas independientes"""
+    tareas = []
+    for jugador in jugadores:
+        for bot in bots:
+            restantes = partidas
+            indice = 0
+            while restantes > 0:
+                n = min(tam_shard, restantes)
+                tareas.append((jugador, bot, derivar_semilla(semilla, jugador, bot, indice), n))
+                restantes -= n
+                indice += 1
+    return tareas
+
+
+def intervalo_wilson(exitos, n, z=Z_95):
+    """Intervalo de confianza de Wilson para una proporción"""
+    if n == 0:
+        return 0.0, 0.0
+    p = exitos / n
+    denominador = 1 + z * z / n
+    centro = (p + z * z / (2 * n)) / denominador
+    margen = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominador
+    return centro - margen, centro + margen
+
+
+def media_e_intervalo(suma, suma2, n, z=Z_95):
+    """Media, desviación típica y semiancho del intervalo al 95%"""
+    if n == 0:
+        return 0.0, 0.0, 0.0
+    media = suma / n
+    varianza = max(suma2 / n - media * media, 0.0) * n / max(n - 1, 1)
+    desviacion = math.sqrt(varianza)
+    return media, desviacion, z * desviacion / math.sqrt(n)
+
+
+def resumir(acumulado):
+    """Convertir sumas acumuladas de un enfrentamiento en estadísticas"""
+    n = acumulado['partidas']
+    victorias = acumulado['victorias_jugador']
+    ic_bajo, ic_alto = intervalo_wilson(victorias, n)
+    puntos, puntos_std, puntos_ic = media_e_intervalo(
+        acumulado['suma_puntos'], acumulado['suma_puntos2'], n
+    )
+    balas, balas_std, balas_ic = media_e_intervalo(
+        acumulado['suma_balas'], acumulado['suma_balas2'], n
+    )
+    return {
+        'partidas': n,
+        'victorias_jugador': round(victorias / n, 6) if n else 0.0,
+        'victorias_jugador_ic95': [round(ic_bajo, 6), round(ic_alto, 6)],
+        'victorias_bot': round(1 - victorias / n, 6) if n else 0.0,
+        'puntos_promedio': round(puntos, 4),
+        'puntos_std': round(puntos_std, 4),
+        'puntos_ic95': round(puntos_ic, 4),
+        'balas_promedio': round(balas, 4),
+        'balas_std': round(balas_std, 4),
+        'balas_ic95': round(balas_ic, 4)
+    }
+
+
+def ejecutar_torneo(jugadores, bots, partidas, semilla=0, procesos=None,
+                    tam_shard=PARTIDAS_POR_SHARD):
+    """
+    Ejecutar torneo completo repartiendo shards entre procesos
+    Returns: lista de dicts (uno por enfrentamiento jugador vs bot)
+    """
+    comprobar_estrategias(list(jugadores) + list(bots), Config)
+
+    tareas = generar_tareas(jugadores, bots, partidas, semilla, tam_shard)
+    acumulados = {}
+
+    procesos = procesos or os.cpu_count() or 1
+    with Pool(processes=procesos) as pool:
+        for jugador, bot, parcial in pool.imap_unordered(_jugar_shard, tareas):
+            acumulado = acumulados.setdefault((jugador, bot), dict.fromkeys(parcial, 0))
+            for clave, valor in parcial.items():
+                acumulado[clave] += valor
+
+    return [
+        {'jugador': jugador, 'bot': bot, **resumir(acumulados[(jugador, bot)])}
+        for jugador in jugadores
+        for bot in bots
+    ]
+
+
+def imprimir_resultados(resultados):
+    """Tabla legible por consola"""
+    print(f"{'JUGADOR':<14}{'BOT':<14}{'PARTIDAS':>10}  {'VICTORIAS JUG. (IC95)':<28}"
+          f"{'PUNTOS':>16}{'BALAS':>16}")
+    for r in resultados:
+        ic_bajo, ic_alto = r['victorias_jugador_ic95']
+        victorias = f"{r['victorias_jugador']:.4f} [{ic_bajo:.4f}, {ic_alto:.4f}]"
+        puntos = f"{r['puntos_promedio']:.2f} ±{r['puntos_ic95']:.2f}"
+        balas = f"{r['balas_promedio']:.2f} ±{r['balas_ic95']:.2f}"
+        print(f"{r['jugador']:<14}{r['bot']:<14}{r['partidas']:>10}  {victorias:<28}"
+              f"{puntos:>16}{balas:>16}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Torneo de estrategias Buckshot Roulette")
+    parser.add_argument('--partidas', type=int, default=1_000_000,
+                        help="Partidas por enfrentamiento")
+    parser.add_argument('--jugadores', default='contador,aleatorio,siempre_rival',
+                        help="Estrategias de jugador separadas por comas")
+    parser.add_argument('--bots', default='clasico',
+                        help="Estrategias de bot separadas por comas")
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--procesos', type=int, default=None,
+                        help="Procesos del pool (por defecto todos los núcleos)")
+    parser.add_argument('--tam-shard', type=int, default=PARTIDAS_POR_SHARD)
+    parser.add_argument('--json', dest='salida_json', default=None,
+                        help="Guardar resultados en este archivo JSON")
+    parser.add_argument('--listar', action='store_true', help="Listar estrategias registradas")
+    args = parser.parse_args(argv)
+
+    if args.listar:
+        for nombre, fabrica in sorted(ESTRATEGIAS.items()):
+            print(f"{nombre:<14} {(fabrica.__doc__ or '').strip()}")
+        return 0
+
+    jugadores = [n.strip() for n in args.jugadores.split(',') if n.strip()]
+    bots = [n.strip() for n in args.bots.split(',') if n.strip()]
+
+    inicio = time.perf_counter()
+    try:
+        resultados = ejecutar_torneo(jugadores, bots, args.partidas, args.semilla,
+                                     args.procesos, args.tam_shard)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    duracion = time.perf_counter() - inicio
+
+    imprimir_resultados(resultados)
+    total = args.partidas * len(resultados)
+    print(f"\n⏱️  {total} partidas en {duracion:.2f}s ({total / duracion:,.0f} partidas/s)")
+
+    if args.salida_json:
+        with open(args.salida_json, 'w') as f:
+            json.dump({'semilla': args.semilla, 'resultados': resultados}, f, indent=2)
+        print(f"💾 Resultados guardados en {args.salida_json}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())